@@ -0,0 +1,227 @@
+from combineSeparate.startup import lazyModule
+
+om2 = lazyModule("maya.api.OpenMaya") #imported on first use
+oma2 = lazyModule("maya.api.OpenMayaAnim")
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import sys
+from combineSeparate import profiler
+from combineSeparate import resolution
+
+
+"""
+Maya Python API 2.0 bulk access
+whole arrays cross the API boundary in one call - no MScriptUtil, no per vertex iterators
+name lookups go through resolution.cache - inside a resolution scope a node is resolved once
+"""
+
+
+#count API 2.0 round-trips while profiling (profiler.enable)
+profiler.registerModule(sys.modules[__name__], "om2", "api")
+profiler.registerModule(sys.modules[__name__], "oma2", "api")
+
+
+def isAvailable():
+    return om2.isImportable() and oma2.isImportable()
+
+
+def getDagPath(node, shape=False):
+    """
+        @param[in] node: node name
+        @param[in] shape: True to extend the path to its shape
+        @returns: MDagPath (API 2.0)
+    """
+    def resolve():
+        selectionList = om2.MSelectionList()
+        selectionList.add(node)
+        dagPath = selectionList.getDagPath(0)
+        if shape:
+            dagPath.extendToShape()
+        return dagPath
+
+    dagPath = resolution.cache.get("dagPath", (node, shape), resolve, lambda i: i.isValid())
+    return om2.MDagPath(dagPath) #copy - callers may extend or pop the path
+
+
+def getDependNode(node):
+    def resolve():
+        selectionList = om2.MSelectionList()
+        selectionList.add(node)
+        return om2.MObjectHandle(selectionList.getDependNode(0))
+
+    return resolution.cache.get("handle2", node, resolve, lambda i: i.isValid()).object()
+
+
+def getMeshPoints(mesh, worldSpace=True):
+    """
+        @param[in] mesh: mesh transform or shape name
+        @returns: flat positions [x, y, z, x, y, z ...] (numpy array when available)
+    """
+    fnMesh = om2.MFnMesh(getDagPath(mesh, True))
+    space = om2.MSpace.kWorld if worldSpace else om2.MSpace.kObject
+    points = fnMesh.getPoints(space)
+    if numpy is not None:
+        return numpy.array(points, dtype=numpy.float64).reshape(-1, 4)[:, :3].reshape(-1) #MPoint is x, y, z, w
+    output = []
+    for p in points:
+        output.extend((p.x, p.y, p.z))
+    return output
+
+
+def getMeshConnectivity(mesh):
+    """
+        @param[in] mesh: mesh transform or shape name
+        @returns: (numVertices, faceCounts, faceConnects) as lists
+    """
+    fnMesh = om2.MFnMesh(getDagPath(mesh, True))
+    faceCounts, faceConnects = fnMesh.getVertices()
+    return fnMesh.numVertices, list(faceCounts), list(faceConnects)
+
+
+def getMeshUVSets(mesh):
+    """
+        @param[in] mesh: mesh transform or shape name
+        @returns: [(uv set name, u, v, uvCounts, uvIds)] - the current uv set first, one bulk read per set
+    """
+    fnMesh = om2.MFnMesh(getDagPath(mesh, True))
+    current = fnMesh.currentUVSetName()
+    output = []
+    for uvSet in [current] + [i for i in fnMesh.getUVSetNames() if i != current]:
+        u, v = fnMesh.getUVs(uvSet)
+        uvCounts, uvIds = fnMesh.getAssignedUVs(uvSet)
+        output.append((uvSet, list(u), list(v), list(uvCounts), list(uvIds)))
+    return output
+
+
+def getConnectedShaders(mesh):
+    """
+        @param[in] mesh: mesh transform or shape name
+        @returns: (shading group names, shading group index per face or -1)
+    """
+    fnMesh = om2.MFnMesh(getDagPath(mesh, True))
+    shaders, shaderIds = fnMesh.getConnectedShaders(0)
+    return [om2.MFnDependencyNode(i).name() for i in shaders], list(shaderIds)
+
+
+def createMesh(points, faceCounts, faceConnects, uvSets=()):
+    """
+        @param[in] points: flat object space positions [x, y, z, x, y, z ...]
+        @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout
+        @param[in] uvSets: [(uv set name, u, v, uvCounts, uvConnects)] - the first one fills the default uv set
+        @returns: MObject of the new mesh transform - every array is passed in one call
+    """
+    vertices = om2.MFloatPointArray([points[i:i + 3] for i in range(0, len(points), 3)])
+    newMesh = om2.MFnMesh()
+    transform = newMesh.create(vertices, om2.MIntArray(faceCounts), om2.MIntArray(faceConnects))
+
+    for idx, (uvSet, u, v, uvCounts, uvConnects) in enumerate(uvSets):
+        if idx:
+            uvSet = newMesh.createUVSet(uvSet)
+        else:
+            uvSet = newMesh.currentUVSetName()
+        if len(u):
+            newMesh.setUVs(om2.MFloatArray(u), om2.MFloatArray(v), uvSet)
+            newMesh.assignUVs(om2.MIntArray(uvCounts), om2.MIntArray(uvConnects), uvSet)
+    newMesh.updateSurface()
+    return transform
+
+
+def getFullPathName(node):
+    """
+        @param[in] node: MObject of a DAG node (API 2.0)
+        @returns: its current full path - the MObject survives rename / parent
+    """
+    return om2.MFnDagNode(node).fullPathName()
+
+
+def getCompleteComponents(dagPath):
+    """
+        @returns: MObject vertex component holding every vertex of the mesh
+    """
+    fnComponent = om2.MFnSingleIndexedComponent()
+    components = fnComponent.create(om2.MFn.kMeshVertComponent)
+    fnComponent.setCompleteData(om2.MFnMesh(dagPath).numVertices)
+    return components
+
+
+def getVertexComponents(start, stop):
+    """
+        @returns: MObject vertex component holding the vertices [start, stop)
+    """
+    fnComponent = om2.MFnSingleIndexedComponent()
+    components = fnComponent.create(om2.MFn.kMeshVertComponent)
+    fnComponent.addElements(list(range(start, stop)))
+    return components
+
+
+def getSkinCluster(skinCluster):
+    """
+        @param[in] skinCluster: skinCluster name
+        @returns: (MFnSkinCluster, dagPath of the deformed mesh, complete vertex components)
+    """
+    fnSC = oma2.MFnSkinCluster(getDependNode(skinCluster))
+    dagPath = fnSC.getPathAtIndex(0)
+    return fnSC, dagPath, getCompleteComponents(dagPath)
+
+
+def getInfluences(fnSC):
+    """
+        @returns: influence full names in the order of the skinCluster
+    """
+    return [i.fullPathName() for i in fnSC.influenceObjects()]
+
+
+def getWeights(skinCluster, vertexRange=None):
+    """
+        @param[in] skinCluster: skinCluster name
+        @param[in] vertexRange: (start, stop) to read a subset of the vertices, None for all
+        @returns: (flat vertex major weights, influence full names) - weights as numpy array when available
+    """
+    fnSC, dagPath, components = getSkinCluster(skinCluster)
+    if vertexRange is not None:
+        components = getVertexComponents(vertexRange[0], vertexRange[1])
+    weights, numInfluences = fnSC.getWeights(dagPath, components)
+    if numpy is not None:
+        weights = numpy.array(weights, dtype=numpy.float64)
+    return weights, getInfluences(fnSC)
+
+
+def setWeights(skinCluster, influences, weights, normalize=True, vertexRange=None):
+    """
+        @param[in] skinCluster: skinCluster name
+        @param[in] influences: influence full names in the column order of weights
+        @param[in] weights: flat vertex major weights for all vertices (or for vertexRange)
+        @param[in] vertexRange: (start, stop) to write a subset of the vertices, None for all
+    """
+    fnSC, dagPath, components = getSkinCluster(skinCluster)
+    if vertexRange is not None:
+        components = getVertexComponents(vertexRange[0], vertexRange[1])
+    indexMap = dict((name, i) for i, name in enumerate(getInfluences(fnSC)))
+    influenceIndices = om2.MIntArray([indexMap[i] for i in influences])
+    if numpy is not None and isinstance(weights, numpy.ndarray):
+        weights = weights.tolist()
+    fnSC.setWeights(dagPath, components, influenceIndices, om2.MDoubleArray(weights), normalize)
+
+
+def iterWeights(skinCluster, chunkSize):
+    """
+        @param[in] skinCluster: skinCluster name
+        @param[in] chunkSize: vertices per read
+        @returns: (influence full names, generator of flat vertex major weights per chunk of vertices)
+                  only one chunk is held at a time
+    """
+    fnSC, dagPath, components = getSkinCluster(skinCluster)
+    numVertices = om2.MFnMesh(dagPath).numVertices
+
+    def chunks():
+        for start in range(0, numVertices, chunkSize):
+            weights, numInfluences = fnSC.getWeights(dagPath, getVertexComponents(start, min(start + chunkSize, numVertices)))
+            if numpy is not None:
+                weights = numpy.array(weights, dtype=numpy.float64)
+            yield weights
+
+    return getInfluences(fnSC), chunks()
@@ -0,0 +1,155 @@
+import sys
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import resource
+except ImportError:
+    resource = None #windows, see getWindowsPeakMemory
+
+try:
+    array('q')
+    INT64 = 'q' #64 bit array typecode for offsets and vertex indices - 'l' is 32 bit on windows
+except ValueError:
+    INT64 = 'l' #python 2 has no 'q'
+
+
+"""
+compact array storage
+contiguous float64 blocks for captured points instead of lists of MPoint
+    pointBlock := N x 3 positions
+skin weights are stored sparse, see sparseWeights
+"""
+
+
+def newBuffer(values=None, size=0):
+    """
+        @param[in] values: float values to copy into the buffer, optional
+        @param[in] size: number of zeros when no values are passed
+        @returns: contiguous float64 buffer (numpy array when available, array('d') otherwise)
+    """
+    if numpy is not None:
+        if values is None:
+            return numpy.zeros(size, dtype=numpy.float64)
+        return numpy.array(values, dtype=numpy.float64).reshape(-1)
+    if values is None:
+        return array('d', [0.0]) * size
+    return array('d', values)
+
+
+def getNumBytes(buffer):
+    if numpy is not None and isinstance(buffer, numpy.ndarray):
+        return int(buffer.nbytes)
+    return buffer.itemsize * len(buffer)
+
+
+def getPeakMemory():
+    """
+        @returns: peak resident memory of the process in bytes, None if the platform does not report it
+    """
+    if resource is None:
+        return getWindowsPeakMemory()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak #bytes on macOS
+    return peak * 1024 #kilobytes on linux
+
+
+def getWindowsPeakMemory():
+    """
+        @returns: peak working set of the process in bytes (GetProcessMemoryInfo), None outside Windows
+    """
+    if sys.platform != "win32":
+        return None
+    import ctypes
+    from ctypes import wintypes
+
+    class processMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = processMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    #kernel32 exports GetProcessMemoryInfo as K32GetProcessMemoryInfo since Windows 7
+    if not ctypes.windll.kernel32.K32GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return int(counters.PeakWorkingSetSize)
+
+
+class rowBlock():
+    def __init__(self, numColumns, values=None, numRows=0):
+        """
+            @param[in] numColumns: values per row
+            @param[in] values: flat row-major values, optional
+            @param[in] numRows: number of zero rows when no values are passed
+        """
+        self.numColumns = int(numColumns)
+        if values is None:
+            self.data = newBuffer(size=numRows * self.numColumns)
+        else:
+            self.data = newBuffer(values)
+        if self.numColumns and len(self.data) % self.numColumns:
+            raise ValueError("%d values do not fill rows of %d" % (len(self.data), self.numColumns))
+
+    def setBuffer(self, buffer):
+        """
+            @param[in] buffer: flat row-major float64 buffer used as is - no copy (memory-mapped session arrays)
+        """
+        if self.numColumns and len(buffer) % self.numColumns:
+            raise ValueError("%d values do not fill rows of %d" % (len(buffer), self.numColumns))
+        self.data = buffer
+        return self
+
+    def __len__(self):
+        if not self.numColumns:
+            return 0
+        return len(self.data) // self.numColumns
+
+    def asArray(self):
+        """
+            @returns: numpy (rows x columns) view, None without numpy
+        """
+        if numpy is None:
+            return None
+        return self.data.reshape(-1, self.numColumns)
+
+    def nbytes(self):
+        return getNumBytes(self.data)
+
+
+class pointBlock(rowBlock):
+    def __init__(self, values=None, numPoints=0):
+        """
+            @param[in] values: flat positions [x, y, z, x, y, z ...], optional
+            @param[in] numPoints: number of zero points when no values are passed
+        """
+        rowBlock.__init__(self, 3, values, numPoints)
+
+    def __getitem__(self, i):
+        """
+            @returns: (x, y, z) of point i
+        """
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError(i)
+        data = self.data
+        return (float(data[i * 3]), float(data[i * 3 + 1]), float(data[i * 3 + 2]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
@@ -0,0 +1,205 @@
+import random
+
+from combineSeparate.meshPartition import meshPartition
+
+
+"""
+mesh / skin backends
+the pipeline reads meshes only through this interface
+    mayaBackend    := a live Maya scene (imports Maya on first use)
+    standinBackend := in-memory meshes, runs anywhere - synthetic scenes for tests and benchmarks
+"""
+
+
+class meshBackend():
+    def getMeshConnectivity(self, mesh):
+        """
+            @returns: (numVertices, faceCounts, faceConnects)
+        """
+        raise NotImplementedError
+
+    def getMeshPoints(self, mesh, worldSpace=True):
+        """
+            @returns: flat positions [x, y, z, x, y, z ...]
+        """
+        raise NotImplementedError
+
+    def getSkinWeights(self, mesh):
+        """
+            @returns: (flat vertex major weights, influence names)
+        """
+        raise NotImplementedError
+
+    def iterSkinWeights(self, mesh, chunkSize):
+        """
+            @returns: (influence names, generator of flat vertex major weights per chunk of chunkSize vertices)
+                      backends able to read vertex subsets override this, the default slices getSkinWeights
+        """
+        weights, influences = self.getSkinWeights(mesh)
+        rowSize = max(len(influences), 1)
+
+        def chunks():
+            for start in range(0, len(weights), chunkSize * rowSize):
+                yield weights[start:start + chunkSize * rowSize]
+
+        return influences, chunks()
+
+
+class mayaBackend(meshBackend):
+    def getMeshConnectivity(self, mesh):
+        from combineSeparate.main import objectCombine
+        return objectCombine.getMeshConnectivity(mesh)
+
+    def getMeshPoints(self, mesh, worldSpace=True):
+        from combineSeparate.main import objectCombine
+        return objectCombine.getMeshPoints(mesh, worldSpace)
+
+    def getSkinWeights(self, mesh):
+        from combineSeparate.main import fnSkinCluster, objectCombine
+        from combineSeparate import api2
+        skinCluster = fnSkinCluster.getSkinCluster(mesh)
+        if objectCombine.isApi2():
+            return api2.getWeights(skinCluster)
+        fnSC = fnSkinCluster.createMFnSkinCluster(skinCluster)
+        dagPath, components = fnSkinCluster.getGeometryComponents(fnSC)
+        return list(fnSkinCluster.getWeights(fnSC, dagPath, components)), fnSkinCluster.getSkinClusterInfluences(fnSC)
+
+    def iterSkinWeights(self, mesh, chunkSize):
+        from combineSeparate.main import fnSkinCluster, objectCombine
+        from combineSeparate import api2
+        skinCluster = fnSkinCluster.getSkinCluster(mesh)
+        if objectCombine.isApi2():
+            return api2.iterWeights(skinCluster, chunkSize)
+        fnSC = fnSkinCluster.createMFnSkinCluster(skinCluster)
+        return fnSkinCluster.getSkinClusterInfluences(fnSC), fnSkinCluster.iterWeights(fnSC, chunkSize)
+
+
+class standinBackend(meshBackend):
+    def __init__(self):
+        self.meshes = {} #{name: {"points", "faceCounts", "faceConnects", "weights", "influences"}}
+
+    def addMesh(self, name, points, faceCounts, faceConnects, weights=None, influences=None):
+        """
+            @param[in] points: flat positions
+            @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout
+            @param[in] weights, influences: flat vertex major skin weights and influence names, optional
+        """
+        self.meshes[name] = {
+            "points": list(points),
+            "faceCounts": list(faceCounts),
+            "faceConnects": list(faceConnects),
+            "weights": list(weights) if weights is not None else None,
+            "influences": list(influences) if influences is not None else None,
+        }
+        return name
+
+    def getMeshConnectivity(self, mesh):
+        data = self.meshes[mesh]
+        return len(data["points"]) // 3, data["faceCounts"], data["faceConnects"]
+
+    def getMeshPoints(self, mesh, worldSpace=True):
+        return self.meshes[mesh]["points"] #stand-in meshes have no transform
+
+    def getSkinWeights(self, mesh):
+        data = self.meshes[mesh]
+        if data["weights"] is None:
+            raise RuntimeError("%s is not skinned" % mesh)
+        return data["weights"], data["influences"]
+
+    def combine(self, meshes, name):
+        """
+            @concatenate the meshes in the passed in order (polyUnite)
+            @returns: name of the combined mesh
+        """
+        points = []
+        faceCounts = []
+        faceConnects = []
+        for mesh in meshes:
+            offset = len(points) // 3
+            data = self.meshes[mesh]
+            points.extend(data["points"])
+            faceCounts.extend(data["faceCounts"])
+            faceConnects.extend([i + offset for i in data["faceConnects"]])
+        return self.addMesh(name, points, faceCounts, faceConnects)
+
+    def separate(self, mesh, objectFaceIds, names):
+        """
+            @param[in] objectFaceIds: ascending face indices per output mesh
+            @param[in] names: output mesh names
+            @returns: list of (name, combined vertex ids)
+        """
+        data = self.meshes[mesh]
+        partition = meshPartition(data["faceCounts"], data["faceConnects"])
+        output = []
+        for faceIds, name in zip(objectFaceIds, names):
+            part = partition.extract(faceIds)
+            points = []
+            for v in part["vertexIds"]:
+                points.extend(data["points"][v * 3:v * 3 + 3])
+            self.addMesh(name, points, part["faceCounts"], part["faceConnects"])
+            output.append((name, part["vertexIds"]))
+        return output
+
+
+def makeGridShell(resolution, origin, size=1.0):
+    """
+        @param[in] resolution: vertices per side of a quad grid (>= 2)
+        @param[in] origin: (x, y, z) corner of the grid
+        @returns: (flat points, faceCounts, faceConnects) of a single shell
+    """
+    points = []
+    step = size / (resolution - 1)
+    for j in range(resolution):
+        for i in range(resolution):
+            #a slight bend keeps mirrored shells apart by their centroid
+            points.extend((origin[0] + i * step, origin[1] + 0.1 * step * i * j, origin[2] + j * step))
+    faceCounts = []
+    faceConnects = []
+    for j in range(resolution - 1):
+        for i in range(resolution - 1):
+            a = j * resolution + i
+            faceCounts.append(4)
+            faceConnects.extend((a, a + 1, a + resolution + 1, a + resolution))
+    return points, faceCounts, faceConnects
+
+
+def makeSyntheticScene(backend, numObjects=4, shellsPerObject=8, shellResolution=4, numInfluences=32, influencesPerVertex=4, seed=0):
+    """
+        @param[in] backend: standinBackend to fill
+        @param[in] numObjects: number of original objects
+        @param[in] shellsPerObject: shells per object
+        @param[in] shellResolution: vertices per side of every shell (shellResolution ** 2 vertices per shell)
+        @param[in] numInfluences: influences of the combined skin
+        @param[in] influencesPerVertex: non zero weights per vertex
+        @returns: (original object names, combined mesh name) - the combined mesh is skinned
+    """
+    rnd = random.Random(seed)
+    names = []
+    for o in range(numObjects):
+        points = []
+        faceCounts = []
+        faceConnects = []
+        for s in range(shellsPerObject):
+            origin = (o * 2.0, s * 2.0, rnd.uniform(-100.0, 100.0))
+            shellPoints, shellCounts, shellConnects = makeGridShell(shellResolution, origin)
+            offset = len(points) // 3
+            points.extend(shellPoints)
+            faceCounts.extend(shellCounts)
+            faceConnects.extend([i + offset for i in shellConnects])
+        names.append(backend.addMesh("object%d" % o, points, faceCounts, faceConnects))
+
+    combined = backend.combine(names, "combined")
+
+    numVertices = len(backend.meshes[combined]["points"]) // 3
+    influencesPerVertex = min(influencesPerVertex, numInfluences)
+    weights = [0.0] * (numVertices * numInfluences)
+    for v in range(numVertices):
+        columns = rnd.sample(range(numInfluences), influencesPerVertex)
+        values = [rnd.random() + 1e-3 for i in columns]
+        total = sum(values)
+        for column, value in zip(columns, values):
+            weights[v * numInfluences + column] = value / total
+    backend.meshes[combined]["weights"] = weights
+    backend.meshes[combined]["influences"] = ["joint%d" % i for i in range(numInfluences)]
+
+    return names, combined
@@ -0,0 +1,198 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import timeit
+import traceback
+
+from combineSeparate import profiler
+
+
+"""
+headless batch mode - combine / skin / separate over many asset files without a selection
+    python -m combineSeparate.batch manifest.json --workers 4 --summary summary.json
+    mayapy -m combineSeparate.batch manifest.json --worker maya --workers 4
+
+manifest := JSON list of assets (or {"assets": [...]})
+    maya asset    {"name", "scene", "objects": [...], "mode", "influences": [...], "session", "output", "singlePass"}
+        mode := "combine"   open scene, combine objects, save the session file (+ scene to output)
+                "separate"  open scene (skinned combined mesh), load the session, separate + restore skinning
+                "full"      combine, bind the combined mesh to influences, separate + restore skinning
+    standin asset {"name", "standin": {"shellsPerObject", "numObjects", "shellResolution", "numInfluences", "seed"}}
+        runs the pipeline on a synthetic scene (stand-in backend) - exercises the scheduling without Maya
+
+every worker process owns its backend (maya.standalone is initialized once per process)
+the summary holds per asset results, seconds and failures (error + traceback), a failing asset never stops the batch
+"""
+
+
+def standinWorker(asset):
+    """
+        @param[in] asset: {"name", "standin": {keyword arguments of benchmark.runSize}}
+        @returns: result dict of benchmark.runSize
+    """
+    from combineSeparate.benchmark import runSize
+    params = dict(asset.get("standin") or {})
+    result = runSize(params.pop("shellsPerObject", 8), **params)
+    if result["unmatchedShells"] or result["mismatchedMeshes"]:
+        raise RuntimeError("%d unmatched shells, %d mismatched meshes" % (result["unmatchedShells"], result["mismatchedMeshes"]))
+    return result
+
+
+def mayaWorker(asset):
+    """
+        @param[in] asset: maya asset of the manifest (see module doc)
+        @returns: {"combinedObject", "separatedMeshes", "session", "output"}
+    """
+    import maya.cmds as cmds
+    from combineSeparate.main import objectCombine
+
+    mode = asset.get("mode", "full")
+    if mode not in ("combine", "separate", "full"):
+        raise ValueError("unknown mode %s" % mode)
+
+    cmds.file(asset["scene"], o=1, f=1)
+
+    if mode == "separate":
+        instance = objectCombine.loadSession(asset["session"])
+    else:
+        instance = objectCombine(asset["objects"])
+        if len(instance.origObjectList) != len(asset["objects"]):
+            raise ValueError("objects not found in %s" % asset["scene"])
+        instance.doCombine()
+
+    if mode == "combine":
+        instance.saveSession(asset["session"])
+    else:
+        if mode == "full":
+            if not asset.get("influences"):
+                raise ValueError("mode full needs the influences to bind the combined mesh to")
+            cmds.skinCluster(asset["influences"], instance.tmp_combinedObject, tsb=1)
+        instance.doCollectSkinData_deleteSkin()
+        instance.doSeparate(asset.get("singlePass", True))
+        instance.doRecreateSkinning()
+
+    if asset.get("output"):
+        cmds.file(rename=asset["output"])
+        cmds.file(save=1, f=1)
+
+    return {
+        "combinedObject": instance.tmp_combinedObject,
+        "separatedMeshes": list(instance.separatedMeshes),
+        "session": asset.get("session"),
+        "output": asset.get("output"),
+    }
+
+
+WORKERS = {"standin": standinWorker, "maya": mayaWorker}
+
+
+def _initWorker(worker):
+    """
+        @process pool initializer - one backend per worker process
+    """
+    if worker == "maya":
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+
+
+def runAsset(task):
+    """
+        @param[in] task: (asset index, asset dict, worker name, profile)
+        @returns: asset record {"index", "name", "status", "seconds", "result" | "error" + "traceback", "profile"}
+    """
+    index, asset, worker, profile = task
+    record = {"index": index, "name": asset.get("name", str(index)), "pid": os.getpid()}
+    if profile:
+        profiler.enable()
+    start = timeit.default_timer()
+    try:
+        record["result"] = WORKERS[worker](asset)
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = "%s: %s" % (type(e).__name__, e)
+        record["traceback"] = traceback.format_exc()
+    record["seconds"] = timeit.default_timer() - start
+    if profile:
+        record["profile"] = profiler.getReport(perObject=True, profiler=profiler.disable())
+    return record
+
+
+def loadManifest(path):
+    """
+        @returns: list of asset dicts
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data["assets"]
+    return data
+
+
+def runBatch(assets, worker="standin", processes=None, profile=False):
+    """
+        @param[in] assets: list of asset dicts (see module doc)
+        @param[in] worker: "standin" or "maya"
+        @param[in] processes: number of worker processes, None = cpu count, 0 runs in this process (inside an interactive Maya)
+        @param[in] profile: True to attach a profiler report to every asset
+        @returns: summary {"worker", "processes", "seconds", "succeeded", "failed", "assets": [record, ...], "failures": [name, ...]}
+    """
+    if worker not in WORKERS:
+        raise ValueError("unknown worker %s" % worker)
+
+    tasks = [(i, asset, worker, profile) for i, asset in enumerate(assets)]
+    start = timeit.default_timer()
+
+    if processes == 0:
+        records = [runAsset(task) for task in tasks] #the running Maya (or this process) is the backend
+    else:
+        processes = processes or multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(min(processes, len(tasks)) or 1, _initWorker, (worker,))
+        try:
+            records = list(pool.imap_unordered(runAsset, tasks)) #finished assets are collected as they come
+        finally:
+            pool.close()
+            pool.join()
+
+    records.sort(key=lambda i: i["index"])
+    failures = [i["name"] for i in records if i["status"] != "ok"]
+    return {
+        "worker": worker,
+        "processes": processes,
+        "seconds": timeit.default_timer() - start,
+        "succeeded": len(records) - len(failures),
+        "failed": len(failures),
+        "assets": records,
+        "failures": failures,
+    }
+
+
+def formatSummary(summary):
+    lines = ["%-30s %8s %10s  %s" % ("asset", "status", "seconds", "error")]
+    for record in summary["assets"]:
+        lines.append("%-30s %8s %9.3fs  %s" % (record["name"], record["status"], record["seconds"], record.get("error", "")))
+    lines.append("%d ok, %d failed in %.3fs (%s, %s processes)" % (summary["succeeded"], summary["failed"], summary["seconds"], summary["worker"], summary["processes"]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="combine / separate a manifest of assets on a pool of worker processes")
+    parser.add_argument("manifest", help="JSON list of assets")
+    parser.add_argument("--worker", choices=sorted(WORKERS), default="standin")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, 0 runs in this process")
+    parser.add_argument("--profile", action="store_true", help="attach a profiler report to every asset")
+    parser.add_argument("--summary", help="file to write the JSON summary to")
+    args = parser.parse_args(argv)
+
+    summary = runBatch(loadManifest(args.manifest), args.worker, args.workers, args.profile)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+    sys.stdout.write(formatSummary(summary) + "\n")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
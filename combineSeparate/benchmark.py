@@ -0,0 +1,155 @@
+import argparse
+import json
+import math
+import sys
+import timeit
+
+from combineSeparate import pipeline
+from combineSeparate import verification
+from combineSeparate.backend import standinBackend, makeSyntheticScene
+from combineSeparate.arrayStore import pointBlock
+from combineSeparate.sparseWeights import sparseWeights
+
+
+"""
+stage benchmark - runs without Maya on the stand-in backend
+    python -m combineSeparate.benchmark --sizes 8 32 128 --json
+
+for every size (shells per object) a synthetic combined mesh is generated and each stage is timed
+    capture  := points, topology and weights of the combined mesh into buffers
+    shells   := shell labels + signatures of the originals and the combined mesh
+    matching := original shells -> combined shells, separated vertices -> combined vertices
+    remap    := sparse weights of every separated mesh for its used influences
+    verify   := skinned positions of the combined and the separated meshes compared at sampled poses
+the scaling exponent of a stage between two sizes is log(t2 / t1) / log(n2 / n1), ~1 is linear
+"""
+
+
+STAGES = ["capture", "shells", "matching", "remap", "verify"]
+
+
+def timeStage(timings, stage, function, *args):
+    start = timeit.default_timer()
+    result = function(*args)
+    timings[stage] = timings.get(stage, 0.0) + timeit.default_timer() - start
+    return result
+
+
+def runSize(shellsPerObject, numObjects=4, shellResolution=4, numInfluences=32, seed=0, workers=1, chunkSize=None):
+    """
+        @param[in] workers: remap threads (pipeline.iterRemapWeights)
+        @param[in] chunkSize: capture the weights in chunks of this many vertices, None in one read
+        @returns: dict - size info and the seconds spent per stage
+    """
+    backend = standinBackend()
+    names, combined = makeSyntheticScene(backend, numObjects, shellsPerObject, shellResolution, numInfluences, seed=seed)
+    timings = {}
+
+    capture = timeStage(timings, "capture", pipeline.captureMesh, backend, combined, True, chunkSize)
+
+    #shells of the originals (captured at tool start) and of the combined mesh
+    def analyse():
+        origSignatures = []
+        for name in names:
+            numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(name)
+            origSignatures.append(pipeline.analyseShells(numVertices, faceCounts, faceConnects, backend.getMeshPoints(name))[2])
+        combinedShells = pipeline.analyseShells(capture["numVertices"], capture["faceCounts"], capture["faceConnects"], capture["points"].data)
+        return origSignatures, combinedShells
+    origSignatures, combinedShells = timeStage(timings, "shells", analyse)
+    faceLabels, shells, combinedSignatures = combinedShells
+
+    #the separated meshes the matching stage has to resolve
+    assignment, unmatched = pipeline.matchShells(origSignatures, combinedSignatures)
+    objectFaceIds = [[] for i in names]
+    for idx_k, idx_i in enumerate(assignment):
+        objectFaceIds[max(idx_i, 0)].extend(shells[idx_k])
+    for faceIds in objectFaceIds:
+        faceIds.sort()
+    separated = backend.separate(combined, objectFaceIds, ["%s_separated" % i for i in names])
+
+    def match():
+        pipeline.matchShells(origSignatures, combinedSignatures)
+        combinedHash = pipeline.buildVertexHash(capture["points"])
+        return [pipeline.matchVertices(combinedHash, pointBlock(backend.getMeshPoints(name))) for name, vertexIds in separated]
+    vertexMaps = timeStage(timings, "matching", match)
+
+    def remap():
+        return list(pipeline.iterRemapWeights(capture["sparseWeights"], vertexMaps, workers))
+    remapped = timeStage(timings, "remap", remap)
+
+    def verify():
+        restored = []
+        for (name, vertexIds), (usedColumns, weights) in zip(separated, remapped):
+            weights = sparseWeights.fromDense(weights, len(usedColumns))
+            restored.append((name, backend.getMeshPoints(name), verification.toInfluenceColumns(weights, usedColumns, numInfluences)))
+        center, size = verification.getBounds(capture["points"].data)
+        poses = verification.samplePoses(numInfluences, 4, center, size, seed=seed)
+        return verification.verifySkinning(capture["points"].data, capture["sparseWeights"], vertexMaps, restored, poses)
+    report = timeStage(timings, "verify", verify)
+
+    mismatched = sum([1 for vertexMap, (name, vertexIds) in zip(vertexMaps, separated) if list(vertexMap) != list(vertexIds)])
+
+    return {
+        "shellsPerObject": shellsPerObject,
+        "objects": numObjects,
+        "shells": len(shells),
+        "vertices": capture["numVertices"],
+        "influences": numInfluences,
+        "unmatchedShells": len(unmatched),
+        "mismatchedMeshes": mismatched,
+        "maxError": report["maxError"],
+        "seconds": timings,
+    }
+
+
+def getScaling(results):
+    """
+        @returns: {stage: [exponent between size i and i + 1, ...]} measured against the vertex count
+    """
+    output = {}
+    for stage in STAGES:
+        exponents = []
+        for a, b in zip(results[:-1], results[1:]):
+            ta = a["seconds"][stage]
+            tb = b["seconds"][stage]
+            if ta > 0 and tb > 0 and b["vertices"] != a["vertices"]:
+                exponents.append(math.log(tb / ta) / math.log(float(b["vertices"]) / a["vertices"]))
+            else:
+                exponents.append(None)
+        output[stage] = exponents
+    return output
+
+
+def formatTable(results, scaling):
+    lines = ["%10s %10s" % ("shells", "vertices") + "".join(["%12s" % i for i in STAGES])]
+    for result in results:
+        lines.append("%10d %10d" % (result["shells"], result["vertices"]) + "".join(["%11.4fs" % result["seconds"][i] for i in STAGES]))
+    lines.append("%21s" % "exponent" + "".join(["%12s" % " ".join(["%.2f" % e if e is not None else "-" for e in scaling[i]]) for i in STAGES]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="time the combine / separate stages on synthetic meshes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 32, 128], help="shells per object")
+    parser.add_argument("--objects", type=int, default=4)
+    parser.add_argument("--resolution", type=int, default=4, help="vertices per side of a shell")
+    parser.add_argument("--influences", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="remap threads, 0 one per cpu")
+    parser.add_argument("--chunk", type=int, default=None, help="capture the weights in chunks of this many vertices")
+    parser.add_argument("--json", action="store_true", help="print a JSON report instead of a table")
+    args = parser.parse_args(argv)
+
+    runSize(min(args.sizes), args.objects, args.resolution, args.influences, args.seed, args.workers, args.chunk) #warm up - first call costs (imports, numpy dispatch) are not scaling
+    results = [runSize(size, args.objects, args.resolution, args.influences, args.seed, args.workers, args.chunk) for size in args.sizes]
+    scaling = getScaling(results)
+
+    if args.json:
+        sys.stdout.write(json.dumps({"results": results, "scaling": scaling}, indent=2, sort_keys=True) + "\n")
+    else:
+        sys.stdout.write(formatTable(results, scaling) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import hashlib
+from array import array
+
+from combineSeparate.sessionFile import toBytes
+
+
+"""
+combine ledger
+vertex and face index ranges of every source object inside the combined mesh, recorded at combine time
+
+polyUnite appends the sources one after another, so while the combined topology is unchanged
+source i owns the vertices [vertexStart, vertexEnd) and the faces [faceStart, faceEnd)
+and shells / weights can be mapped by slicing instead of geometric matching
+"""
+
+
+def topologyChecksum(faceCounts, faceConnects):
+    """
+        @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout
+        @returns: hex digest of the mesh topology
+    """
+    md5 = hashlib.md5()
+    md5.update(toBytes([len(faceCounts), len(faceConnects)], "i"))
+    md5.update(toBytes(faceCounts, "i"))
+    md5.update(toBytes(faceConnects, "i"))
+    return md5.hexdigest()
+
+
+class combineLedger():
+    def __init__(self):
+        self.names = [] #source object names in combine order
+        self.vertexRanges = [] #[(start, end), ...] per source
+        self.faceRanges = [] #[(start, end), ...] per source
+        self.checksum = None #topology checksum of the combined mesh
+        self.valid = False #True when the combined mesh is exactly the concatenation of the sources
+
+        self._counts = array('i')
+        self._connects = array('i')
+
+    def __len__(self):
+        return len(self.names)
+
+    def addSource(self, name, numVertices, faceCounts, faceConnects):
+        """
+            @param[in] name: source object full name, sources have to be added in combine order
+            @param[in] numVertices: number of vertices of the source
+            @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout of the source
+        """
+        vertexStart = self.vertexRanges[-1][1] if self.vertexRanges else 0
+        faceStart = self.faceRanges[-1][1] if self.faceRanges else 0
+
+        self.names.append(name)
+        self.vertexRanges.append((vertexStart, vertexStart + numVertices))
+        self.faceRanges.append((faceStart, faceStart + len(faceCounts)))
+
+        self._counts.extend(faceCounts)
+        self._connects.extend([i + vertexStart for i in faceConnects])
+
+    def setCombined(self, faceCounts, faceConnects):
+        """
+            @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout of the combined mesh
+            @returns: True if the combined mesh matches the recorded sources (the ledger can be used)
+        """
+        self.checksum = topologyChecksum(faceCounts, faceConnects)
+        self.valid = self.checksum == topologyChecksum(self._counts, self._connects)
+
+        #the concatenated topology is only needed for the check above
+        self._counts = array('i')
+        self._connects = array('i')
+        return self.valid
+
+    def matches(self, checksum):
+        """
+            @param[in] checksum: topology checksum of the combined mesh as it is now
+            @returns: True if the ranges still describe the combined mesh
+        """
+        return self.valid and checksum == self.checksum
+
+    def getFaceIndices(self, i):
+        """
+            @returns: face indices of source i in the combined mesh
+        """
+        start, end = self.faceRanges[i]
+        return range(start, end)
+
+    def getVertexRange(self, i):
+        """
+            @returns: (start, end) vertex indices of source i in the combined mesh
+        """
+        return self.vertexRanges[i]
+
+    def toDict(self):
+        """
+            @returns: JSON serializable state (the ledger is complete once setCombined was called)
+        """
+        return {
+            "names": list(self.names),
+            "vertexRanges": [list(i) for i in self.vertexRanges],
+            "faceRanges": [list(i) for i in self.faceRanges],
+            "checksum": self.checksum,
+            "valid": self.valid,
+        }
+
+    @classmethod
+    def fromDict(cls, data):
+        output = cls()
+        output.names = list(data["names"])
+        output.vertexRanges = [tuple(i) for i in data["vertexRanges"]]
+        output.faceRanges = [tuple(i) for i in data["faceRanges"]]
+        output.checksum = data["checksum"]
+        output.valid = data["valid"]
+        return output
@@ -1,9 +1,40 @@
-import maya.cmds as cmds
-import maya.OpenMaya as OpenMaya
-import maya.OpenMayaAnim as OpenMayaAnim
-import maya.mel as mel
-from combineSeparate.tools.duplicateSeparate_launch import *
-from combineSeparate.tools.flattenCombineDontMerge_launch import *
+from combineSeparate.startup import lazyModule
+from combineSeparate.tools.duplicateSeparate_launch import runDuplicateSeparate
+from combineSeparate.tools.flattenCombineDontMerge_launch import runFlattenCombine
+from combineSeparate.shellIndex import makeSignature
+from combineSeparate.meshShells import shellFaces, formatComponents
+from combineSeparate.combineLedger import combineLedger, topologyChecksum
+from combineSeparate.meshPartition import meshPartition, extractAssigned, getOffsets, gatherItems
+from combineSeparate.arrayStore import pointBlock, getPeakMemory
+from combineSeparate.sparseWeights import sparseWeights
+from combineSeparate.shellCache import shellCache, meshKey
+from combineSeparate.vertexTransfer import vertexIndexMap, captureChannels, transferChannels
+from combineSeparate import verification
+from combineSeparate import api2
+from combineSeparate import sessionFile
+from combineSeparate import pipeline
+from combineSeparate import backend
+from combineSeparate import profiler
+from combineSeparate import resolution
+from combineSeparate.profiler import profiled, objectStage, recordSizes
+import functools
+import sys
+from array import array
+
+#Maya modules are imported on first use - importing this module stays cheap (see startup.probeImport)
+cmds = lazyModule("maya.cmds")
+OpenMaya = lazyModule("maya.OpenMaya")
+OpenMayaAnim = lazyModule("maya.OpenMayaAnim")
+mel = lazyModule("maya.mel")
+
+SESSION_VERSION = 2 #layout of saveSession - 2 stores the sparse weights only
+
+
+#count Maya round-trips of this module while profiling (profiler.enable)
+profiler.registerModule(sys.modules[__name__], "cmds", "commands")
+profiler.registerModule(sys.modules[__name__], "mel", "commands")
+profiler.registerModule(sys.modules[__name__], "OpenMaya", "api")
+profiler.registerModule(sys.modules[__name__], "OpenMayaAnim", "api")
 
 
 """
@@ -13,11 +44,69 @@ preserve skinning
 """
 
 
+def resolutionScope(function):
+    """
+        @decorator - runs a stage inside a scope of resolution.cache, names resolved by the stage are looked up once
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        resolution.cache.watchScene()
+        with resolution.cache.scope():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def toList(values):
+    """
+        @returns: plain list of numbers (numpy arrays through tolist, no per element call)
+    """
+    if hasattr(values, "tolist"):
+        return values.tolist()
+    return list(values)
+
+
+def toMIntArray(values):
+    """
+        @returns: MIntArray (API 1.0) filled with one MScriptUtil copy instead of one set call per element
+    """
+    values = [int(i) for i in toList(values)]
+    if not values:
+        return OpenMaya.MIntArray()
+    util = OpenMaya.MScriptUtil()
+    util.createFromList(values, len(values))
+    return OpenMaya.MIntArray(util.asIntPtr(), len(values))
+
+
+def toMFloatArray(values):
+    """
+        @returns: MFloatArray (API 1.0), see toMIntArray
+    """
+    values = toList(values)
+    if not values:
+        return OpenMaya.MFloatArray()
+    util = OpenMaya.MScriptUtil()
+    util.createFromList(values, len(values))
+    return OpenMaya.MFloatArray(util.asFloatPtr(), len(values))
+
+
+def toMDoubleArray(values):
+    """
+        @returns: MDoubleArray (API 1.0), see toMIntArray
+    """
+    values = toList(values)
+    if not values:
+        return OpenMaya.MDoubleArray()
+    util = OpenMaya.MScriptUtil()
+    util.createFromList(values, len(values))
+    return OpenMaya.MDoubleArray(util.asDoublePtr(), len(values))
+
+
 class fnSkinCluster():
     def __init__(self):
-        print "skinProcessor initialized"
+        print("skinProcessor initialized")
 
     @classmethod
+    @profiled("fnSkinCluster.getShape")
     def getShape(cls, node, intermediate=False):
         """
             Gets the shape from the specified node.
@@ -25,6 +114,13 @@ class fnSkinCluster():
             @param[in] intermediate True to get the intermediate shape, False to get the visible shape.
             @return The name of the desired shape node
         """
+        return resolution.cache.get("shape", (node, intermediate), lambda: cls.resolveShape(node, intermediate))
+
+    @classmethod
+    def resolveShape(cls, node, intermediate=False):
+        """
+            @getShape without the cache
+        """
         if cmds.nodeType(node) == 'transform':
             shapes = cmds.listRelatives(node, shapes=True, path=True)
             if not shapes:
@@ -42,6 +138,7 @@ class fnSkinCluster():
         return None 
 
     @classmethod
+    @profiled("fnSkinCluster.getSkinCluster")
     def getSkinCluster(cls, shape):
         """
             Get the skinCluster node attached to the specified shape.
@@ -49,25 +146,31 @@ class fnSkinCluster():
             @return The attached skinCluster name or None if no skinCluster is attached.
         """
         shape = cls.getShape(shape)
-        history = cmds.listHistory(shape, pruneDagObjects=True, il=2)
-        if not history:
+
+        def resolve():
+            #one ls call filters the whole history by type
+            skins = cmds.ls(cmds.listHistory(shape, pruneDagObjects=True, il=2) or [], type='skinCluster')
+            if skins:
+                return skins[0]
             return None
-        skins = [x for x in history if cmds.nodeType(x) == 'skinCluster']
-        if skins:
-            return skins[0]
-        return None
+
+        return resolution.cache.get("skinCluster", shape, resolve)
 
     @classmethod
+    @profiled("fnSkinCluster.getSkinClusterSet")
     def getSkinClusterSet(cls, skinCluster):
         """ get skinClusterSet for a passed in skinCluster
             @param[in] skinCLuster: name of skinCluster
             @type skinCluster: string
         """
-        deformerSet = cmds.connectionInfo(skinCluster + ".message", dfs=1)[0]
-        deformerSet = deformerSet.split(".")[0]
-        return deformerSet
+        def resolve():
+            deformerSet = cmds.connectionInfo(skinCluster + ".message", dfs=1)[0]
+            return deformerSet.split(".")[0]
+
+        return resolution.cache.get("skinClusterSet", skinCluster, resolve)
 
     @classmethod
+    @profiled("fnSkinCluster.getSkinClusterJoints")
     def getSkinClusterJoints(cls, skinCluster):
         """
             Get list of joints connected with the skinCluster
@@ -75,47 +178,62 @@ class fnSkinCluster():
             @type skinCluster: string
             @returns: list of joints (fullname)
         """
-        output = []
-        matrixAttrLen =  cmds.getAttr(skinCluster + ".matrix", s=1) #get len of array attribute (matrix)
+        return list(resolution.cache.get("joints", skinCluster, lambda: cls.resolveSkinClusterJoints(skinCluster)))
 
-        for i in range(0, matrixAttrLen):
-            jointAttr = cmds.ls(cmds.connectionInfo(skinCluster + ".matrix[" + str(i) + "]", sfd=1), l=1)[0]
-            joint = jointAttr.split(".")[0]
-            
-            output.append(joint)
+    @classmethod
+    def resolveSkinClusterJoints(cls, skinCluster):
+        """
+            @getSkinClusterJoints without the cache - one listConnections call for all matrix plugs
+        """
+        connections = cmds.listConnections(skinCluster + ".matrix", s=1, d=0, c=1, fnn=1) or [] #[plug, joint, plug, joint ...]
+        joints = {}
+        for plug, joint in zip(connections[0::2], connections[1::2]):
+            joints[int(plug[plug.rindex("[") + 1:-1])] = joint #skinCluster1.matrix[3] -> 3
 
-        return output
+        return [joints[i] for i in sorted(joints)]
 
     @classmethod
+    @profiled("fnSkinCluster.getSkinClusterInfluences")
     def getSkinClusterInfluences(cls, fnSC):
         """
             @param[in] fnSC: MFnSkinCluster pointer
             @return skin cluster influence objects := joints 
         """
-        output = []
-   
-        influencePaths = OpenMaya.MDagPathArray()
-        numInfluences = fnSC.influenceObjects(influencePaths)
-        for i in range(influencePaths.length()):
-            output.append(influencePaths[i].fullPathName())
+        def resolve():
+            output = []
+       
+            influencePaths = OpenMaya.MDagPathArray()
+            numInfluences = fnSC.influenceObjects(influencePaths)
+            for i in range(influencePaths.length()):
+                output.append(influencePaths[i].fullPathName())
 
-        return output
+            return output
+
+        #influence index <-> DAG path of a cluster, shared with getInfluenceIndexMap
+        return list(resolution.cache.get("influences", fnSC.name(), resolve))
 
     @classmethod
+    @profiled("fnSkinCluster.createMFnSkinCluster")
     def createMFnSkinCluster(cls, objectShape):
         """
             @param[in] objectShape: shape of a passed in object type string
             @return MFnSkinCluster  
         """
-        selectionList = OpenMaya.MSelectionList()
-        selectionList.add(objectShape)
-        mobject = OpenMaya.MObject()
-        selectionList.getDependNode(0, mobject)
-        fnSC = OpenMayaAnim.MFnSkinCluster(mobject)
+        def resolve():
+            selectionList = OpenMaya.MSelectionList()
+            selectionList.add(objectShape)
+            mobject = OpenMaya.MObject()
+            selectionList.getDependNode(0, mobject)
+            return OpenMaya.MObjectHandle(mobject)
+
+        #the handle tells when the node behind a cached name was deleted
+        handle = resolution.cache.get("handle", objectShape, resolve, lambda i: i.isValid())
+        fnSC = OpenMayaAnim.MFnSkinCluster(handle.object())
 
         return fnSC 
 
     @classmethod
+    @profiled("fnSkinCluster.getGeometryComponents")
     def getGeometryComponents(cls, fnSC):
         """
             @param[in] fnSC: MFnSkinCluster pointer
@@ -131,6 +249,85 @@ class fnSkinCluster():
         return dagPath, components
 
     @classmethod
+    def getVertexComponents(cls, start, stop):
+        """
+            @return vertex components [start, stop) as MObject - a chunk of the deformed mesh
+        """
+        fnComponent = OpenMaya.MFnSingleIndexedComponent()
+        components = fnComponent.create(OpenMaya.MFn.kMeshVertComponent)
+        fnComponent.addElements(toMIntArray(range(start, stop)))
+        return components
+
+    @classmethod
+    def iterWeights(cls, fnSC, chunkSize):
+        """
+            @param[in] fnSC: MFnSkinCluster pointer
+            @param[in] chunkSize: vertices per read
+            @return generator of weights per chunk of vertices (see getWeights) - one MDoubleArray alive at a time
+        """
+        dagPath, components = cls.getGeometryComponents(fnSC)
+        numVertices = OpenMaya.MFnMesh(dagPath).numVertices()
+        for start in range(0, numVertices, chunkSize):
+            yield cls.getWeights(fnSC, dagPath, cls.getVertexComponents(start, min(start + chunkSize, numVertices)))
+
+    @classmethod
+    @profiled("fnSkinCluster.getInfluenceIndexMap")
+    def getInfluenceIndexMap(cls, fnSC):
+        """
+            @param[in] fnSC: MFnSkinCluster pointer
+            @return {influence full name: influence index} - the indices MFnSkinCluster.setWeights expects
+        """
+        return dict((name, i) for i, name in enumerate(cls.getSkinClusterInfluences(fnSC)))
+
+    @classmethod
+    @profiled("fnSkinCluster.buildSkinCluster")
+    def buildSkinCluster(cls, shape, influences):
+        """
+            @param[in] shape: name of the mesh shape to bind
+            @param[in] influences: full names of the influences, the cluster gets exactly these (toSelectedBones)
+            @return (skinCluster name, MFnSkinCluster, {influence full name: influence index})
+
+            A constant number of commands per mesh - no query / removal of the extra influences skinCluster adds without tsb.
+        """
+        cluster = cmds.skinCluster(influences, shape, tsb=1, nw=2)[0] #tsb = to selected bones, nw = normalizeWeights interactive
+        resolution.cache.invalidate("skinCluster", shape)
+        fnSC = cls.createMFnSkinCluster(cluster)
+        return cluster, fnSC, cls.getInfluenceIndexMap(fnSC)
+
+    @classmethod
+    @profiled("fnSkinCluster.unbindSkinCluster")
+    def unbindSkinCluster(cls, skinCluster):
+        """
+            @param[in] skinCluster: name of skinCluster to remove, the mesh goes back to its rest shape
+        """
+        cmds.skinCluster(skinCluster, e=1, ub=1)
+        resolution.cache.invalidate() #the cluster, its set and the intermediate shape are gone
+
+    @classmethod
+    @profiled("fnSkinCluster.setAllWeights")
+    def setAllWeights(cls, fnSC, influences, indexMap, weights, normalize=True, vertexRange=None):
+        """
+            @param[in] fnSC: MFnSkinCluster pointer
+            @param[in] influences: influence full names in the column order of weights
+            @param[in] indexMap: {influence full name: influence index} of fnSC
+            @param[in] weights: flat vertex major weights for all vertices of the deformed mesh (or for vertexRange)
+            @param[in] vertexRange: (start, stop) to write a chunk of the vertices, None for all
+            @return (dagPath, components) the weights were written to
+
+            Writes the weights of all vertices with a single setWeights call.
+        """
+        dagPath, components = cls.getGeometryComponents(fnSC)
+        if vertexRange is not None:
+            components = cls.getVertexComponents(vertexRange[0], vertexRange[1])
+
+        influenceIndices = toMIntArray([indexMap[infl] for infl in influences])
+        weightArray = toMDoubleArray(weights)
+
+        fnSC.setWeights(dagPath, components, influenceIndices, weightArray, normalize)
+        return dagPath, components
+
+    @classmethod
+    @profiled("fnSkinCluster.getWeights")
     def getWeights(cls, fnSC, dagpath, components):
         """
             @param[in] fnSC: MFnSkinCluster pointer
@@ -149,42 +346,90 @@ class fnSkinCluster():
 
 
 class objectCombine():
-    def __init__(self):
+    useApi2 = True #bulk Maya Python API 2.0 reads / writes when available, False for the API 1.0 path (comparison)
+    remapWeightsWorkers = 1 #threads remapping the weights of the separated meshes, 1 serial, None one per cpu
+    verifySeparation = False #run doVerify after doRecreateSkinning - the combined points are then kept for it
+    verifyPoses = 4 #number of sampled poses of doVerify
+    weightChunkSize = None #stream skin weights in chunks of this many vertices (bounded memory on huge meshes), None reads / writes whole meshes
+    shellAnalysisCache = shellCache() #shell analysis shared by all instances, keyed by mesh content - shellCache(64, directory) adds a disk tier
+
+    def __init__(self, objectList=None):
+        """
+            @param[in] objectList: objects to combine, None takes the current selection, [] captures nothing (loadSession)
+        """
 
-        self.origObjectList = cmds.ls(sl=1, l=1)  #orig objects list
+        if objectList is None:
+            self.origObjectList = cmds.ls(sl=1, l=1)  #orig objects list
+        else:
+            self.origObjectList = cmds.ls(objectList, l=1) if objectList else []
 
         """
         @ORIGINAL MESHES DATA
             struct = [ [ object                        ] , [ object                         ] ]
                      [ [ shell,    shell,     shell]   ] , [ shell,     shell,      shell   ] ]
                            |         |           |             |          |           |
-            Shells = [ [(f,f,f,f), (f,f,f,f), (f,f,f,f)] , [(f,f,f,f), (f,f,f,f), (f,f,f,f) ] ]   := faces per shell - aux list for getting bboxes
+            Shells = [ [(f,f,f,f), (f,f,f,f), (f,f,f,f)] , [(f,f,f,f), (f,f,f,f), (f,f,f,f) ] ]   := shellFaces (face indices) per shell - aux list for getting bboxes
             Bboxes = [ [ bbox,     bbox,      bbox     ] , [ bbox,      bbox,      bbox     ] ]   := MBoundingBox
+            Signatures = [ [ sig,  sig,       sig      ] , [ sig,       sig,       sig      ] ]   := shellIndex signature (counts, bbox, centroid)
         """
 
-        self.orig_shells = [] #original shells
-        self.orig_bboxes = [] #original bounding boxes
         self.orig_names = [] #original names
+        self.orig_vertexCounts = [] #number of vertices per original object
+        self.orig_checksums = [] #topology checksum per original object
+
+        #shells, bboxes, signatures are captured on first use (see orig_shells), only the identity is recorded here
+        self._orig_shells = None #original shells
+        self._orig_bboxes = None #original bounding boxes
+        self._orig_signatures = None #original shell signatures
+        self._orig_meshData = None #[(numVertices, faceCounts, faceConnects, pointBlock)] per original object, read by doCombine
 
         #initialization
-        self.getOrigShellsData() #get shells data from original objects
+        self.recordOrigIdentity() #names, vertex counts, topology checksums of the original objects
 
         """
         @COMBINED MESH DATA
-            Shells = [ (f,f,f,f), (f,f,f,f), (f,f,f,f), (f,f,f,f), (f,f,f,f), (f,f,f,f) ]   := faces per shell
+            Shells = [ (f,f,f,f), (f,f,f,f), (f,f,f,f), (f,f,f,f), (f,f,f,f), (f,f,f,f) ]   := shellFaces (face indices) per shell
             Bboxes = [ bbox,      bbox,      bbox,      bbox,      bbox,      bbox      ]   := MBoundingBox
         """
 
         self.tmp_combinedObject = None
         self.tmp_shells = [] #shells of combined object
         self.tmp_bboxes = [] #bounding boxes of these shells
+        self.tmp_signatures = [] #signatures of these shells
         self.tmp_visited = [] #data for a graph computation
         self.tmp_sorted = [] #list of shell ids for restoring the original meshes
+        self.tmp_useLedger = False #True when doSeparate could map faces by the ledger ranges
+        self.tmp_historyDeleted = False #True once doCollectSkinData_deleteSkin deleted the deformers of the combined object
+        self.tmp_combinedDeleted = False #True once doSeparate deleted the combined object
+
+        """
+        @COMBINE LEDGER
+            vertex / face ranges of each original object inside the combined mesh + topology checksum
+        """
+        self.ledger = combineLedger()
 
         """
         @SEPARATED MESHES DATA
         """
         self.separatedMeshes = []
+        self.separatedSourceIds = [] #index of the original object for each separated mesh
+        self.separatedVertexIds = [] #combined vertex index per vertex for each separated mesh, None if unknown (duplicateSeparate)
+
+        """
+        @INCREMENTAL SEPARATION
+            the combined object stays skinned next to the separated meshes, doUpdate rebuilds only the original objects
+            whose geometry or weight rows changed since the last run
+        """
+        self.incremental = False #keep the combined object, its skinCluster and history through doSeparate (see doUpdate)
+        self.sourceHashes = [] #(geometry digest, weights digest) per original object of the last run, see pipeline.getSourceHashes
+
+        """
+        @VERTEX CHANNELS
+            per-vertex data carried over besides the skin weights (colour sets, blendShape deltas, deformer maps) - see vertexTransfer
+        """
+        self.vertexChannels = [] #vertexChannel list, addVertexChannel
+        self.vertexChannelData = [] #captured values per channel, read once from the combined object
+        self.vertexIndexMap = None #vertexIndexMap combined -> separated vertices, built by doRecreateSkinning
 
         """
         @SKINNING DATA
@@ -194,102 +439,392 @@ class objectCombine():
 
         self.separatedSkinClusters = [] #clusters name per each object
 
-        self.combinedMPointList = [] #[ MPoint MPoint MPoint ...]
-        self.separatedMPointList = [] #[ [MPoint MPoint MPoint ...] [MPoint MPoint MPoint ...] [...] ]
+        self._combinedMPointList = None #N x 3 float64 block [x y z x y z ...], point i := (x, y, z) - captured on first use (see combinedMPointList)
+        self.separatedMPointList = [] #[ pointBlock pointBlock [...] ] - empty block when positions are not needed
         
-        self.combinedWeights = [] #[ w1, w2, w3, w4...] Float
+        self.combinedSparseWeights = sparseWeights(0, [0], [], []) #CSR weights of the combined object - non zero weights only, no dense copy is kept
+        self.maxInfluences = None #prune the weights to this many influences per vertex before they are restored, None keeps all
 
+        self.memoryReport = {} #bytes held by the captured buffers + process peak, see getMemoryReport
+        self.verificationReport = None #skinned position errors of the separated meshes, see doVerify
+        self.session = None #sessionData the buffers are mapped from (loadSession), None for a live capture
 
+        self.matchTolerance = 1e-5 #max distance between a separated and a combined vertex considered the same vertex
+        self.bboxTolerance = 1e-4 #max difference of bbox coordinates for an original and a combined shell considered the same shell
 
-    def comprehensionList(self, A,B):
+    @classmethod
+    def isApi2(cls):
         """
-            @returns: comprehension of list A and list B
+            @returns: True if the API 2.0 bulk path is enabled and importable
         """
-        return list(set(A) - set(B))
+        return cls.useApi2 and api2.isAvailable()
 
     @classmethod
-    def getComponentBBox(cls, components):
+    @profiled("getMeshConnectivity")
+    def getMeshConnectivity(cls, obj):
         """
-            @param[in] components: faces that are used for computing their common bounding box
-            @type components: list of faces
-            @returns: MBoundingBox of the passed in components
+            @param[in] obj: object full name
+            @type obj: string
+            @returns: (numVertices, faceCounts, faceConnects) read with a single MFnMesh.getVertices call
         """
-        cmds.select(components)
+        if cls.isApi2():
+            return api2.getMeshConnectivity(obj)
 
-        objectList = OpenMaya.MSelectionList()
-        objectList.clear()
+        selectionList = OpenMaya.MSelectionList()
+        selectionList.add(obj)
+        dagPath = OpenMaya.MDagPath()
+        selectionList.getDagPath(0, dagPath)
+        dagPath.extendToShape()
 
-        OpenMaya.MGlobal.getActiveSelectionList(objectList) #get active selection list 
+        fnMesh = OpenMaya.MFnMesh(dagPath)
+        faceCounts = OpenMaya.MIntArray()
+        faceConnects = OpenMaya.MIntArray()
+        fnMesh.getVertices(faceCounts, faceConnects)
 
-        dagPath = OpenMaya.MDagPath()
-        component = OpenMaya.MObject()
+        return fnMesh.numVertices(), list(faceCounts), list(faceConnects)
 
-        objectList.getDagPath(0, dagPath, component)
+    @classmethod
+    @profiled("getMeshPoints")
+    def getMeshPoints(cls, obj, worldSpace=True):
+        """
+            @param[in] obj: object full name
+            @type obj: string
+            @param[in] worldSpace: False to get object space positions
+            @returns: positions of all vertices read in one call, flat [x, y, z, x, y, z ...]
+        """
+        if cls.isApi2():
+            return api2.getMeshPoints(obj, worldSpace)
+        if worldSpace:
+            return cmds.xform(obj + ".vtx[*]", q=1, ws=1, t=1) or []
+        return cmds.xform(obj + ".vtx[*]", q=1, os=1, t=1) or []
+
+    @classmethod
+    def signatureToBBox(cls, signature):
+        """
+            @returns: MBoundingBox of a shellIndex signature
+        """
+        bboxMin = signature[2]
+        bboxMax = signature[3]
+        return OpenMaya.MBoundingBox(OpenMaya.MPoint(bboxMin[0], bboxMin[1], bboxMin[2]), OpenMaya.MPoint(bboxMax[0], bboxMax[1], bboxMax[2]))
 
-        iter = OpenMaya.MItMeshPolygon(dagPath, component)
+    @profiled("getShellsData")
+    def getShellsData(self, obj, meshData=None):
+        """
+            @param[in] obj: object full name
+            @type obj: string
+            @param[in] meshData: (numVertices, faceCounts, faceConnects, pointBlock) of the object, None to read it
+            @returns: (shells, bboxes, signatures) of the passed in object
+                      one bulk read of connectivity and points, no selection change
+                      the analysis of an unchanged mesh comes from objectCombine.shellAnalysisCache
+        """
+        if meshData is None:
+            numVertices, faceCounts, faceConnects = objectCombine.getMeshConnectivity(obj)
+            points = objectCombine.getMeshPoints(obj)
+        else:
+            numVertices, faceCounts, faceConnects, points = meshData
+            points = points.data
+
+        key = meshKey(faceCounts, faceConnects, points)
+        entry = objectCombine.shellAnalysisCache.get(key)
+        if entry is None:
+            entry = pipeline.analyseShells(numVertices, faceCounts, faceConnects, points)
+            objectCombine.shellAnalysisCache.put(key, entry)
+        else:
+            recordSizes(cached=True)
+        faceLabels, shellIndices, signatures = entry
+        recordSizes(vertices=numVertices, faces=len(faceCounts), shells=len(shellIndices))
 
-        bbox = OpenMaya.MBoundingBox()
-        while not iter.isDone():
-            pointArray = OpenMaya.MPointArray()
-            iter.getPoints(pointArray, OpenMaya.MSpace.kWorld)
+        shells = [shellFaces(obj, indices) for indices in shellIndices]
+        bboxes = [objectCombine.signatureToBBox(i) for i in signatures]
 
-            for i in range(0, pointArray.length()):
-                bbox.expand(OpenMaya.MPoint(pointArray[i].x, pointArray[i].y, pointArray[i].z))
+        return shells, bboxes, signatures
 
-            iter.next()
+    @profiled("recordOrigIdentity")
+    def recordOrigIdentity(self):
+        """
+            @record names, vertex counts and topology checksums of the original objects - one connectivity read per object,
+             shells and points are not read until a stage needs them
+        """
+        self.orig_names = list(self.origObjectList)
+        self.orig_vertexCounts = []
+        self.orig_checksums = []
+        for obj in self.origObjectList:
+            numVertices, faceCounts, faceConnects = objectCombine.getMeshConnectivity(obj)
+            self.orig_vertexCounts.append(numVertices)
+            self.orig_checksums.append(topologyChecksum(faceCounts, faceConnects))
+
+    @profiled("getOrigShellsData")
+    def getOrigShellsData(self):
+        """
+            @get original shells data - from the meshes kept by doCombine once the originals are combined
+        """
+        self._orig_shells = []
+        self._orig_bboxes = []
+        self._orig_signatures = []
+        for i, obj in enumerate(self.origObjectList):
+            with objectStage("getOrigShellsData.object", obj):
+                objectShells, shellBBox, shellSignature = self.getShellsData(obj, self._orig_meshData[i] if self._orig_meshData else None)
+                self._orig_shells.append(objectShells) #save shells
+                self._orig_bboxes.append(shellBBox) #save MBoundingBox list
+                self._orig_signatures.append(shellSignature)
+
+    @property
+    def orig_shells(self):
+        """
+            @returns: shellFaces per shell per original object, captured on first access
+        """
+        if self._orig_shells is None:
+            self.getOrigShellsData()
+        return self._orig_shells
+
+    @property
+    def orig_bboxes(self):
+        if self._orig_bboxes is None:
+            self.getOrigShellsData()
+        return self._orig_bboxes
+
+    @property
+    def orig_signatures(self):
+        if self._orig_signatures is None:
+            self.getOrigShellsData()
+        return self._orig_signatures
+
+    def getRestShape(self):
+        """
+            @returns: shape holding the rest positions of the combined object - the intermediate shape while it is skinned (incremental)
+        """
+        return fnSkinCluster.getShape(self.tmp_combinedObject, True)
 
-        return bbox
+    @profiled("captureCombinedPoints")
+    def captureCombinedPoints(self):
+        """
+            @read the vertex positions of the combined object - one bulk read into a contiguous block
+        """
+        if not self.tmp_combinedObject or not cmds.objExists(self.tmp_combinedObject):
+            raise RuntimeError("combined object is gone, its points were not captured before doSeparate deleted it")
+        self._combinedMPointList = pointBlock(objectCombine.getMeshPoints(self.tmp_combinedObject))
+        return self._combinedMPointList
 
-    def getShells(self, obj):
+    @property
+    def combinedMPointList(self):
         """
-            @param[in] obj: object full name 
-            @type obj: string
-            @returns: list of shells that is included in the passed in object in format [ [[obj.f[0], obj.f[1], obj.f[2]], [obj.f[3], obj.f[4], obj.f[5]], [another shell]], [another object]]
+            @returns: pointBlock of the combined vertices, captured on first access (positional matching only)
         """
-        output = []
+        if self._combinedMPointList is None:
+            self.captureCombinedPoints()
+        return self._combinedMPointList
 
-        #total data
-        numOfShells = cmds.polyEvaluate(obj, s=1) 
+    def invalidate(self, origShells=True, combinedPoints=True):
+        """
+            @drop memoized captures, they are captured again on next access
+            @param[in] origShells: True to drop the original shells, bboxes, signatures (and record the identity again)
+                                   after doCombine they are analysed again from the meshes it kept, refused without them
+                                   (loadSession) - the originals are gone and this is the only copy
+            @param[in] combinedPoints: True to drop the combined vertex positions
+        """
+        if origShells and self.tmp_combinedObject is not None and self._orig_meshData is None:
+            raise RuntimeError("the original objects were combined into %s, their shells can not be captured again" % self.tmp_combinedObject)
+        if origShells:
+            self._orig_shells = None
+            self._orig_bboxes = None
+            self._orig_signatures = None
+            if self.tmp_combinedObject is None:
+                self.recordOrigIdentity()
+        if combinedPoints:
+            self._combinedMPointList = None
+
+    @profiled("doCombine")
+    @resolutionScope
+    def doCombine(self):
+        #record where each original object lands in the combined mesh
+        #the originals are consumed by the combine - their topology and points are kept (bulk arrays, no analysis)
+        #so the shell matching fallback can analyse them later, only if the ledger can not map the combined mesh
+        self.ledger = combineLedger()
+        self._orig_meshData = []
+        for i, obj in enumerate(self.origObjectList):
+            numVertices, faceCounts, faceConnects = objectCombine.getMeshConnectivity(obj)
+            checksum = topologyChecksum(faceCounts, faceConnects)
+            if numVertices != self.orig_vertexCounts[i] or checksum != self.orig_checksums[i]:
+                #edited since the instance was created - a shell capture taken before is stale
+                self.orig_vertexCounts[i] = numVertices
+                self.orig_checksums[i] = checksum
+                self._orig_shells = None
+                self._orig_bboxes = None
+                self._orig_signatures = None
+            self.ledger.addSource(obj, numVertices, faceCounts, faceConnects)
+            self._orig_meshData.append((numVertices, array('i', faceCounts), array('i', faceConnects), pointBlock(objectCombine.getMeshPoints(obj))))
 
-        faceList = cmds.ls(cmds.polyListComponentConversion( obj, tf=True), l=1, fl=1)
+        cmds.select(self.origObjectList)
+        self.tmp_combinedObject = runFlattenCombine()
+        resolution.cache.invalidate() #the originals are gone, the combined object may carry the name of one
 
-        for i in range(numOfShells):
-            # cmds.select(obj)
-            idx = int(faceList[0].split(".f[")[-1].split("]")[0])
-            shellFaces = cmds.polySelect(obj, q=1, ets=idx)
-            
-            shellFacesFormat = [] #obj.f[0], obj.f[1] ...
-            if shellFaces:
-                for j in shellFaces:
-                    __faceData = obj + ".f[" + str(j) + "]"
-                    shellFacesFormat.append(__faceData)
+        numVertices, faceCounts, faceConnects = objectCombine.getMeshConnectivity(self.tmp_combinedObject)
+        if not self.ledger.setCombined(faceCounts, faceConnects):
+            cmds.warning("combined topology does not follow the selection order, separation will use geometric matching")
+            self.getOrigShellsData() #the ledger can not map the originals - doSeparate matches their shells
 
-            faceList = self.comprehensionList(faceList, shellFacesFormat)
+    @classmethod
+    def getMeshUVSets(cls, obj):
+        """
+            @param[in] obj: object full name
+            @returns: [(uv set name, u, v, uvCounts, uvIds)] - the current uv set first, one bulk read per set
+        """
+        if cls.isApi2():
+            return api2.getMeshUVSets(obj)
 
-            output.append(shellFacesFormat)
+        selectionList = OpenMaya.MSelectionList()
+        selectionList.add(obj)
+        dagPath = OpenMaya.MDagPath()
+        selectionList.getDagPath(0, dagPath)
+        dagPath.extendToShape()
+        fnMesh = OpenMaya.MFnMesh(dagPath)
 
-        return output 
+        currentUVSet = (cmds.polyUVSet(obj, q=1, currentUVSet=1) or [None])[0]
+        uvSets = cmds.polyUVSet(obj, q=1, allUVSets=1) or []
+        output = []
+        for uvSet in [currentUVSet] + [i for i in uvSets if i != currentUVSet]:
+            u = OpenMaya.MFloatArray()
+            v = OpenMaya.MFloatArray()
+            uvCounts = OpenMaya.MIntArray()
+            uvIds = OpenMaya.MIntArray()
+            if uvSet is None:
+                fnMesh.getUVs(u, v)
+                fnMesh.getAssignedUVs(uvCounts, uvIds)
+            else:
+                fnMesh.getUVs(u, v, uvSet)
+                fnMesh.getAssignedUVs(uvCounts, uvIds, uvSet)
+            output.append((uvSet, list(u), list(v), list(uvCounts), list(uvIds)))
+        return output
 
-    def getOrigShellsData(self):
+    @classmethod
+    def getConnectedShaders(cls, obj):
         """
-            @get original shells data
+            @param[in] obj: object full name
+            @returns: (shading group names, shading group index per face or -1)
         """
-        if self.origObjectList:
-            for obj in self.origObjectList:
-                shellsBBoxList = []
-                self.orig_names.append(obj) #save name
-                objectShells = self.getShells(obj)
-                self.orig_shells.append(objectShells) #save shells
+        if cls.isApi2():
+            return api2.getConnectedShaders(obj)
 
-                shellBBox = []
-                for shell in objectShells: # for i in current object shells
-                    shellBBox.append(objectCombine.getComponentBBox(shell)) # append MBoundingBox
-                self.orig_bboxes.append(shellBBox)
+        selectionList = OpenMaya.MSelectionList()
+        selectionList.add(obj)
+        dagPath = OpenMaya.MDagPath()
+        selectionList.getDagPath(0, dagPath)
+        dagPath.extendToShape()
 
-    def doCombine(self):
-        cmds.select(self.origObjectList)
-        self.tmp_combinedObject = runFlattenCombine()
+        shaders = OpenMaya.MObjectArray()
+        shaderIds = OpenMaya.MIntArray()
+        OpenMaya.MFnMesh(dagPath).getConnectedShaders(0, shaders, shaderIds)
+        return [OpenMaya.MFnDependencyNode(shaders[i]).name() for i in range(shaders.length())], list(shaderIds)
+
+    @classmethod
+    @profiled("createMesh")
+    def createMesh(cls, points, faceCounts, faceConnects, uvSets=()):
+        """
+            @param[in] points: flat object space positions [x, y, z, x, y, z ...]
+            @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout
+            @param[in] uvSets: [(uv set name, u, v, uvCounts, uvConnects)] - the first one fills the default uv set
+            @returns: MObject of the new mesh transform (see getFullPathName)
+        """
+        if cls.isApi2():
+            return api2.createMesh(points, faceCounts, faceConnects, uvSets)
+
+        #API 1.0 has no bulk MFloatPointArray constructor - the points are the only per element loop left
+        pointArray = OpenMaya.MFloatPointArray()
+        pointArray.setLength(len(points) // 3)
+        for i in range(len(points) // 3):
+            pointArray.set(i, points[i * 3], points[i * 3 + 1], points[i * 3 + 2])
+
+        newMesh = OpenMaya.MFnMesh()
+        transform = newMesh.create(len(points) // 3, len(faceCounts), pointArray, toMIntArray(faceCounts), toMIntArray(faceConnects))
+        for idx, (uvSet, u, v, uvCounts, uvConnects) in enumerate(uvSets):
+            if idx:
+                uvSet = newMesh.createUVSetWithName(uvSet)
+            else:
+                uvSet = newMesh.currentUVSetName()
+            if len(u):
+                newMesh.setUVs(toMFloatArray(u), toMFloatArray(v), uvSet)
+                newMesh.assignUVs(toMIntArray(uvCounts), toMIntArray(uvConnects), uvSet)
+        newMesh.updateSurface()
+        return transform
+
+    @classmethod
+    def getFullPathName(cls, node):
+        """
+            @param[in] node: MObject returned by createMesh
+            @returns: its current full path - the MObject survives rename / parent
+        """
+        if cls.isApi2():
+            return api2.getFullPathName(node)
+        return OpenMaya.MFnDagNode(node).fullPathName()
+
+    @profiled("buildSeparatedMeshes")
+    def buildSeparatedMeshes(self, objectFaceIds):
+        """
+            @param[in] objectFaceIds: ascending combined face indices per original object
+            @returns: list of (original object index, new mesh full name, combined vertex ids of the new mesh)
+
+            Single pass separation: points, topology, uv sets and shading of the combined mesh are read once
+            and partitioned into all output meshes, instead of one full duplicate of the combined mesh per object.
+            Every output is created with whole arrays (createMesh - API 2.0 when isApi2).
+            Not carried over (duplicateSeparate keeps them): colour sets, locked / custom normals, hard edges, creases.
+            Colour sets can be restored through a vertexTransfer.colorSetChannel (per-vertex colours).
+        """
+        output = []
+
+        #one read of everything the outputs need
+        numVertices, faceCounts, faceConnects = objectCombine.getMeshConnectivity(self.tmp_combinedObject)
+        points = objectCombine.getMeshPoints(self.getRestShape(), worldSpace=False)
+        uvSets = [(uvSet, u, v, uvCounts, uvIds, getOffsets(uvCounts)) for uvSet, u, v, uvCounts, uvIds in objectCombine.getMeshUVSets(self.tmp_combinedObject)]
+        shadingGroups, shaderIds = objectCombine.getConnectedShaders(self.tmp_combinedObject)
+
+        partition = meshPartition(faceCounts, faceConnects)
+
+        #transform of the combined object - outputs are created in its object space
+        matrix = cmds.xform(self.tmp_combinedObject, q=1, ws=1, m=1)
+        rotatePivot = cmds.xform(self.tmp_combinedObject, q=1, ws=1, rp=1)
+        scalePivot = cmds.xform(self.tmp_combinedObject, q=1, ws=1, sp=1)
+
+        for i, faceIds in enumerate(objectFaceIds):
+            with objectStage("buildSeparatedMeshes.object", self.orig_names[i]):
+                if not len(faceIds):
+                    continue
+
+                data = partition.extract(faceIds)
+
+                #uvs of every set in local ids - the first one (current set) goes into the default set of the new mesh
+                outputUVSets = []
+                for uvSet, u, v, uvCounts, uvIds, uvOffsets in uvSets:
+                    usedIds, localCounts, localConnects = extractAssigned(faceIds, uvCounts, uvIds, uvOffsets)
+                    outputUVSets.append((uvSet, gatherItems(u, usedIds), gatherItems(v, usedIds), localCounts, localConnects))
+
+                transform = objectCombine.createMesh(gatherItems(points, data["vertexIds"], 3), data["faceCounts"], data["faceConnects"], outputUVSets)
+                fullname = objectCombine.getFullPathName(transform)
+
+                #shading - one sets call per shading group used by the object
+                cmds.sets(fullname, e=1, forceElement="initialShadingGroup")
+                facesPerShader = {}
+                for local, face in enumerate(faceIds):
+                    shaderId = shaderIds[face]
+                    if shaderId != -1:
+                        facesPerShader.setdefault(shaderId, []).append(local)
+                for shaderId in sorted(facesPerShader):
+                    cmds.sets(formatComponents(fullname, facesPerShader[shaderId]), e=1, forceElement=shadingGroups[shaderId])
+
+                #transform, name and parent of the original object
+                cmds.xform(fullname, ws=1, m=matrix)
+                cmds.xform(fullname, ws=1, rp=rotatePivot, sp=scalePivot)
+                cmds.rename(fullname, self.orig_names[i].split("|")[-1])
+
+                parent = "|".join(self.orig_names[i].split("|")[:-1])
+                if parent and cmds.objExists(parent):
+                    cmds.parent(objectCombine.getFullPathName(transform), parent)
+                fullname = objectCombine.getFullPathName(transform)
+
+                output.append((i, fullname, data["vertexIds"]))
 
+        return output
+
+    @profiled("mel_separate")
     def mel_separate(self, flist):
         cmds.select(d=1)
         cmds.select(flist)
@@ -307,63 +842,62 @@ class objectCombine():
             return False
 
 
+    @profiled("doCollectSkinData_deleteSkin")
+    @resolutionScope
     def doCollectSkinData_deleteSkin(self):
 
         """first get the skin cluster from the combined object"""
 
-        combinedObjectShape = fnSkinCluster.getShape(cmds.listRelatives(self.tmp_combinedObject, c=1, f=1)[0])
+        combinedObjectShape = fnSkinCluster.getShape(self.tmp_combinedObject)
         combineSkinClusterName = fnSkinCluster.getSkinCluster(combinedObjectShape)
 
         combinedSkinClusterSet = fnSkinCluster.getSkinClusterSet(combineSkinClusterName)
         self.jointList = fnSkinCluster.getSkinClusterJoints(combineSkinClusterName) #returns list of joints  
         combinedIntermediateMesh = fnSkinCluster.getShape(self.tmp_combinedObject, True)
 
-        """get MPoint data from the combined object to store vertex positions according ther indices+"""
-        selectionList = OpenMaya.MSelectionList()
-        selectionList.clear()
-        selectionList.add(self.tmp_combinedObject)
-        dagPath = OpenMaya.MDagPath()
-        selectionList.getDagPath(0, dagPath)
-        iter = OpenMaya.MItMeshVertex(dagPath)
-        while not iter.isDone():
-            point = iter.position(OpenMaya.MSpace.kWorld)
-            point.x = round(point.x, 6)
-            point.y = round(point.y, 6)
-            point.z = round(point.z, 6)
-            self.combinedMPointList.append(point) 
-            iter.next()
+        """point data of the combined object is read on demand (combinedMPointList) - only positional matching needs it"""
+        self._combinedMPointList = None
 
 
         """ #here we get data needed to restore skinning on separate objects """
 
         #skinCluster can deform only a single geometry, all gathering data through fnSkinCluster related to just one mesh
-        combined_fnSkinCluster = fnSkinCluster.createMFnSkinCluster(combineSkinClusterName) # create MFnSkinCluster function set for the combied object
-        combined_DagPath, combined_components = fnSkinCluster.getGeometryComponents(combined_fnSkinCluster) #get dagPath, components of the combined object for gathering skinClusterWeights
-        combined_Weights_unsorted = fnSkinCluster.getWeights(combined_fnSkinCluster, combined_DagPath, combined_components) #get weights (see fnSkinCluster Doc)
+        #influences in the order Maya see them, weights as their sparse copy only - the dense N x I block is released inside,
+        #or never built when streaming (weightChunkSize), the separated clusters are bound to and filled with the used influences only
+        chunkSize = objectCombine.weightChunkSize
+        self.influenceList, self.combinedSparseWeights = pipeline.captureSkinWeights(backend.mayaBackend(), self.tmp_combinedObject, chunkSize)
+        recordSizes(vertices=len(self.combinedSparseWeights), influences=len(self.influenceList), chunkSize=chunkSize)
+
+        if self.maxInfluences:
+            self.combinedSparseWeights = self.combinedSparseWeights.prune(self.maxInfluences)
+        self.getMemoryReport()
+        
 
-        #get real list of influences in the order Maya see it 
-        self.influenceList = fnSkinCluster.getSkinClusterInfluences(combined_fnSkinCluster)
+        """per-vertex channels are read while the combined object still has its deformers"""
+        self.captureVertexChannels()
 
-        #sort jointWeights list as sublists of influences (self.influenceList) per vertex to get the same format as in ComponentEditor
-        self.combinedWeights = [combined_Weights_unsorted[i:i+len(self.influenceList)] for i in range(0, len(combined_Weights_unsorted), len(self.influenceList))]
-        
+        if self.incremental:
+            return #the combined object stays skinned - doUpdate reads it again
 
         """after collecting skinCluster data - delete skincluster and skinclusterSet"""
         cmds.delete(combineSkinClusterName)
 
         """delete intermediate shapeOrig nodes"""
         cmds.delete(self.tmp_combinedObject, ch=1)
+        self.tmp_historyDeleted = True
+        resolution.cache.invalidate()
 
     
         
-    def doSeparate(self):
-
-        """get shells of the combined mesh+"""
-        self.tmp_shells = self.getShells(self.tmp_combinedObject)  #[ [f1, f2, f3]  [f4, f5, f6]  [f7, f8, f9] ]
+    @profiled("doMatchShells")
+    def doMatchShells(self):
+        """
+            @assign combined shells to original objects by their signatures - fallback when the ledger does not apply
+            @returns: ascending combined face indices per original object
+        """
 
-        """Get bounding boxes for these shells"""
-        for shell in self.tmp_shells: # for i in current object shells
-            self.tmp_bboxes.append(objectCombine.getComponentBBox(shell)) # append MBoundingBox
+        """get shells, bounding boxes and signatures of the combined mesh+"""
+        self.tmp_shells, self.tmp_bboxes, self.tmp_signatures = self.getShellsData(self.tmp_combinedObject)  #[ [f1, f2, f3]  [f4, f5, f6]  [f7, f8, f9] ]
 
         """initialize visited units"""
         self.tmp_visited = [0] * len(self.tmp_bboxes) # initial state = [0,0,0] that means they are not visited yet
@@ -372,174 +906,528 @@ class objectCombine():
         self.tmp_sorted = [0] * len(self.tmp_bboxes) #indices of shells and bboxes according their objects L
 
 
-        """Get combined object data"""
-        for idx_i, i in enumerate(self.orig_bboxes): #for each orig object (bbox)
-            for idx_j, j in enumerate(i): #for each bbox of orig object
+        """Match original shells to combined shells through the fingerprint index - one lookup per original shell"""
+        assignment, unmatched = pipeline.matchShells(self.orig_signatures, self.tmp_signatures, self.bboxTolerance)
+        for idx_i, idx_j in unmatched:
+            cmds.warning("shell %d of %s has no match in the combined object" % (idx_j, self.orig_names[idx_i]))
+        for idx_k, idx_i in enumerate(assignment):
+            if idx_i != -1:
+                self.setVisited(self.tmp_visited, idx_k) # visited is 1
+                self.tmp_sorted[idx_k] = idx_i #combined shell at idx_k set id index as idx_i (original list object index)
+
+        for idx_k in range(len(self.tmp_visited)):
+            if not self.checkVisited(self.tmp_visited, idx_k):
+                cmds.warning("combined shell %d has no original shell, it is assigned to %s" % (idx_k, self.orig_names[0]))
+
+        output = [[] for i in self.orig_names]
+        for idx_k, idx_i in enumerate(self.tmp_sorted):
+            output[idx_i].extend(self.tmp_shells[idx_k].indices)
+        for faceIds in output:
+            faceIds.sort()
+        return output
 
-                for idx_k, k in enumerate(self.tmp_bboxes): #combined bboxes
+    def getMemoryReport(self):
+        """
+            @returns: {buffer name: bytes} for the captured data and the process peak ("peak", None if unknown)
+        """
+        self.memoryReport = {
+            "combinedPoints": self._combinedMPointList.nbytes() if self._combinedMPointList is not None else 0,
+            "origMeshes": sum([i[3].nbytes() + (len(i[1]) + len(i[2])) * i[1].itemsize for i in self._orig_meshData or []]),
+            "combinedSparseWeights": self.combinedSparseWeights.nbytes(),
+            "separatedPoints": sum([i.nbytes() for i in self.separatedMPointList]),
+            "peak": getPeakMemory(),
+        }
+        return self.memoryReport
+
+    @profiled("saveSession")
+    def saveSession(self, path):
+        """
+            @param[in] path: session file, written after doCollectSkinData_deleteSkin
+            @returns: size of the file in bytes
+            @the captured state is stored so doSeparate / doRecreateSkinning can run in another Maya session
+        """
+        header = {
+            "version": SESSION_VERSION,
+            "combinedObject": self.tmp_combinedObject,
+            "origNames": self.orig_names,
+            "origSignatures": self.orig_signatures,
+            "ledger": self.ledger.toDict(),
+            "influenceList": self.influenceList,
+            "jointList": self.jointList,
+            "matchTolerance": self.matchTolerance,
+            "bboxTolerance": self.bboxTolerance,
+            "maxInfluences": self.maxInfluences,
+        }
+        arrays = {
+            "combinedPoints": ("d", self.combinedMPointList.data),
+            "sparseIndptr": ("q", self.combinedSparseWeights.indptr),
+            "sparseIndices": ("i", self.combinedSparseWeights.indices),
+            "sparseValues": ("d", self.combinedSparseWeights.values),
+        }
+        return sessionFile.saveSession(path, header, arrays)
 
-                    if not self.checkVisited(self.tmp_visited, idx_k): #if not visited
-        
-                        bbox = self.orig_bboxes[idx_i][idx_j] #orig bbox of object[idx_i]'s shell[idx_j]
+    @classmethod
+    @profiled("loadSession")
+    def loadSession(cls, path):
+        """
+            @param[in] path: session file written by saveSession
+            @returns: objectCombine ready for doSeparate - points and weights stay memory-mapped, nothing is read up front
+        """
+        session = sessionFile.loadSession(path, (SESSION_VERSION,)) #ValueError for sessions of another layout
+        header = session.header
+
+        instance = cls([])
+        instance.session = session #keeps the mapping alive
+        instance.tmp_combinedObject = header["combinedObject"]
+        instance.orig_names = list(header["origNames"])
+        instance._orig_signatures = [[makeSignature(*i) for i in signatures] for signatures in header["origSignatures"]]
+        instance._orig_bboxes = [[objectCombine.signatureToBBox(i) for i in signatures] for signatures in instance._orig_signatures]
+        instance._orig_shells = [[] for i in instance.orig_names] #the originals are gone, their shells are matched by signature
+        instance.ledger = combineLedger.fromDict(header["ledger"])
+        instance.influenceList = list(header["influenceList"])
+        instance.jointList = list(header["jointList"])
+        instance.matchTolerance = header["matchTolerance"]
+        instance.bboxTolerance = header["bboxTolerance"]
+        instance.maxInfluences = header["maxInfluences"]
+        instance.tmp_historyDeleted = True #saved after doCollectSkinData_deleteSkin
+
+        numInfluences = len(instance.influenceList)
+        instance._combinedMPointList = pointBlock().setBuffer(session.getArray("combinedPoints"))
+        instance.combinedSparseWeights = sparseWeights(numInfluences, session.getArray("sparseIndptr"), session.getArray("sparseIndices"), session.getArray("sparseValues"))
+        return instance
+
+    @profiled("getObjectFaceIds")
+    def getObjectFaceIds(self):
+        """
+            @returns: ascending combined face indices per original object - ledger slices when the topology is unchanged, shell matching otherwise
+        """
+        objectFaceIds = [[] for i in self.orig_names]
+
+        numVertices, faceCounts, faceConnects = objectCombine.getMeshConnectivity(self.tmp_combinedObject)
+        self.tmp_useLedger = self.ledger.matches(topologyChecksum(faceCounts, faceConnects))
+        recordSizes(objects=len(self.orig_names), vertices=numVertices, faces=len(faceCounts), ledger=self.tmp_useLedger)
 
-                        #compare bboxes
-                        roundTolerance = 4 #affects how clean are going to be result of the comparison below
-                        if round(bbox.min().z, roundTolerance) == round(k.min().z, roundTolerance) and round(bbox.max().z, roundTolerance) == round(k.max().z, roundTolerance) and round(bbox.min().x, roundTolerance) == round(k.min().x, roundTolerance) and round(bbox.min().y, roundTolerance) == round(k.min().y, roundTolerance):
-                            self.setVisited(self.tmp_visited, idx_k) # visited is 1  -do no check it in the future iterations
-                            self.tmp_sorted[idx_k] = idx_i #combined bbox at idx_k set id index as idx_i (original list object index)
-                            continue #stop iteration
+        if self.tmp_useLedger:
+            """topology unchanged since combine - faces of each object are a slice of the combined faces"""
+            for i in range(len(self.orig_names)):
+                objectFaceIds[i] = self.ledger.getFaceIndices(i)
+        else:
+            objectFaceIds = self.doMatchShells()
 
+        return objectFaceIds
 
-        """separate   """ 
-        renameToOriginal = None           
-        for i in range(len(self.orig_shells)): # for i in 0...num objects L
-            id = i  #id = current i
-            faceList_toSeparate = []
-            for idx_j, j in enumerate(self.tmp_sorted): #for each sorted_id for combined object
-                if j == id: #0 1 2 3 4 5 6 7 8 9
-                    faceList_toSeparate.extend(self.tmp_shells[idx_j])
+    @profiled("doSeparate")
+    @resolutionScope
+    def doSeparate(self, singlePass=False):
+        """
+            @param[in] singlePass: True to build all output meshes from one read of the combined mesh (meshPartition)
+                                   points, topology, uv sets and shading only - colour sets, locked normals, hard edges
+                                   and creases are not carried over (see buildSeparatedMeshes)
+                                   False to run duplicateSeparate.mel per object (one combined mesh duplicate per object)
+                                   incremental runs need True - doUpdate rebuilds with buildSeparatedMeshes and maps
+                                   the outputs by their combined vertex ids
+        """
+        if self.incremental and not singlePass:
+            raise RuntimeError("incremental separation needs doSeparate(singlePass=True)")
 
-            if faceList_toSeparate:
-                object = self.mel_separate(faceList_toSeparate) #do separate
-                name = self.orig_names[i].split("|")[-1]
-                fullname = object[0][:-1 * len(object[0].split("|")[-1])] + name 
-                fullname = cmds.rename(object[0], name)
+        """faces per original object"""
+        objectFaceIds = self.getObjectFaceIds()
 
+        """separate   """ 
+        renameToOriginal = None           
+        combinedName = self.tmp_combinedObject.split("|")[-1]
+        if self.incremental:
+            combinedName = None #the combined object is kept - no output takes its name
 
-                if name == self.tmp_combinedObject.split("|")[-1]:
+        if singlePass:
+            for i, fullname, vertexIds in self.buildSeparatedMeshes(objectFaceIds):
+                if self.orig_names[i].split("|")[-1] == combinedName:
                     renameToOriginal = fullname
-                    self.separatedMeshes.append(self.tmp_combinedObject) #save object's full name
-                    continue
+                    fullname = self.tmp_combinedObject
 
                 self.separatedMeshes.append(fullname) #save object's full name
+                self.separatedSourceIds.append(i)
+                self.separatedVertexIds.append(vertexIds)
 
+        else:
+            for i in range(len(self.orig_names)): # for i in 0...num objects L
+                with objectStage("doSeparate.object", self.orig_names[i]):
+                    faceList_toSeparate = formatComponents(self.tmp_combinedObject, objectFaceIds[i]) #packed ranges obj.f[0:10]
 
-        
-
-        cmds.delete(self.tmp_combinedObject)
-
-        if renameToOriginal:       
-            cmds.rename(renameToOriginal, self.tmp_combinedObject.split("|")[-1])
-
+                    if faceList_toSeparate:
+                        object = self.mel_separate(faceList_toSeparate) #do separate
+                        name = self.orig_names[i].split("|")[-1]
+                        fullname = cmds.rename(object[0], name)
 
+                        if name == combinedName:
+                            renameToOriginal = fullname
+                            fullname = self.tmp_combinedObject
 
-    def doRecreateSkinning(self):
+                        self.separatedMeshes.append(fullname) #save object's full name
+                        self.separatedSourceIds.append(i)
+                        self.separatedVertexIds.append(None)
 
-        """
-            @self.combinedMPointList - list of MPoints for vertices of the combined object
-            @self.combinedWeights - list of sublists := weights for sublist[vertex] per each influence from self.influenceList
+        self.captureVertexChannels() #channels added after doCollectSkinData_deleteSkin
 
-            @self.separatedMeshes - mesh list after separation
-            @self.separatedSkinClusters - list of skinClusters names for self.separatedMeshes
-            @self.separatedMPointList = List of sublists := MPoints for sublist[object] vertices
+        #positions are needed only when a separated mesh can not be mapped by index - read them before the combined mesh is gone
+        #the output taking the combined object's name is still under its temporary name (renameToOriginal) until the combined object is deleted
+        unknown = [idx for idx, mesh in enumerate(self.separatedMeshes) if self.getKnownVertexMap(idx, renameToOriginal if mesh == self.tmp_combinedObject else None) is None]
+        if self._combinedMPointList is None and (objectCombine.verifySeparation or unknown):
+            self.captureCombinedPoints()
 
-            @self.jointList - list of joints that took part in combined object skinning process 
-            @self.influenceList - list of joints used as influence objects for combined skin cluster
-        """
+        if self.incremental:
+            return #outputs and combined object live side by side, see doUpdate
 
-        """1 assign skin clusters to separated meshes"""
-        for i in range(len(self.separatedMeshes)):
-            separatedMesheShape = cmds.listRelatives(self.separatedMeshes[i], c=1, f=1, type="mesh")[0]
-            sCluster = cmds.skinCluster(self.influenceList, separatedMesheShape, nw=2, prune = 1)[0] #tsb = to selected bones, nw = normalizeWeights interactive
-            self.separatedSkinClusters.append(sCluster)
-            #get influences and remove those that are not in the influence list
-            totalInfluences = fnSkinCluster.getSkinClusterJoints(sCluster)
-            for j in totalInfluences:
-                if j not in self.influenceList: #not in original list
-                    cmds.skinCluster(separatedMesheShape, e=1, ri=j)
-
-
-        """2 get separated objects vertices MPoint positions""" #works correct
-        for i in self.separatedMeshes: #for each object in list
-            objectVertPos = []
-
-            selectionList = OpenMaya.MSelectionList()
-            selectionList.clear()
-            selectionList.add(i)
-
-            dagPath = OpenMaya.MDagPath()
-            selectionList.getDagPath(0, dagPath)
-            iter = OpenMaya.MItMeshVertex(dagPath)
-            while not iter.isDone():
-                point = iter.position(OpenMaya.MSpace.kWorld)
-                point.x = round(point.x, 6)
-                point.y = round(point.y, 6)
-                point.z = round(point.z, 6)
-                objectVertPos.append(point) 
-                iter.next()
+        cmds.delete(self.tmp_combinedObject)
+        self.tmp_combinedDeleted = True
+        self._orig_meshData = None #nothing is left to match the original shells against
+        resolution.cache.invalidate()
 
+        if renameToOriginal:       
+            cmds.rename(renameToOriginal, self.tmp_combinedObject.split("|")[-1])
 
 
-            self.separatedMPointList.append(objectVertPos) #add object's mpoint list to global list [[...],[...],[...],[...],[...]]
 
-        """ @recreating weights
-            @we have: 
-                Weight list for the combined object
-                MPoint list for the combined object vertices
-                influence list in the right order
+    @profiled("buildVertexIndexMap")
+    def buildVertexIndexMap(self):
         """
+            @returns: vertexIndexMap of self.separatedMeshes - by index when known, by position otherwise
+            @fills self.separatedMPointList
+        """
+        combinedHash = None
+        vertexMaps = [] #combined vertex index (or -1) per separated vertex, per separated mesh
+        self.separatedMPointList = []
 
-        combined_mpoint_visited = [0] * len(self.combinedMPointList)
-
-        for idx, cluster in enumerate(self.separatedSkinClusters): #for each cluster
-
-            #create MFnSkinCluster
-            fnSC = fnSkinCluster.createMFnSkinCluster(cluster)
-            
-            #get object DagPath of an object the cluster influences, all components 
-            dagPath, components = fnSkinCluster.getGeometryComponents(fnSC)
+        for idx, i in enumerate(self.separatedMeshes): #for each object in list
+            vertexMap = self.getKnownVertexMap(idx)
+            if vertexMap is not None:
+                self.separatedMPointList.append(pointBlock()) #positions are not needed
+                vertexMaps.append(vertexMap)
+                continue
 
-            #influence indices
-            influencePaths = OpenMaya.MDagPathArray() #dag paths of influences - their order is different from the combined object influence order
-            numInfluences = fnSC.influenceObjects(influencePaths)
-            influenceIndices = OpenMaya.MIntArray(numInfluences)
+            """get separated object vertices positions""" #works correct
+            objectVertPos = pointBlock(objectCombine.getMeshPoints(i))
+            self.separatedMPointList.append(objectVertPos) #add object's point block to global list [[...],[...],[...],[...],[...]]
 
+            #spatial hash of the combined vertices, built once - each separated vertex is resolved in amortized O(1)
+            if combinedHash is None:
+                combinedHash = pipeline.buildVertexHash(self.combinedMPointList, self.matchTolerance)
 
-            # get array of names
-            influencePaths_str = []
-            for i in range(influencePaths.length()):
-                influencePaths_str.append(influencePaths[i].fullPathName())
+            vertexMaps.append(pipeline.matchVertices(combinedHash, objectVertPos))
 
-            for idx_infl, infl in enumerate(self.influenceList):
-                infIdx = influencePaths_str.index(infl)
-                influenceIndices.set(infIdx, idx_infl)
+        return vertexIndexMap(self.separatedMeshes, vertexMaps)
 
-     
-            #list of weights for all vertices for the current object
-            weights = fnSkinCluster.getWeights(fnSC, dagPath, components) #get weight list ordered according list of influence 
-            idx_W = 0
+    def addVertexChannel(self, channel):
+        """
+            @param[in] channel: vertexTransfer.vertexChannel to carry from the combined object to the separated meshes
+                                channels reading a deformer (channel.needsHistory - blendShape, deformerMap) have to be added
+                                before doCollectSkinData_deleteSkin deletes the history, the others before doSeparate
+        """
+        if self.tmp_combinedDeleted:
+            raise RuntimeError("the combined object was deleted by doSeparate, add %s channels before it" % channel.kind)
+        if channel.needsHistory and self.tmp_historyDeleted:
+            raise RuntimeError("the deformers of the combined object were deleted by doCollectSkinData_deleteSkin, add %s channels before it" % channel.kind)
+        self.vertexChannels.append(channel)
+        return channel
+
+    @profiled("captureVertexChannels")
+    def captureVertexChannels(self):
+        """
+            @read the channels not captured yet from the combined object
+        """
+        channels = self.vertexChannels[len(self.vertexChannelData):]
+        if channels:
+            self.vertexChannelData.extend(captureChannels(channels, self.tmp_combinedObject))
 
+    @profiled("doTransferVertexChannels")
+    def doTransferVertexChannels(self, meshIndices=None):
+        """
+            @param[in] meshIndices: indices into self.separatedMeshes to write, None for all (doUpdate passes the rebuilt ones)
+            @write every captured channel to the separated meshes - one gather per channel and mesh through self.vertexIndexMap
+        """
+        if self.vertexIndexMap is None:
+            self.vertexIndexMap = self.buildVertexIndexMap()
+        transferChannels(self.vertexChannels[:len(self.vertexChannelData)], self.vertexChannelData, self.vertexIndexMap, meshIndices)
 
-            for idx_point, mpoint in enumerate(self.separatedMPointList[idx]): #for each mpoint in separated object
+    @profiled("doVerify")
+    @resolutionScope
+    def doVerify(self, numPoses=None, seed=0, rangeSize=1024, tolerance=1e-4):
+        """
+            @param[in] numPoses: sampled poses, None for objectCombine.verifyPoses
+            @param[in] rangeSize: vertices per reported vertex range
+            @param[in] tolerance: skinned distance above which a vertex is reported as failed
+            @returns: verification report (see verification.verifySkinning), also stored in self.verificationReport
 
-                for idx_cPoint, cpoint in enumerate(self.combinedMPointList): #for all mpoints in combined object
+            The influences are posed at sampled poses, the captured combined skin and the restored separated skins
+            are evaluated with linear blend skinning and compared per separated vertex.
+        """
+        if self._combinedMPointList is None and self.tmp_combinedDeleted:
+            raise RuntimeError("doVerify needs the combined points - set objectCombine.verifySeparation = True before doSeparate, it deleted %s without reading them" % self.tmp_combinedObject)
+        if self.vertexIndexMap is None:
+            self.vertexIndexMap = self.buildVertexIndexMap()
+        combinedPoints = self.combinedMPointList.data
+        influenceColumns = dict((name, i) for i, name in enumerate(self.influenceList))
+
+        separated = []
+        for idx, mesh in enumerate(self.separatedMeshes):
+            cluster = self.separatedSkinClusters[idx]
+            if objectCombine.isApi2():
+                weights, influences = api2.getWeights(cluster)
+            else:
+                fnSC = fnSkinCluster.createMFnSkinCluster(cluster)
+                dagPath, components = fnSkinCluster.getGeometryComponents(fnSC)
+                weights = fnSkinCluster.getWeights(fnSC, dagPath, components)
+                influences = fnSkinCluster.getSkinClusterInfluences(fnSC)
+            weights = sparseWeights.fromDense(weights, len(influences))
+            weights = verification.toInfluenceColumns(weights, [influenceColumns[i] for i in influences], len(self.influenceList))
+            separated.append((mesh, objectCombine.getMeshPoints(mesh), weights))
+
+        center, size = verification.getBounds(combinedPoints)
+        poses = verification.samplePoses(len(self.influenceList), numPoses or objectCombine.verifyPoses, center, size, seed=seed)
+        self.verificationReport = verification.verifySkinning(combinedPoints, self.combinedSparseWeights, self.vertexIndexMap.vertexMaps, separated, poses, rangeSize, tolerance)
+        recordSizes(poses=len(poses), failed=self.verificationReport["failed"])
+
+        for report in self.verificationReport["objects"]:
+            if report["failed"]:
+                cmds.warning("%s: %d vertices deform differently from the combined skin (max error %g at vertex %d)" % (report["mesh"], report["failed"], report["maxError"], report["worstVertex"]))
+        return self.verificationReport
+
+    def getKnownVertexMap(self, idx, mesh=None):
+        """
+            @param[in] idx: index into self.separatedMeshes
+            @param[in] mesh: node holding that separated mesh now, None for self.separatedMeshes[idx]
+            @returns: combined vertex index per separated vertex when it is known without positions, None otherwise
+        """
+        if mesh is None:
+            mesh = self.separatedMeshes[idx]
 
-                    if combined_mpoint_visited[idx_cPoint] == 0: #check visited to prevent extra computations
-                        if mpoint.x == cpoint.x and mpoint.y == cpoint.y and mpoint.z == cpoint.z: #the same coords
+        vertexIds = self.separatedVertexIds[idx]
+        if vertexIds is not None and cmds.polyEvaluate(mesh, v=1) == len(vertexIds):
+            """built by buildSeparatedMeshes - the combined vertex of each separated vertex is known"""
+            return vertexIds
 
-                            
+        if self.tmp_useLedger:
+            """topology unchanged since combine - the separated vertices are a slice of the combined vertices"""
+            start, end = self.ledger.getVertexRange(self.separatedSourceIds[idx])
+            if cmds.polyEvaluate(mesh, v=1) == end - start:
+                return range(start, end)
 
-                            #coordinates match
+        return None
 
-                            combined_vtx_weightList = self.combinedWeights[idx_cPoint] #get weights for vtx from the combineWeights for each influence [double, double, double.... N] N - num of inf
+    @profiled("doRecreateSkinning")
+    @resolutionScope
+    def doRecreateSkinning(self, meshIndices=None):
 
-                            # print "separated weights for separated infl: ", combined_vtx_weightList
-                            #update weight list
-                            for i in combined_vtx_weightList:
-                                weights.set(i, idx_W)
-                                idx_W += 1
+        """
+            @param[in] meshIndices: indices into self.separatedMeshes to skin, None for all (doUpdate passes the changed ones)
 
-                            #set visited
-                            combined_mpoint_visited[idx_cPoint] = 1
+            @self.combinedMPointList - pointBlock of the vertices of the combined object
+            @self.combinedSparseWeights - CSR weights per vertex for the influences of self.influenceList, used to bind and fill the new clusters
 
-                            continue
+            @self.separatedMeshes - mesh list after separation
+            @self.separatedSkinClusters - list of skinClusters names for self.separatedMeshes
+            @self.separatedMPointList = List of pointBlock := positions of [object] vertices
 
+            @self.jointList - list of joints that took part in combined object skinning process 
+            @self.influenceList - list of joints used as influence objects for combined skin cluster
+        """
 
+        """1 map separated vertices to combined vertices"""
+        self.vertexIndexMap = self.buildVertexIndexMap()
+        vertexMaps = self.vertexIndexMap.vertexMaps #combined vertex index (or -1) per separated vertex, per separated mesh
 
-            #set the weight for the current object
-            # print influenceIndices[0], influenceIndices[1], influenceIndices[2], influenceIndices[3], influenceIndices[4]
-            fnSC.setWeights(dagPath, components, influenceIndices, weights, True) #normalize = True
+        """ @recreating weights
+            @we have: 
+                Weight list for the combined object
+                combined vertex index for each separated vertex
+                influence list in the right order
+        """
 
+        #pure array work runs ahead on the worker threads, the Maya calls below stay on the main thread
+        allMeshes = meshIndices is None
+        if allMeshes:
+            meshIndices = range(len(self.separatedMeshes))
+        self.separatedSkinClusters.extend([None] * (len(self.separatedMeshes) - len(self.separatedSkinClusters)))
+
+        chunkSize = objectCombine.weightChunkSize
+        remapped = None
+        if not chunkSize:
+            remapped = pipeline.iterRemapWeights(self.combinedSparseWeights, [vertexMaps[idx] for idx in meshIndices], objectCombine.remapWeightsWorkers)
+
+        try:
+            for idx in meshIndices:
+                mesh = self.separatedMeshes[idx]
+                with objectStage("doRecreateSkinning.object", mesh):
+
+                    """2 assign a skin cluster bound to the influences the mesh vertices actually use"""
+                    vertexMap = vertexMaps[idx]
+                    if chunkSize:
+                        #streaming - the weights are remapped and written chunk by chunk, one dense chunk alive at a time
+                        usedColumns = pipeline.getUsedColumns(self.combinedSparseWeights, vertexMap) #usedColumns := indices into self.influenceList
+                        chunks = pipeline.iterRemapChunks(self.combinedSparseWeights, vertexMap, usedColumns, chunkSize)
+                    else:
+                        usedColumns, weights = next(remapped) #usedColumns := indices into self.influenceList
+                        chunks = [(0, len(vertexMap), weights)]
+                    usedInfluences = [self.influenceList[i] for i in usedColumns]
+                    recordSizes(vertices=len(vertexMap), influences=len(usedColumns))
+
+                    cluster = self.separatedSkinClusters[idx]
+                    if cluster and cmds.objExists(cluster):
+                        #skinned by a previous run (doUpdate) - keep the cluster when it has exactly the used influences
+                        fnSC = fnSkinCluster.createMFnSkinCluster(cluster)
+                        indexMap = fnSkinCluster.getInfluenceIndexMap(fnSC)
+                        if set(indexMap) != set(usedInfluences):
+                            fnSkinCluster.unbindSkinCluster(cluster)
+                            cluster = None
+                    else:
+                        cluster = None
+
+                    if cluster is None:
+                        separatedMesheShape = fnSkinCluster.getShape(mesh)
+                        cluster, fnSC, indexMap = fnSkinCluster.buildSkinCluster(separatedMesheShape, usedInfluences)
+                    self.separatedSkinClusters[idx] = cluster
+
+                    """3 weights of the used influences for all vertices, in usedInfluences order"""
+                    meshUnmatched = self.vertexIndexMap.getUnmatched(idx)
+                    for start, stop, weights in chunks:
+                        vertexRange = (start, stop) if chunkSize else None
+
+                        unmatched = [idx_point - start for idx_point in meshUnmatched if start <= idx_point < stop]
+                        if unmatched: #no combined vertex within tolerance - keep the default weights of the new cluster
+                            if objectCombine.isApi2():
+                                defaults = api2.getWeights(cluster, vertexRange)[0]
+                            else:
+                                dagPath, components = fnSkinCluster.getGeometryComponents(fnSC)
+                                if vertexRange is not None:
+                                    components = fnSkinCluster.getVertexComponents(start, stop)
+                                defaults = fnSkinCluster.getWeights(fnSC, dagPath, components) #ordered according the cluster influences
+                            numInfluences = len(indexMap)
+                            numColumns = len(usedColumns)
+                            clusterColumns = [indexMap[i] for i in usedInfluences]
+                            for idx_point in unmatched:
+                                for idx_infl, infIdx in enumerate(clusterColumns):
+                                    weights[idx_point * numColumns + idx_infl] = defaults[idx_point * numInfluences + infIdx]
+
+                        #set the weight for the current object (or chunk) - one bulk call
+                        if objectCombine.isApi2():
+                            api2.setWeights(cluster, usedInfluences, weights, True, vertexRange) #normalize = True
+                        else:
+                            fnSkinCluster.setAllWeights(fnSC, usedInfluences, indexMap, weights, True, vertexRange) #normalize = True
+        finally:
+            if remapped is not None:
+                remapped.close() #shuts the remap thread pool down when a Maya call raised partway through
+
+        """4 the other per-vertex channels through the same vertex map"""
+        if self.vertexChannelData and allMeshes: #doUpdate writes them to the rebuilt meshes only
+            self.doTransferVertexChannels()
+
+        if objectCombine.verifySeparation:
+            self.doVerify()
+
+        if self.incremental and allMeshes:
+            self.sourceHashes = self.getSourceHashes()
+
+        self.getMemoryReport()
+
+    @profiled("getSourceHashes")
+    def getSourceHashes(self, objectFaceIds=None, vertexIds=None):
+        """
+            @param[in] objectFaceIds: combined face indices per original object, None to get them (getObjectFaceIds)
+            @param[in] vertexIds: list filled with the combined vertex ids per original object, None to skip
+            @returns: (geometry digest, weights digest) per original object - rest topology + positions, weight rows + influence names
+        """
+        if objectFaceIds is None:
+            objectFaceIds = self.getObjectFaceIds()
+        numVertices, faceCounts, faceConnects = objectCombine.getMeshConnectivity(self.tmp_combinedObject)
+        points = objectCombine.getMeshPoints(self.getRestShape(), worldSpace=False)
+        return pipeline.getSourceHashes(faceCounts, faceConnects, points, objectFaceIds, self.combinedSparseWeights, self.influenceList, vertexIds)
+
+    @profiled("doUpdate")
+    @resolutionScope
+    def doUpdate(self):
+        """
+            @returns: {"geometry": [...], "weights": [...], "unchanged": [...]} original object names per change
+
+            Incremental re-run of an incremental separation (self.incremental = True before doCollectSkinData_deleteSkin,
+            doSeparate(singlePass=True)).
+            The weights of the kept combined object are read again and hashed per original object:
+                geometry changed := the separated mesh is deleted and rebuilt (buildSeparatedMeshes) and skinned,
+                                    the vertex channels are read again from the combined object and written to it
+                weights changed  := the weights are written again into its skinCluster (rebound if the used influences changed)
+                unchanged        := the separated mesh and its skinCluster are not touched
+        """
+        if not self.incremental or not self.sourceHashes:
+            raise RuntimeError("doUpdate needs a finished incremental run (incremental = True, doSeparate, doRecreateSkinning)")
+        if not cmds.objExists(self.tmp_combinedObject):
+            raise RuntimeError("combined object %s is gone" % self.tmp_combinedObject)
+
+        self.doCollectSkinData_deleteSkin() #incremental - reads the weights, deletes nothing
+        objectFaceIds = self.getObjectFaceIds()
+        objectVertexIds = [] #combined vertex ids per original object in the current combined topology
+        sourceHashes = self.getSourceHashes(objectFaceIds, objectVertexIds)
+
+        changes = {"geometry": [], "weights": [], "unchanged": []}
+        rebuild = [[] for i in self.orig_names] #faces of the objects to rebuild, empty ones are skipped by buildSeparatedMeshes
+        meshIndices = []
+        rebuilt = [] #indices into self.separatedMeshes of the new meshes
+        for i, change in enumerate(pipeline.getSourceChanges(self.sourceHashes, sourceHashes)):
+            meshes = [idx for idx, source in enumerate(self.separatedSourceIds) if source == i]
+            if sourceHashes[i][0] is None and not meshes: #no faces in the combined object, nothing to separate
+                changes["unchanged"].append(self.orig_names[i])
+            elif change == "geometry" or len([idx for idx in meshes if cmds.objExists(self.separatedMeshes[idx])]) != len(meshes) or not meshes:
+                changes["geometry"].append(self.orig_names[i])
+                rebuild[i] = objectFaceIds[i]
+                for idx in meshes:
+                    if cmds.objExists(self.separatedMeshes[idx]):
+                        cmds.delete(self.separatedMeshes[idx])
+                        resolution.cache.invalidate()
+            else:
+                #same local topology, but an edit of another object renumbers the combined vertices - map the kept mesh again
+                for idx in meshes:
+                    self.separatedVertexIds[idx] = objectVertexIds[i]
+                if change == "weights":
+                    changes["weights"].append(self.orig_names[i])
+                    meshIndices.extend(meshes)
+                else:
+                    changes["unchanged"].append(self.orig_names[i])
+        recordSizes(objects=len(self.orig_names), geometry=len(changes["geometry"]), weights=len(changes["weights"]))
+
+        #rebuilt objects keep their slot, an object without a mesh so far gets a new one
+        for i, fullname, vertexIds in self.buildSeparatedMeshes(rebuild):
+            meshes = [idx for idx, source in enumerate(self.separatedSourceIds) if source == i]
+            if meshes:
+                idx = meshes[0]
+                self.separatedMeshes[idx] = fullname
+                self.separatedVertexIds[idx] = vertexIds
+                self.separatedSkinClusters[idx] = None #deleted with the old mesh
+            else:
+                idx = len(self.separatedMeshes)
+                self.separatedMeshes.append(fullname)
+                self.separatedSourceIds.append(i)
+                self.separatedVertexIds.append(vertexIds)
+                self.separatedSkinClusters.append(None)
+            meshIndices.append(idx)
+            rebuilt.append(idx)
+
+        #an object without faces in the combined object lost its mesh - drop its slot
+        keep = [idx for idx in range(len(self.separatedMeshes)) if cmds.objExists(self.separatedMeshes[idx])]
+        if len(keep) != len(self.separatedMeshes):
+            newIndex = dict((idx, k) for k, idx in enumerate(keep))
+            self.separatedMeshes = [self.separatedMeshes[idx] for idx in keep]
+            self.separatedSourceIds = [self.separatedSourceIds[idx] for idx in keep]
+            self.separatedVertexIds = [self.separatedVertexIds[idx] for idx in keep]
+            self.separatedSkinClusters = [self.separatedSkinClusters[idx] for idx in keep]
+            meshIndices = [newIndex[idx] for idx in meshIndices]
+            rebuilt = [newIndex[idx] for idx in rebuilt]
+
+        if meshIndices:
+            self.doRecreateSkinning(sorted(meshIndices))
+        if rebuilt and self.vertexChannels:
+            #captured values index the combined vertices of the first run - read them again in the current topology
+            self.vertexChannelData = captureChannels(self.vertexChannels, self.tmp_combinedObject)
+            self.doTransferVertexChannels(sorted(rebuilt))
+        self.sourceHashes = sourceHashes
+        return changes
 
 
 
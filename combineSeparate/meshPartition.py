@@ -0,0 +1,110 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""
+mesh partition
+split the arrays of one mesh (points, counts, connects, uvs) into the arrays of several meshes in one pass
+vertices and uvs keep their relative order, so a separated vertex i is the i-th used vertex of its faces in the combined mesh
+"""
+
+
+def getOffsets(counts):
+    """
+        @param[in] counts: number of entries per face
+        @returns: list of len(counts) + 1 offsets into the flat per face-vertex array
+    """
+    output = [0]
+    total = 0
+    for count in counts:
+        total += count
+        output.append(total)
+    return output
+
+
+def gatherItems(values, ids, itemSize=1):
+    """
+        @param[in] values: flat per-item values, itemSize values per item (points: 3, u: 1)
+        @param[in] ids: item indices to gather
+        @returns: flat list of the values of the passed in items, in ids order
+    """
+    if numpy is not None:
+        rows = numpy.asarray(values).reshape(-1, itemSize)
+        return rows[numpy.asarray(ids, dtype=numpy.int64)].reshape(-1).tolist()
+    output = []
+    for i in ids:
+        output.extend(values[i * itemSize:(i + 1) * itemSize])
+    return output
+
+
+def compact(ids):
+    """
+        @param[in] ids: ids referenced by a set of faces, duplicates allowed
+        @returns: (used ids ascending, {id: local id})
+    """
+    used = sorted(set(ids))
+    return used, dict((i, local) for local, i in enumerate(used))
+
+
+def extractAssigned(faceIds, counts, ids, offsets):
+    """
+        @param[in] faceIds: ascending face indices of one output mesh
+        @param[in] counts, ids, offsets: per face assignment of the combined mesh (MFnMesh.getAssignedUVs layout + getOffsets)
+        @returns: (combined ids used by the faces ascending, counts of the faces, local ids per face-vertex)
+    """
+    outCounts = array('i')
+    connects = array('i')
+    for face in faceIds:
+        outCounts.append(counts[face])
+        connects.extend(ids[offsets[face]:offsets[face + 1]])
+
+    usedIds, localIds = compact(connects)
+    return usedIds, outCounts, array('i', [localIds[i] for i in connects])
+
+
+class meshPartition():
+    def __init__(self, faceCounts, faceConnects, uvCounts=None, uvIds=None):
+        """
+            @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout of the combined mesh
+            @param[in] uvCounts, uvIds: MFnMesh.getAssignedUVs layout of the combined mesh, optional
+        """
+        self.faceCounts = faceCounts
+        self.faceConnects = faceConnects
+        self.faceOffsets = getOffsets(faceCounts)
+
+        self.uvCounts = uvCounts
+        self.uvIds = uvIds
+        self.uvOffsets = getOffsets(uvCounts) if uvCounts is not None else None
+
+    def extract(self, faceIds):
+        """
+            @param[in] faceIds: ascending face indices of one output mesh
+            @returns: dict
+                vertexIds - combined vertex ids used by the faces, ascending (= new vertex order)
+                faceCounts, faceConnects - topology of the output mesh in local vertex ids
+                uvIds - combined uv ids used by the faces, ascending (= new uv order), None without uvs
+                uvCounts, uvConnects - uv assignment of the output mesh in local uv ids, None without uvs
+        """
+        faceCounts = self.faceCounts
+        faceConnects = self.faceConnects
+        faceOffsets = self.faceOffsets
+
+        counts = array('i')
+        connects = array('i')
+        for face in faceIds:
+            counts.append(faceCounts[face])
+            connects.extend(faceConnects[faceOffsets[face]:faceOffsets[face + 1]])
+
+        vertexIds, localIds = compact(connects)
+        connects = array('i', [localIds[i] for i in connects])
+
+        output = {"vertexIds": vertexIds, "faceCounts": counts, "faceConnects": connects, "uvIds": None, "uvCounts": None, "uvConnects": None}
+
+        if self.uvCounts is not None:
+            output["uvIds"], output["uvCounts"], output["uvConnects"] = extractAssigned(faceIds, self.uvCounts, self.uvIds, self.uvOffsets)
+
+        return output
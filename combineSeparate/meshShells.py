@@ -0,0 +1,120 @@
+from array import array
+
+
+"""
+shell extraction
+label connected face groups (shells) of a mesh with union-find over its face-vertex connectivity
+"""
+
+
+def labelShells(numVertices, faceCounts, faceConnects):
+    """
+        @param[in] numVertices: number of vertices of the mesh
+        @param[in] faceCounts: number of vertices per face (MFnMesh.getVertices counts)
+        @param[in] faceConnects: vertex ids of all faces one after another (MFnMesh.getVertices connects)
+        @returns: (faceLabels, numShells) - shell id per face, shells are numbered by their lowest face index
+    """
+    parent = list(range(numVertices))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]] #path halving
+            i = parent[i]
+        return i
+
+    offset = 0
+    for count in faceCounts:
+        if count:
+            root = find(faceConnects[offset])
+            for k in range(offset + 1, offset + count):
+                other = find(faceConnects[k])
+                if other != root:
+                    #keep the lower root - deterministic labels
+                    if other < root:
+                        parent[root] = other
+                        root = other
+                    else:
+                        parent[other] = root
+        offset += count
+
+    faceLabels = array('i', [0] * len(faceCounts))
+    roots = {} #{vertex root: shell id}
+    offset = 0
+    for face, count in enumerate(faceCounts):
+        if count:
+            root = find(faceConnects[offset])
+        else:
+            root = -1 - face #face without vertices is a shell on its own
+        label = roots.get(root)
+        if label is None:
+            label = roots[root] = len(roots)
+        faceLabels[face] = label
+        offset += count
+
+    return faceLabels, len(roots)
+
+
+def groupShells(faceLabels, numShells):
+    """
+        @param[in] faceLabels: shell id per face
+        @param[in] numShells: number of shells
+        @returns: list of array('i') - ascending face indices per shell
+    """
+    output = [array('i') for i in range(numShells)]
+    for face, label in enumerate(faceLabels):
+        output[label].append(face)
+    return output
+
+
+def formatComponents(obj, indices, component="f"):
+    """
+        @param[in] obj: object full name
+        @param[in] indices: ascending component indices
+        @returns: list of component strings, consecutive indices are packed into ranges [obj.f[0:5], obj.f[9]]
+    """
+    output = []
+    n = len(indices)
+    i = 0
+    while i < n:
+        start = indices[i]
+        j = i
+        while j + 1 < n and indices[j + 1] == indices[j] + 1:
+            j += 1
+        if j == i:
+            output.append("%s.%s[%d]" % (obj, component, start))
+        else:
+            output.append("%s.%s[%d:%d]" % (obj, component, start, indices[j]))
+        i = j + 1
+    return output
+
+
+class shellFaces():
+    def __init__(self, obj, indices):
+        """
+            @param[in] obj: object full name
+            @param[in] indices: ascending face indices of the shell
+            @type indices: array('i')
+
+            Behaves like a list of face strings [obj.f[0:2], obj.f[5]] for cmds calls, the strings are only built on first use.
+        """
+        self.obj = obj
+        self.indices = indices
+        self._components = None
+
+    @property
+    def components(self):
+        """
+            @returns: list of face component strings (packed ranges) for cmds calls
+        """
+        if self._components is None:
+            self._components = formatComponents(self.obj, self.indices)
+        return self._components
+
+    def numFaces(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        return iter(self.components)
+
+    def __repr__(self):
+        return "shellFaces(%r, %d faces)" % (self.obj, len(self.indices))
@@ -0,0 +1,266 @@
+from combineSeparate.meshShells import labelShells, groupShells
+from combineSeparate.shellBounds import getShellSignatures
+from combineSeparate.shellIndex import shellIndex
+from combineSeparate.spatialHash import pointHash
+from combineSeparate.arrayStore import pointBlock
+from combineSeparate.sparseWeights import sparseWeights
+from combineSeparate.meshPartition import meshPartition
+from combineSeparate.shellCache import meshKey
+from combineSeparate.sessionFile import toBytes
+import hashlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""
+combine / separate algorithms without Maya
+every stage works on plain arrays read through a backend (see backend.py), objectCombine drives them inside Maya
+    captureMesh    := points, topology and skin weights of a mesh
+    captureSkinWeights := sparse skin weights of a mesh, read in one call or streamed in vertex chunks
+    analyseShells  := shell labels + shell signatures
+    matchShells    := original shells -> combined shells
+    matchVertices  := separated vertices -> combined vertices
+    remapWeights   := weights of a separated mesh for the influences it uses
+    iterRemapWeights := remapWeights of many meshes, optionally on a thread pool (numpy releases the GIL)
+    iterRemapChunks  := remapWeights of one mesh streamed in vertex chunks - memory bound by the chunk size
+    getSourceHashes  := geometry + weights digest per original object, an incremental re-run rebuilds the changed ones only
+    getSourceChanges := geometry / weights / unchanged per original object between two getSourceHashes results
+"""
+
+
+def captureMesh(backend, mesh, skinned=False, chunkSize=None):
+    """
+        @param[in] backend: meshBackend
+        @param[in] mesh: mesh name
+        @param[in] skinned: True to capture the skin weights as well
+        @param[in] chunkSize: stream the weights in chunks of this many vertices (see captureSkinWeights)
+        @returns: dict - numVertices, faceCounts, faceConnects, points (pointBlock)
+                  + sparseWeights, influences when skinned
+    """
+    numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(mesh)
+    output = {
+        "numVertices": numVertices,
+        "faceCounts": faceCounts,
+        "faceConnects": faceConnects,
+        "points": pointBlock(backend.getMeshPoints(mesh)),
+    }
+    if skinned:
+        output["influences"], output["sparseWeights"] = captureSkinWeights(backend, mesh, chunkSize)
+    return output
+
+
+def captureSkinWeights(backend, mesh, chunkSize=None):
+    """
+        @param[in] backend: meshBackend
+        @param[in] mesh: skinned mesh name
+        @param[in] chunkSize: stream the weights in chunks of this many vertices - one dense chunk alive at a time
+                              None to read them in one call, the dense copy is released once the sparse one is built
+        @returns: (influence names, sparseWeights)
+    """
+    if chunkSize:
+        influences, chunks = backend.iterSkinWeights(mesh, chunkSize)
+        return influences, sparseWeights.fromChunks(chunks, len(influences))
+
+    weights, influences = backend.getSkinWeights(mesh)
+    return influences, sparseWeights.fromDense(weights, len(influences))
+
+
+def analyseShells(numVertices, faceCounts, faceConnects, points):
+    """
+        @param[in] numVertices, faceCounts, faceConnects: MFnMesh.getVertices layout
+        @param[in] points: flat world space positions
+        @returns: (faceLabels, face index arrays per shell, shell signatures)
+    """
+    faceLabels, numShells = labelShells(numVertices, faceCounts, faceConnects)
+    shells = groupShells(faceLabels, numShells)
+    signatures = getShellSignatures(points, faceCounts, faceConnects, faceLabels, numShells)
+    return faceLabels, shells, signatures
+
+
+def matchShells(origSignatures, combinedSignatures, tolerance=1e-4):
+    """
+        @param[in] origSignatures: shell signatures per original object [[sig, sig], [sig]]
+        @param[in] combinedSignatures: shell signatures of the combined mesh
+        @returns: (original object index per combined shell or -1, [(object index, shell index), ...] of unmatched original shells)
+    """
+    index = shellIndex(combinedSignatures, tolerance)
+    assignment = [-1] * len(combinedSignatures)
+    unmatched = []
+    for idx_i, signatures in enumerate(origSignatures):
+        for idx_j, signature in enumerate(signatures):
+            idx_k = index.claim(signature)
+            if idx_k == -1:
+                unmatched.append((idx_i, idx_j))
+                continue
+            assignment[idx_k] = idx_i
+    return assignment, unmatched
+
+
+def matchVertices(combinedHash, points):
+    """
+        @param[in] combinedHash: pointHash of the combined vertices, matches are claimed
+        @param[in] points: positions of a separated mesh, iterable of (x, y, z)
+        @returns: combined vertex index (or -1) per separated vertex
+    """
+    output = []
+    hint = 0 #separated vertices keep the combined vertex order - coincident vertices resolve to the next index
+    for point in points:
+        idx = combinedHash.claim(point, hint)
+        if idx != -1:
+            hint = idx + 1
+        output.append(idx)
+    return output
+
+
+def buildVertexHash(points, tolerance=1e-5):
+    """
+        @returns: pointHash of the passed in positions
+    """
+    return pointHash(points, tolerance)
+
+
+def getUsedColumns(weights, vertexMap):
+    """
+        @param[in] weights: sparseWeights of the combined mesh
+        @param[in] vertexMap: combined vertex index (or -1) per separated vertex
+        @returns: ascending influence columns the separated mesh uses
+    """
+    usedColumns = weights.getUsedInfluences(vertexMap)
+    if not usedColumns:
+        usedColumns = [0] #a skinCluster needs at least one influence
+    return usedColumns
+
+
+def remapWeights(weights, vertexMap):
+    """
+        @param[in] weights: sparseWeights of the combined mesh
+        @param[in] vertexMap: combined vertex index (or -1) per separated vertex
+        @returns: (used influence columns, flat weights of the separated mesh for these columns)
+    """
+    usedColumns = getUsedColumns(weights, vertexMap)
+    return usedColumns, weights.toDense(vertexMap, usedColumns)
+
+
+def iterChunks(count, chunkSize):
+    """
+        @returns: generator of (start, stop) covering [0, count) in steps of chunkSize
+    """
+    for start in range(0, count, chunkSize):
+        yield start, min(start + chunkSize, count)
+
+
+def iterRemapChunks(weights, vertexMap, usedColumns, chunkSize):
+    """
+        @param[in] weights: sparseWeights of the combined mesh
+        @param[in] vertexMap: combined vertex index (or -1) per separated vertex
+        @param[in] usedColumns: output columns (getUsedColumns)
+        @returns: generator of (start, stop, flat weights of the separated vertices [start, stop) for usedColumns)
+    """
+    for start, stop in iterChunks(len(vertexMap), chunkSize):
+        yield start, stop, weights.toDense(vertexMap[start:stop], usedColumns)
+
+
+def iterRemapWeights(weights, vertexMaps, workers=1):
+    """
+        @param[in] weights: sparseWeights of the combined mesh, only read - shared by the threads
+        @param[in] vertexMaps: vertex map per separated mesh (see remapWeights)
+        @param[in] workers: threads, 1 runs serially in the calling thread, None / 0 uses one thread per cpu
+        @returns: generator of remapWeights results in vertexMaps order - the results equal the serial ones bit for bit
+                  the caller consumes mesh i (Maya calls) while the threads remap the next workers * 2 meshes at most
+    """
+    if workers == 1 or len(vertexMaps) < 2:
+        for vertexMap in vertexMaps:
+            yield remapWeights(weights, vertexMap)
+        return
+
+    from collections import deque
+    from multiprocessing import cpu_count
+    from multiprocessing.pool import ThreadPool
+    workers = workers or cpu_count()
+    pool = ThreadPool(workers)
+    pending = deque() #submitted results in vertexMaps order - at most workers * 2 dense remaps alive, the threads wait for the consumer
+    try:
+        for vertexMap in vertexMaps:
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+            pending.append(pool.apply_async(remapWeights, (weights, vertexMap)))
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate() #the consumer may stop early
+        pool.join()
+
+
+def hashSourceGeometry(faceCounts, faceConnects, points, vertexIds):
+    """
+        @param[in] faceCounts, faceConnects: local topology of one original object (meshPartition.extract)
+        @param[in] points: flat positions of the combined mesh
+        @param[in] vertexIds: combined vertex index per local vertex
+        @returns: hex digest of the topology and the positions of the object
+    """
+    if numpy is not None:
+        gathered = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)[numpy.asarray(vertexIds, dtype=numpy.int64)].reshape(-1)
+    else:
+        gathered = []
+        for v in vertexIds:
+            gathered.extend(points[v * 3:v * 3 + 3])
+    return meshKey(faceCounts, faceConnects, gathered)
+
+
+def hashSourceWeights(weights, vertexIds, influences):
+    """
+        @param[in] weights: sparseWeights of the combined mesh
+        @param[in] vertexIds: combined vertex index per local vertex of one original object
+        @param[in] influences: influence names of the weights columns
+        @returns: hex digest of the weight rows of the object and the names of the influences they use
+    """
+    rows = weights.getRows(vertexIds)
+    md5 = hashlib.md5()
+    md5.update("|".join([influences[i] for i in rows.getUsedInfluences()]).encode("utf-8"))
+    md5.update(toBytes(rows.indptr, "q"))
+    md5.update(toBytes(rows.indices, "i"))
+    md5.update(toBytes(rows.values, "d"))
+    return md5.hexdigest()
+
+
+def getSourceHashes(faceCounts, faceConnects, points, objectFaceIds, weights, influences, vertexIds=None):
+    """
+        @param[in] faceCounts, faceConnects, points: rest topology and positions of the combined mesh
+        @param[in] objectFaceIds: ascending combined face indices per original object
+        @param[in] weights, influences: sparseWeights of the combined mesh + influence names of its columns
+        @param[in] vertexIds: list filled with the combined vertex ids per original object (None without faces), None to skip
+        @returns: (geometry digest, weights digest) per original object, (None, None) for an object without faces
+    """
+    partition = meshPartition(faceCounts, faceConnects)
+    output = []
+    for faceIds in objectFaceIds:
+        if not len(faceIds):
+            output.append((None, None))
+            if vertexIds is not None:
+                vertexIds.append(None)
+            continue
+        data = partition.extract(faceIds)
+        if vertexIds is not None:
+            vertexIds.append(data["vertexIds"])
+        output.append((hashSourceGeometry(data["faceCounts"], data["faceConnects"], points, data["vertexIds"]),
+                       hashSourceWeights(weights, data["vertexIds"], influences)))
+    return output
+
+
+def getSourceChanges(oldHashes, newHashes):
+    """
+        @param[in] oldHashes, newHashes: getSourceHashes results of the last and of the current run
+        @returns: "geometry", "weights" or "unchanged" per original object - a geometry change wins over a weights change
+    """
+    output = []
+    for old, new in zip(oldHashes, newHashes):
+        if old[0] != new[0]:
+            output.append("geometry")
+        elif old[1] != new[1]:
+            output.append("weights")
+        else:
+            output.append("unchanged")
+    return output
@@ -0,0 +1,269 @@
+import functools
+import json
+import time
+import timeit
+
+
+"""
+opt-in instrumentation of the combine / separate pipeline
+    profiler.enable()
+    instance.doSeparate() ...
+    print(profiler.getReportJson(perObject=True))
+    profiler.disable()
+
+per stage: calls, wall and cpu seconds, Maya commands and API calls, data sizes (vertices, shells, influences)
+stages nest - a helper called inside a stage is reported as a child of that stage, repeated calls are merged
+Maya round-trips are counted by swapping the Maya modules registered with registerModule for counting proxies
+    commands := calls of maya.cmds / maya.mel functions
+    api      := API objects created and API module functions called (methods of API objects are not counted)
+while disabled the decorators cost one global lookup and the modules are untouched
+"""
+
+
+_cpuTimer = getattr(time, "process_time", None) or time.clock #python 2
+_active = None #stageProfiler while enabled
+_modules = [] #[(module, attribute name, kind)] registered for counting
+
+
+class stageRecord():
+    def __init__(self, name, obj=None):
+        self.name = name
+        self.object = obj
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.commands = {} #{command name: calls}
+        self.api = {} #{api name: calls}
+        self.sizes = {} #{size name: value}
+        self.children = []
+        self._children = {} #{(name, object): stageRecord}
+
+    def getChild(self, name, obj=None):
+        key = (name, obj)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = stageRecord(name, obj)
+            self.children.append(child)
+        return child
+
+    def getTotals(self):
+        """
+            @returns: (commands, api calls) of this stage including its children
+        """
+        commands = sum(self.commands.values())
+        api = sum(self.api.values())
+        for child in self.children:
+            childCommands, childApi = child.getTotals()
+            commands += childCommands
+            api += childApi
+        return commands, api
+
+    def toDict(self, perObject=False):
+        commands, api = self.getTotals()
+        output = {
+            "name": self.name,
+            "calls": self.calls,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "commands": dict(self.commands),
+            "api": dict(self.api),
+            "totalCommands": commands,
+            "totalApi": api,
+            "sizes": dict(self.sizes),
+        }
+        if self.object is not None:
+            output["object"] = self.object
+
+        stages = []
+        objects = []
+        for child in self.children:
+            if child.object is None:
+                stages.append(child.toDict(perObject))
+            elif perObject:
+                objects.append(child.toDict(perObject))
+        if stages:
+            output["stages"] = stages
+        if objects:
+            output["objects"] = objects
+        return output
+
+
+class stageProfiler():
+    def __init__(self):
+        self.root = stageRecord("session")
+        self.stack = [self.root]
+        self.started = timeit.default_timer()
+
+    def current(self):
+        return self.stack[-1]
+
+    def push(self, name, obj=None):
+        record = self.current().getChild(name, obj)
+        record.calls += 1
+        self.stack.append(record)
+        return record
+
+    def pop(self, record, wall, cpu):
+        record.wall += wall
+        record.cpu += cpu
+        if self.stack[-1] is record:
+            self.stack.pop()
+
+    def count(self, kind, name):
+        counters = self.current().commands if kind == "commands" else self.current().api
+        counters[name] = counters.get(name, 0) + 1
+
+    def setSizes(self, sizes):
+        self.current().sizes.update(sizes)
+
+    def getReport(self, perObject=False):
+        self.root.wall = timeit.default_timer() - self.started
+        return self.root.toDict(perObject)
+
+
+class stageTimer():
+    def __init__(self, name, obj=None):
+        """
+            @context manager timing one stage (or one object inside a stage) of the active profiler
+        """
+        self.name = name
+        self.object = obj
+        self.profiler = None
+        self.record = None
+
+    def __enter__(self):
+        self.profiler = _active
+        if self.profiler is not None:
+            self.record = self.profiler.push(self.name, self.object)
+            self.wall = timeit.default_timer()
+            self.cpu = _cpuTimer()
+        return self
+
+    def __exit__(self, *args):
+        if self.profiler is not None:
+            self.profiler.pop(self.record, timeit.default_timer() - self.wall, _cpuTimer() - self.cpu)
+        return False
+
+
+def profiled(name):
+    """
+        @decorator timing every call of the function as stage name while a profiler is enabled
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return function(*args, **kwargs)
+            with stageTimer(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def objectStage(name, obj):
+    """
+        @returns: context manager timing the work of one object - reported with getReport(perObject=True)
+    """
+    return stageTimer(name, obj)
+
+
+def recordSizes(**sizes):
+    """
+        @record data sizes (vertices=, shells=, influences= ...) on the current stage, no-op while disabled
+    """
+    if _active is not None:
+        _active.setSizes(sizes)
+
+
+class countingCallable():
+    def __init__(self, target, kind, name):
+        self._target = target
+        self._kind = kind
+        self._name = name
+
+    def __call__(self, *args, **kwargs):
+        if _active is not None:
+            _active.count(self._kind, self._name)
+        return self._target(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name) #class attributes (MSpace.kWorld, MFn.kMesh ...)
+
+
+class countingModule():
+    def __init__(self, module, kind):
+        """
+            @proxy of a Maya module - every call of one of its callables is counted as kind
+        """
+        self._module = module
+        self._kind = kind
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if callable(attr):
+            return countingCallable(attr, self._kind, name)
+        return attr
+
+
+def registerModule(module, attribute, kind):
+    """
+        @param[in] module: module using a Maya module (sys.modules[__name__])
+        @param[in] attribute: name of the Maya module in it ("cmds", "OpenMaya" ...)
+        @param[in] kind: "commands" or "api"
+    """
+    _modules.append((module, attribute, kind))
+
+
+def enable():
+    """
+        @starts a new profiling session and swaps the registered Maya modules for counting proxies
+        @returns: stageProfiler
+    """
+    global _active
+    _active = stageProfiler()
+    for module, attribute, kind in _modules:
+        value = getattr(module, attribute, None)
+        if value is not None and not isinstance(value, countingModule):
+            setattr(module, attribute, countingModule(value, kind))
+    return _active
+
+
+def disable():
+    """
+        @stops profiling and restores the Maya modules
+        @returns: the stageProfiler of the finished session (None if it was not enabled)
+    """
+    global _active
+    profiler = _active
+    _active = None
+    for module, attribute, kind in _modules:
+        value = getattr(module, attribute, None)
+        if isinstance(value, countingModule):
+            setattr(module, attribute, value._module)
+    return profiler
+
+
+def isEnabled():
+    return _active is not None
+
+
+def getReport(perObject=False, profiler=None):
+    """
+        @returns: report dict of the active (or passed in) profiler, None if there is none
+    """
+    profiler = profiler or _active
+    if profiler is None:
+        return None
+    return profiler.getReport(perObject)
+
+
+def getReportJson(perObject=False, profiler=None, path=None):
+    """
+        @param[in] path: file to write the report to, optional
+        @returns: report as a JSON string
+    """
+    output = json.dumps(getReport(perObject, profiler), indent=2, sort_keys=True)
+    if path:
+        with open(path, "w") as f:
+            f.write(output)
+    return output
@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+
+
+"""
+scoped cache of Maya name resolutions
+    tables := {table name: {key: value}} - "shape" node -> shape, "skinCluster" shape -> skinCluster,
+              "influences" skinCluster -> influence paths (index <-> DAG path), "handle" / "dagPath" name -> MObject handle / MDagPath
+    scope  := with cache.scope(): ... - lookups are cached while a scope is open, the outermost scope clears the tables on exit
+
+outside a scope every lookup resolves again, so names never go stale between two stages while the user edits the scene
+inside a scope the owner of a change drops what it invalidates (invalidate) - delete, rename, bind, unbind
+handle / dagPath entries are validated on every hit (MObjectHandle.isValid, MDagPath.isValid), a deleted node resolves again
+watchScene clears the cache when a scene is opened, created or a reference is unloaded
+"""
+
+
+class resolutionCache():
+    def __init__(self):
+        self.tables = {} #{table name: {key: value}}
+        self.depth = 0 #open scopes
+        self.hits = 0
+        self.misses = 0
+        self.callbacks = [] #scene message callback ids, see watchScene
+
+    def __len__(self):
+        return sum([len(i) for i in self.tables.values()])
+
+    @contextmanager
+    def scope(self):
+        """
+            @cache lookups until the outermost scope closes
+        """
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.clear()
+
+    def get(self, table, key, resolve, validate=None):
+        """
+            @param[in] table: table name
+            @param[in] key: hashable key inside the table
+            @param[in] resolve: callable returning the value - called on a miss
+            @param[in] validate: callable(value) returning False when a cached value is stale, None trusts the entry
+            @returns: cached or resolved value
+        """
+        if not self.depth:
+            self.misses += 1
+            return resolve()
+
+        entries = self.tables.setdefault(table, {})
+        if key in entries:
+            value = entries[key]
+            if validate is None or validate(value):
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        value = entries[key] = resolve()
+        return value
+
+    def invalidate(self, table=None, key=None):
+        """
+            @param[in] table: table to drop entries of, None for every table
+            @param[in] key: entry to drop, None for the whole table
+        """
+        if table is None:
+            self.tables.clear()
+        elif key is None:
+            self.tables.pop(table, None)
+        else:
+            self.tables.get(table, {}).pop(key, None)
+
+    def clear(self):
+        self.tables.clear()
+
+    def getStats(self):
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses, "scopes": self.depth}
+
+    def watchScene(self):
+        """
+            @clear the cache on scene changes (new, open, import, reference unload) - registered once, no-op without Maya
+        """
+        if self.callbacks:
+            return
+        try:
+            import maya.api.OpenMaya as om2
+        except ImportError:
+            return
+        for message in ("kBeforeNew", "kBeforeOpen", "kAfterImport", "kBeforeUnloadReference", "kBeforeRemoveReference"):
+            self.callbacks.append(om2.MSceneMessage.addCallback(getattr(om2.MSceneMessage, message), lambda *args: self.clear()))
+
+    def unwatchScene(self):
+        if self.callbacks:
+            import maya.api.OpenMaya as om2
+            om2.MMessage.removeCallbacks(self.callbacks)
+            self.callbacks = []
+
+
+cache = resolutionCache() #shared by fnSkinCluster, objectCombine and api2
@@ -0,0 +1,166 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from combineSeparate.arrayStore import INT64
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""
+binary session file
+    magic        8 bytes  "CSSESS01"
+    headerSize   8 bytes  little endian uint64
+    header       JSON     names, influences, ledger ... + "arrays": {name: {"offset", "type", "length"}}
+    arrays       raw little endian data, every array starts on an 8 byte boundary
+
+arrays are memory-mapped on load - nothing is read until an element is touched, so multi-GB sessions open instantly
+"""
+
+
+MAGIC = b"CSSESS01"
+ALIGN = 8
+TYPES = {"d": ("<f8", 8), "i": ("<i4", 4), "q": ("<i8", 8)} #array typecode: (numpy dtype, item size)
+
+
+def _pad(size):
+    return (ALIGN - size % ALIGN) % ALIGN
+
+
+def toBytes(values, typecode):
+    """
+        @param[in] values: numbers, any sequence or buffer
+        @param[in] typecode: "d", "i" or "q" (TYPES)
+        @returns: little endian bytes of the values - the on-disk layout, also hashed for checksums and cache keys
+    """
+    if numpy is not None:
+        return numpy.ascontiguousarray(values, dtype=TYPES[typecode][0]).tobytes()
+    if typecode == "q": #python arrays have no portable 64 bit int type
+        return struct.pack("<%dq" % len(values), *values)
+    data = array(typecode, values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes() if hasattr(data, "tobytes") else data.tostring()
+
+
+def _plain(value):
+    """
+        @returns: value with tuples and numpy scalars turned into JSON types (signatures hold numpy floats)
+    """
+    if isinstance(value, dict):
+        return dict([(k, _plain(v)) for k, v in value.items()])
+    if isinstance(value, (list, tuple)):
+        return [_plain(i) for i in value]
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        return value.item()
+    return value
+
+
+def saveSession(path, header, arrays):
+    """
+        @param[in] path: file path
+        @param[in] header: JSON serializable dict
+        @param[in] arrays: {name: (typecode, values)} - typecode "d" float64, "i" int32, "q" int64
+    """
+    header = _plain(header)
+    header["arrays"] = {}
+
+    #layout first - the header holds the offsets of the arrays
+    blobs = []
+    for name in sorted(arrays):
+        typecode, values = arrays[name]
+        blobs.append((name, typecode, toBytes(values, typecode)))
+
+    offset = 0
+    for name, typecode, blob in blobs:
+        header["arrays"][name] = {"offset": offset, "type": typecode, "length": len(blob) // TYPES[typecode][1]}
+        offset += len(blob) + _pad(len(blob))
+
+    headerBytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    headerBytes += b" " * _pad(len(MAGIC) + 8 + len(headerBytes))
+    dataStart = len(MAGIC) + 8 + len(headerBytes)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(headerBytes)))
+        f.write(headerBytes)
+        for name, typecode, blob in blobs:
+            f.write(blob)
+            f.write(b"\0" * _pad(len(blob)))
+
+    return dataStart + offset
+
+
+class sessionData():
+    def __init__(self, path, versions=None):
+        """
+            @param[in] path: session file written by saveSession
+            @param[in] versions: header "version" values the caller can read, None accepts any
+            only the header is read here, arrays are mapped on first access
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("%s is not a combineSeparate session" % path)
+            headerSize = struct.unpack("<Q", f.read(8))[0]
+            self.header = json.loads(f.read(headerSize).decode("utf-8"))
+        if versions is not None and self.header.get("version") not in versions:
+            raise ValueError("%s has session version %s, supported: %s" % (path, self.header.get("version"), ", ".join([str(i) for i in versions])))
+        self.dataStart = len(MAGIC) + 8 + headerSize
+        self._file = None
+        self._mmap = None
+        self._arrays = {}
+
+    def __contains__(self, name):
+        return name in self.header["arrays"]
+
+    def getArray(self, name):
+        """
+            @returns: memory-mapped array (numpy memmap, or a typed memoryview without numpy)
+        """
+        if name in self._arrays:
+            return self._arrays[name]
+
+        spec = self.header["arrays"][name]
+        dtype, itemSize = TYPES[spec["type"]]
+        offset = self.dataStart + spec["offset"]
+
+        if numpy is not None:
+            if spec["length"]:
+                output = numpy.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=(spec["length"],))
+            else:
+                output = numpy.zeros(0, dtype=dtype)
+        else:
+            if self._mmap is None:
+                self._file = open(self.path, "rb")
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            end = offset + spec["length"] * itemSize
+            if sys.version_info[0] > 2 and sys.byteorder == "little":
+                output = memoryview(self._mmap)[offset:end].cast(spec["type"])
+            else: #python 2 has no typed views of a mmap - copy
+                output = array(spec["type"] if spec["type"] != "q" else INT64)
+                output.extend(struct.unpack("<%d%s" % (spec["length"], spec["type"]), self._mmap[offset:end]))
+
+        self._arrays[name] = output
+        return output
+
+    def close(self):
+        self._arrays = {}
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+
+
+def loadSession(path, versions=None):
+    """
+        @param[in] versions: header "version" values the caller can read - ValueError for any other, None accepts any
+        @returns: sessionData - header + lazily mapped arrays
+    """
+    return sessionData(path, versions)
@@ -0,0 +1,112 @@
+from combineSeparate.shellIndex import makeSignature
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""
+shell bounding boxes
+min/max, vertex count and centroid of every shell of a mesh in one reduction over the shell-label array
+no selection is involved - safe in batch and background contexts
+"""
+
+
+def getVertexLabels(numVertices, faceCounts, faceConnects, faceLabels):
+    """
+        @param[in] numVertices: number of vertices of the mesh
+        @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout
+        @param[in] faceLabels: shell id per face (meshShells.labelShells)
+        @returns: shell id per vertex, -1 for vertices that are not used by any face
+    """
+    if numpy is not None:
+        output = numpy.full(numVertices, -1, dtype=numpy.int64)
+        output[numpy.asarray(faceConnects, dtype=numpy.int64)] = numpy.repeat(numpy.asarray(faceLabels, dtype=numpy.int64), numpy.asarray(faceCounts, dtype=numpy.int64))
+        return output
+
+    output = [-1] * numVertices
+    offset = 0
+    for face, count in enumerate(faceCounts):
+        label = faceLabels[face]
+        for k in range(offset, offset + count):
+            output[faceConnects[k]] = label
+        offset += count
+    return output
+
+
+def getShellSignatures(points, faceCounts, faceConnects, faceLabels, numShells):
+    """
+        @param[in] points: world space vertex positions, flat [x, y, z, x, y, z ...]
+        @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout
+        @param[in] faceLabels: shell id per face
+        @param[in] numShells: number of shells
+        @returns: list of shellIndex signatures, one per shell
+    """
+    numVertices = len(points) // 3
+    vertexLabels = getVertexLabels(numVertices, faceCounts, faceConnects, faceLabels)
+
+    numFaces = [0] * numShells
+    for label in faceLabels:
+        numFaces[label] += 1
+
+    if numpy is not None:
+        return _getShellSignatures_numpy(points, vertexLabels, numFaces, numShells)
+
+    numVerts = [0] * numShells
+    bboxMin = [None] * numShells
+    bboxMax = [None] * numShells
+    centroid = [[0.0, 0.0, 0.0] for i in range(numShells)]
+    for vertex, label in enumerate(vertexLabels):
+        if label < 0:
+            continue
+        p = points[vertex * 3:vertex * 3 + 3]
+        numVerts[label] += 1
+        if bboxMin[label] is None:
+            bboxMin[label] = list(p)
+            bboxMax[label] = list(p)
+        for axis in range(3):
+            if p[axis] < bboxMin[label][axis]:
+                bboxMin[label][axis] = p[axis]
+            if p[axis] > bboxMax[label][axis]:
+                bboxMax[label][axis] = p[axis]
+            centroid[label][axis] += p[axis]
+
+    output = []
+    for label in range(numShells):
+        count = numVerts[label]
+        if not count:
+            output.append(makeSignature(numFaces[label], 0, (0.0, 0.0, 0.0), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)))
+            continue
+        output.append(makeSignature(numFaces[label], count, bboxMin[label], bboxMax[label], [i / count for i in centroid[label]]))
+    return output
+
+
+def _getShellSignatures_numpy(points, vertexLabels, numFaces, numShells):
+    points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+    used = vertexLabels >= 0
+    labels = vertexLabels[used]
+    points = points[used]
+
+    #sort the vertices by shell - every shell becomes one contiguous run reduced with reduceat
+    order = numpy.argsort(labels, kind="stable")
+    labels = labels[order]
+    points = points[order]
+
+    numVerts = numpy.bincount(labels, minlength=numShells)
+    bboxMin = numpy.zeros((numShells, 3))
+    bboxMax = numpy.zeros((numShells, 3))
+    centroid = numpy.zeros((numShells, 3))
+
+    present = numpy.nonzero(numVerts)[0]
+    if len(present):
+        starts = numpy.searchsorted(labels, present)
+        bboxMin[present] = numpy.minimum.reduceat(points, starts, axis=0)
+        bboxMax[present] = numpy.maximum.reduceat(points, starts, axis=0)
+        centroid[present] = numpy.add.reduceat(points, starts, axis=0) / numVerts[present][:, None]
+
+    bboxMin = bboxMin.tolist()
+    bboxMax = bboxMax.tolist()
+    centroid = centroid.tolist()
+    numVerts = numVerts.tolist()
+    return [makeSignature(numFaces[i], numVerts[i], bboxMin[i], bboxMax[i], centroid[i]) for i in range(numShells)]
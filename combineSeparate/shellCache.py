@@ -0,0 +1,136 @@
+import hashlib
+import os
+from array import array
+from collections import OrderedDict
+
+from combineSeparate.meshShells import groupShells
+from combineSeparate.shellIndex import makeSignature
+from combineSeparate import sessionFile
+from combineSeparate.sessionFile import toBytes
+
+
+"""
+content-hashed cache of the shell analysis (labels, shells, signatures) of a mesh
+    key   := md5 of topology + positions, any edit of the mesh gives a new key
+    entry := (faceLabels, face index arrays per shell, shell signatures) - the pipeline.analyseShells result
+
+in-memory LRU bounded by maxEntries + optional disk tier (one sessionFile per key in directory)
+an evicted entry stays on disk, a disk hit is promoted back to memory
+entries are shared - callers must not modify them
+"""
+
+
+VERSION = 1 #bump when the analysis changes, old disk entries are then ignored
+
+
+def meshKey(faceCounts, faceConnects, points):
+    """
+        @param[in] faceCounts, faceConnects: MFnMesh.getVertices layout
+        @param[in] points: flat positions
+        @returns: hex digest identifying the topology and the positions of a mesh
+    """
+    md5 = hashlib.md5()
+    md5.update(toBytes([VERSION, len(faceCounts), len(faceConnects), len(points)], "i"))
+    md5.update(toBytes(faceCounts, "i"))
+    md5.update(toBytes(faceConnects, "i"))
+    md5.update(toBytes(points, "d"))
+    return md5.hexdigest()
+
+
+class shellCache():
+    def __init__(self, maxEntries=64, directory=None):
+        """
+            @param[in] maxEntries: meshes kept in memory, the least recently used one is evicted first
+            @param[in] directory: folder of the disk tier, None keeps the cache in memory only
+        """
+        self.maxEntries = maxEntries
+        self.directory = directory
+        self.entries = OrderedDict() #{key: entry}, most recently used last
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries or (self.directory is not None and os.path.exists(self.getPath(key)))
+
+    def getPath(self, key):
+        return os.path.join(self.directory, key + ".csshells")
+
+    def get(self, key):
+        """
+            @returns: cached entry or None
+        """
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.entries[key] = entry
+            self.hits += 1
+            return entry
+
+        entry = self.readEntry(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.diskHits += 1
+        self.setEntry(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """
+            @param[in] entry: (faceLabels, shells, signatures)
+        """
+        self.setEntry(key, entry)
+        self.writeEntry(key, entry)
+
+    def setEntry(self, key, entry):
+        self.entries.pop(key, None)
+        self.entries[key] = entry
+        while len(self.entries) > max(self.maxEntries, 0):
+            self.entries.popitem(last=False)
+
+    def writeEntry(self, key, entry):
+        if self.directory is None:
+            return
+        faceLabels, shells, signatures = entry
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        path = self.getPath(key)
+        tmpPath = "%s.%d.tmp" % (path, os.getpid())
+        sessionFile.saveSession(tmpPath, {"version": VERSION, "numShells": len(shells), "signatures": signatures}, {"faceLabels": ("i", faceLabels)})
+        try:
+            os.rename(tmpPath, path) #readers never see a partial file
+        except OSError: #windows does not replace, the existing entry is the same content
+            os.remove(tmpPath)
+
+    def readEntry(self, key):
+        if self.directory is None:
+            return None
+        path = self.getPath(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            session = sessionFile.loadSession(path, (VERSION,)) #ValueError for an entry of another version
+            try:
+                faceLabels = array('i', session.getArray("faceLabels")) #copy - the file can be replaced later
+                signatures = [makeSignature(*i) for i in session.header["signatures"]]
+                shells = groupShells(faceLabels, session.header["numShells"])
+            finally:
+                session.close()
+        except (ValueError, KeyError, IOError, OSError): #damaged entry - analyse again
+            return None
+        return faceLabels, shells, signatures
+
+    def clear(self, disk=False):
+        """
+            @param[in] disk: True to delete the disk tier as well
+        """
+        self.entries.clear()
+        if disk and self.directory is not None and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".csshells"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def getStats(self):
+        return {"entries": len(self.entries), "hits": self.hits, "diskHits": self.diskHits, "misses": self.misses}
@@ -0,0 +1,118 @@
+import math
+
+
+"""
+shell fingerprint index
+match shells of the original objects to shells of the combined object in linear time
+
+signature = (numFaces, numVerts, (minX, minY, minZ), (maxX, maxY, maxZ), (cX, cY, cZ))
+    numFaces, numVerts := shell topology counts
+    min, max := world space bounding box
+    c := average position of the shell vertices, separates shells with equal bboxes (mirrored parts)
+"""
+
+
+def makeSignature(numFaces, numVerts, bboxMin, bboxMax, centroid):
+    """
+        @returns: shell signature tuple (see module doc)
+    """
+    return (int(numFaces), int(numVerts), tuple(bboxMin), tuple(bboxMax), tuple(centroid))
+
+
+class shellIndex():
+    def __init__(self, signatures, tolerance=1e-4):
+        """
+            @param[in] signatures: signatures of the shells to index (combined object), their order defines the returned indices
+            @type signatures: list of signature tuples
+            @param[in] tolerance: max difference of a bbox coordinate for two shells considered the same
+            @type tolerance: float
+        """
+        self.tolerance = float(tolerance)
+        self.signatures = list(signatures)
+        self.claimed = [0] * len(self.signatures)
+
+        self.exact = {} #{fingerprint: [index, ...]} - counts + quantized bbox
+        self.corners = {} #{(numFaces, numVerts, quantized min): [index, ...]} - tolerance aware fallback
+
+        for idx, signature in enumerate(self.signatures):
+            self.exact.setdefault(self.getFingerprint(signature), []).append(idx)
+            self.corners.setdefault(self.getCornerKey(signature, self.quantize(signature[2])), []).append(idx)
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def quantize(self, point):
+        """
+            @param[in] point: (x, y, z)
+            @returns: point snapped to the tolerance grid
+        """
+        tolerance = self.tolerance
+        return (int(math.floor(point[0] / tolerance + 0.5)), int(math.floor(point[1] / tolerance + 0.5)), int(math.floor(point[2] / tolerance + 0.5)))
+
+    def getFingerprint(self, signature):
+        return (signature[0], signature[1], self.quantize(signature[2]), self.quantize(signature[3]))
+
+    def getCornerKey(self, signature, cell):
+        return (signature[0], signature[1], cell)
+
+    def isSimilar(self, a, b):
+        """
+            @returns: True if both signatures have the same counts and bboxes within the tolerance
+        """
+        if a[0] != b[0] or a[1] != b[1]:
+            return False
+        tolerance = self.tolerance
+        for i in (2, 3):
+            for axis in range(3):
+                if abs(a[i][axis] - b[i][axis]) > tolerance:
+                    return False
+        return True
+
+    def getCandidates(self, signature):
+        """
+            @param[in] signature: signature of a shell to look up (original object)
+            @returns: indices of unclaimed similar shells
+        """
+        output = [idx for idx in self.exact.get(self.getFingerprint(signature), []) if not self.claimed[idx]]
+        if output:
+            return output
+
+        #a coordinate close to a grid boundary may snap into the neighbour cell - probe the cells around the min corner
+        cx, cy, cz = self.quantize(signature[2])
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for k in (cz - 1, cz, cz + 1):
+                    for idx in self.corners.get(self.getCornerKey(signature, (i, j, k)), []):
+                        if not self.claimed[idx] and self.isSimilar(signature, self.signatures[idx]):
+                            output.append(idx)
+        return output
+
+    def find(self, signature):
+        """
+            @param[in] signature: signature of a shell to look up
+            @returns: index of the best unclaimed shell or -1, it is not claimed
+
+            Shells with equal bboxes and counts are tie-broken by the distance between their vertex centroids,
+            then by the lowest index, so the result never depends on dict ordering.
+        """
+        best = None
+        centroid = signature[4]
+        for idx in self.getCandidates(signature):
+            other = self.signatures[idx][4]
+            distance = (other[0] - centroid[0]) ** 2 + (other[1] - centroid[1]) ** 2 + (other[2] - centroid[2]) ** 2
+            key = (distance, idx)
+            if best is None or key < best:
+                best = key
+        if best is None:
+            return -1
+        return best[1]
+
+    def claim(self, signature):
+        """
+            @param[in] signature: signature of a shell to look up
+            @returns: index of the matched shell or -1, the matched shell can not be claimed again
+        """
+        idx = self.find(signature)
+        if idx != -1:
+            self.claimed[idx] = 1
+        return idx
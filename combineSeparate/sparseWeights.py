@@ -0,0 +1,252 @@
+from array import array
+
+from combineSeparate.arrayStore import INT64
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""
+sparse skin weights
+CSR layout - only the non zero weights of each vertex are stored
+    indptr  := vertex i owns the entries [indptr[i], indptr[i + 1])
+    indices := influence (column) of each entry, ascending inside a vertex
+    values  := weight of each entry
+"""
+
+
+def _gatherEntries(indptr, rows):
+    """
+        @param[in] indptr: CSR row pointers (numpy)
+        @param[in] rows: numpy array of vertex indices, -1 entries are skipped
+        @returns: (entry indices, output row of each entry) as numpy arrays
+    """
+    rowIds = numpy.arange(len(rows))
+    valid = rows >= 0
+    rows = rows[valid]
+    rowIds = rowIds[valid]
+
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+
+    #entry k of a row = start of the row + its position inside the row
+    offsets = numpy.cumsum(lengths) - lengths
+    entries = numpy.repeat(starts - offsets, lengths) + numpy.arange(total)
+    return entries, numpy.repeat(rowIds, lengths)
+
+
+class sparseWeights():
+    def __init__(self, numInfluences, indptr, indices, values):
+        """
+            @param[in] numInfluences: number of influences (dense columns)
+            @param[in] indptr, indices, values: CSR arrays (see module doc)
+        """
+        self.numInfluences = int(numInfluences)
+        if numpy is not None:
+            self.indptr = numpy.asarray(indptr, dtype=numpy.int64)
+            self.indices = numpy.asarray(indices, dtype=numpy.int32)
+            self.values = numpy.asarray(values, dtype=numpy.float64)
+        else:
+            self.indptr = array(INT64, indptr)
+            self.indices = array('i', indices)
+            self.values = array('d', values)
+
+    @classmethod
+    def fromDense(cls, values, numInfluences, threshold=0.0):
+        """
+            @param[in] values: flat weights in MFnSkinCluster.getWeights layout (vertex major)
+            @param[in] numInfluences: number of influences
+            @param[in] threshold: weights <= threshold are dropped
+            @returns: sparseWeights
+        """
+        if numpy is not None:
+            dense = numpy.asarray(values, dtype=numpy.float64).reshape(-1, max(numInfluences, 1))
+            mask = dense > threshold
+            indptr = numpy.zeros(len(dense) + 1, dtype=numpy.int64)
+            numpy.cumsum(mask.sum(axis=1), out=indptr[1:])
+            return cls(numInfluences, indptr, numpy.nonzero(mask)[1], dense[mask])
+
+        indptr = [0]
+        indices = []
+        weights = []
+        for start in range(0, len(values), numInfluences):
+            for column in range(numInfluences):
+                weight = values[start + column]
+                if weight > threshold:
+                    indices.append(column)
+                    weights.append(weight)
+            indptr.append(len(indices))
+        return cls(numInfluences, indptr, indices, weights)
+
+    @classmethod
+    def fromChunks(cls, chunks, numInfluences, threshold=0.0):
+        """
+            @param[in] chunks: iterable of flat dense weights of consecutive vertex chunks (vertex major)
+            @param[in] numInfluences: number of influences
+            @param[in] threshold: weights <= threshold are dropped
+            @returns: sparseWeights of all chunks - only one dense chunk is alive at a time
+        """
+        indptr = [numpy.zeros(1, dtype=numpy.int64)] if numpy is not None else array(INT64, [0])
+        indices = [] if numpy is not None else array('i')
+        values = [] if numpy is not None else array('d')
+        offset = 0
+        for chunk in chunks:
+            part = cls.fromDense(chunk, numInfluences, threshold)
+            if numpy is not None:
+                indptr.append(part.indptr[1:] + offset)
+                indices.append(part.indices)
+                values.append(part.values)
+            else:
+                indptr.extend([i + offset for i in part.indptr[1:]])
+                indices.extend(part.indices)
+                values.extend(part.values)
+            offset += len(part.values)
+
+        if numpy is not None:
+            indptr = numpy.concatenate(indptr)
+            indices = numpy.concatenate(indices) if indices else numpy.zeros(0, dtype=numpy.int32)
+            values = numpy.concatenate(values) if values else numpy.zeros(0)
+        return cls(numInfluences, indptr, indices, values)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def getRow(self, i):
+        """
+            @returns: (influence indices, weights) of vertex i
+        """
+        start = self.indptr[i]
+        end = self.indptr[i + 1]
+        return self.indices[start:end], self.values[start:end]
+
+    def getRows(self, rows):
+        """
+            @param[in] rows: vertex indices of the output rows, -1 gives an empty row
+            @returns: new sparseWeights holding the passed in rows in order
+        """
+        if numpy is not None:
+            rows = numpy.asarray(rows, dtype=numpy.int64)
+            entries, rowIds = _gatherEntries(self.indptr, rows)
+            indptr = numpy.zeros(len(rows) + 1, dtype=numpy.int64)
+            numpy.cumsum(numpy.bincount(rowIds, minlength=len(rows)), out=indptr[1:])
+            return sparseWeights(self.numInfluences, indptr, self.indices[entries], self.values[entries])
+
+        indptr = [0]
+        indices = []
+        values = []
+        for row in rows:
+            if row >= 0:
+                indices.extend(self.indices[self.indptr[row]:self.indptr[row + 1]])
+                values.extend(self.values[self.indptr[row]:self.indptr[row + 1]])
+            indptr.append(len(indices))
+        return sparseWeights(self.numInfluences, indptr, indices, values)
+
+    def getUsedInfluences(self, rows=None):
+        """
+            @param[in] rows: vertex indices, -1 entries are skipped, None for all vertices
+            @returns: ascending list of influences with a non zero weight on any of the vertices
+        """
+        if rows is None:
+            rows = range(len(self))
+        if numpy is not None:
+            entries, rowIds = _gatherEntries(self.indptr, numpy.asarray(rows, dtype=numpy.int64))
+            return numpy.unique(self.indices[entries]).tolist()
+
+        used = set()
+        for row in rows:
+            if row >= 0:
+                used.update(self.indices[self.indptr[row]:self.indptr[row + 1]])
+        return sorted(used)
+
+    def toDense(self, rows=None, columns=None):
+        """
+            @param[in] rows: vertex indices of the output rows, -1 gives a zero row, None for all vertices
+            @param[in] columns: influences of the output columns in output order, None for all influences
+            @returns: flat row-major weights (numpy array or list) - MFnSkinCluster.setWeights layout
+        """
+        if rows is None:
+            rows = range(len(self))
+        if columns is None:
+            columns = range(self.numInfluences)
+
+        if numpy is not None:
+            rows = numpy.asarray(rows, dtype=numpy.int64)
+            columnMap = numpy.full(max(self.numInfluences, 1), -1, dtype=numpy.int64)
+            columnMap[numpy.asarray(columns, dtype=numpy.int64)] = numpy.arange(len(columns))
+
+            output = numpy.zeros((len(rows), len(columns)))
+            entries, rowIds = _gatherEntries(self.indptr, rows)
+            outColumns = columnMap[self.indices[entries]]
+            keep = outColumns >= 0
+            output[rowIds[keep], outColumns[keep]] = self.values[entries[keep]]
+            return output.reshape(-1)
+
+        columnMap = dict((column, i) for i, column in enumerate(columns))
+        numColumns = len(columnMap)
+        output = [0.0] * (len(rows) * numColumns)
+        for i, row in enumerate(rows):
+            if row < 0:
+                continue
+            for k in range(self.indptr[row], self.indptr[row + 1]):
+                column = columnMap.get(self.indices[k])
+                if column is not None:
+                    output[i * numColumns + column] = self.values[k]
+        return output
+
+    def prune(self, maxInfluences):
+        """
+            @param[in] maxInfluences: max number of influences per vertex
+            @returns: new sparseWeights keeping the largest weights of each vertex, rows renormalized to their previous sum
+        """
+        maxInfluences = int(maxInfluences)
+
+        if numpy is not None:
+            lengths = numpy.diff(self.indptr)
+            rowIds = numpy.repeat(numpy.arange(len(self)), lengths)
+            totals = numpy.bincount(rowIds, weights=self.values, minlength=len(self))
+
+            #rank the entries of each row by weight (largest first), ties keep the lower influence
+            order = numpy.lexsort((self.indices, -self.values, rowIds))
+            rank = numpy.arange(len(order)) - numpy.repeat(self.indptr[:-1], lengths)
+            keep = numpy.sort(order[rank < maxInfluences]) #back to row / influence order
+
+            rowIds = rowIds[keep]
+            values = self.values[keep]
+            sums = numpy.bincount(rowIds, weights=values, minlength=len(self))
+            scale = numpy.divide(totals, sums, out=numpy.zeros_like(totals), where=sums > 0)
+            values = values * scale[rowIds]
+
+            indptr = numpy.zeros(len(self) + 1, dtype=numpy.int64)
+            numpy.cumsum(numpy.bincount(rowIds, minlength=len(self)), out=indptr[1:])
+            return sparseWeights(self.numInfluences, indptr, self.indices[keep], values)
+
+        indptr = [0]
+        indices = []
+        values = []
+        for row in range(len(self)):
+            start = self.indptr[row]
+            end = self.indptr[row + 1]
+            entries = [(-self.values[k], self.indices[k], self.values[k]) for k in range(start, end)]
+            total = sum([i[2] for i in entries])
+            entries = sorted(sorted(entries)[:maxInfluences], key=lambda i: i[1])
+            kept = sum([i[2] for i in entries])
+            scale = total / kept if kept > 0 else 0.0
+            for entry in entries:
+                indices.append(entry[1])
+                values.append(entry[2] * scale)
+            indptr.append(len(indices))
+        return sparseWeights(self.numInfluences, indptr, indices, values)
+
+    def nbytes(self):
+        output = 0
+        for buffer in (self.indptr, self.indices, self.values):
+            if numpy is not None and isinstance(buffer, numpy.ndarray):
+                output += int(buffer.nbytes)
+            else:
+                output += buffer.itemsize * len(buffer)
+        return output
@@ -0,0 +1,102 @@
+import math
+
+
+"""
+quantized spatial hash
+resolve a point to the index of a coincident point in amortized O(1)
+"""
+
+
+class pointHash():
+    def __init__(self, points, tolerance=1e-5):
+        """
+            @param[in] points: positions to index, their order defines the returned indices
+            @type points: list of (x, y, z)
+            @param[in] tolerance: max distance between two points that are considered coincident
+            @type tolerance: float
+        """
+        self.tolerance = float(tolerance)
+        self.cellSize = self.tolerance * 2.0 #a point within tolerance is always in the same or in a neighbour cell
+        self.points = []
+        self.claimed = []
+        self.cells = {} #{(i, j, k): [index, index, ...]} indices are ascending inside each cell
+
+        for idx, point in enumerate(points):
+            self.points.append((point[0], point[1], point[2]))
+            self.claimed.append(0)
+            self.cells.setdefault(self.getCell(point), []).append(idx)
+
+    def __len__(self):
+        return len(self.points)
+
+    def getCell(self, point):
+        """
+            @param[in] point: (x, y, z)
+            @returns: integer grid cell the point belongs to
+        """
+        size = self.cellSize
+        return (int(math.floor(point[0] / size)), int(math.floor(point[1] / size)), int(math.floor(point[2] / size)))
+
+    def getCandidates(self, point):
+        """
+            @param[in] point: (x, y, z)
+            @returns: list of (distance, index) for every indexed point within the tolerance, claimed ones included
+        """
+        output = []
+        cx, cy, cz = self.getCell(point)
+        tolerance = self.tolerance
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for k in (cz - 1, cz, cz + 1):
+                    cell = self.cells.get((i, j, k))
+                    if not cell:
+                        continue
+                    for idx in cell:
+                        p = self.points[idx]
+                        dx = abs(p[0] - point[0])
+                        dy = abs(p[1] - point[1])
+                        dz = abs(p[2] - point[2])
+                        if dx <= tolerance and dy <= tolerance and dz <= tolerance:
+                            output.append((math.sqrt(dx * dx + dy * dy + dz * dz), idx))
+        return output
+
+    def find(self, point, hint=0):
+        """
+            @param[in] point: (x, y, z)
+            @param[in] hint: index the caller expects the match to be at or after (previous match + 1)
+            @returns: index of the closest unclaimed point or -1, it is not claimed
+
+            Coincident points are disambiguated deterministically:
+                1 the closest point wins
+                2 among equally close points the first one at or after the hint wins
+                3 otherwise the lowest index wins
+            Separation keeps the relative vertex order of the combined mesh, so walking a separated mesh
+            with hint = previous match + 1 keeps coincident vertices on their own shell.
+        """
+        best = None
+        for distance, idx in self.getCandidates(point):
+            if self.claimed[idx]:
+                continue
+            key = (distance, 0 if idx >= hint else 1, idx)
+            if best is None or key < best:
+                best = key
+        if best is None:
+            return -1
+        return best[2]
+
+    def claim(self, point, hint=0):
+        """
+            @param[in] point: (x, y, z)
+            @param[in] hint: see find()
+            @returns: index of the matched point or -1, the matched point can not be claimed again
+        """
+        idx = self.find(point, hint)
+        if idx != -1:
+            self.claimed[idx] = 1
+        return idx
+
+    def reset(self):
+        """
+            @release all claimed points
+        """
+        self.claimed = [0] * len(self.points)
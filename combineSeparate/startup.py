@@ -0,0 +1,102 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+
+"""
+startup cost of the tool
+    lazyModule  := module imported on its first attribute access - importing combineSeparate.main imports no Maya module
+    probeImport := seconds to import a module in a fresh interpreter + the Maya modules the import pulled in
+    getReport   := import seconds of the lazy modules resolved so far + source / call seconds of the MEL procedures
+    python -m combineSeparate.startup [module]      (mayapy -m ... for the Maya side)
+"""
+
+
+_lazyModules = [] #every lazyModule created, see getReport
+
+
+class lazyModule():
+    def __init__(self, name):
+        """
+            @param[in] name: full module name ("maya.cmds")
+        """
+        self._name = name
+        self._module = None
+        self._error = None #ImportError of the first attempt - not retried
+        self._seconds = None #import seconds of the first access
+        _lazyModules.append(self)
+
+    def _load(self):
+        if self._module is None:
+            if self._error is not None:
+                raise self._error
+            start = timeit.default_timer()
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError as e:
+                self._error = e
+                raise
+            finally:
+                self._seconds = timeit.default_timer() - start
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def isImportable(self):
+        """
+            @returns: True if the module imports (imports it)
+        """
+        try:
+            self._load()
+        except ImportError:
+            return False
+        return True
+
+    def isLoaded(self):
+        return self._module is not None
+
+
+def getReport():
+    """
+        @returns: {"modules": {name: import seconds, None while not imported}, "procedures": melRegistry.getStats()}
+    """
+    from combineSeparate.tools import melRegistry
+    return {
+        "modules": dict((i._name, i._seconds if i._module is not None else None) for i in _lazyModules),
+        "procedures": melRegistry.getStats(),
+    }
+
+
+def probeImport(module="combineSeparate.main", executable=None):
+    """
+        @param[in] module: module to import
+        @param[in] executable: python interpreter, None for this one (mayapy to include maya.standalone)
+        @returns: {"module", "seconds", "maya": [Maya modules in sys.modules after the import]} measured in a fresh interpreter
+    """
+    code = "; ".join([
+        "import json, sys, timeit",
+        "start = timeit.default_timer()",
+        "import %s" % module,
+        "seconds = timeit.default_timer() - start",
+        "sys.stdout.write(json.dumps({'module': %r, 'seconds': seconds, 'maya': sorted([i for i in sys.modules if i.split('.')[0] == 'maya' and sys.modules[i] is not None])}))" % module,
+    ])
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) #folder holding the combineSeparate package
+    env["PYTHONPATH"] = os.pathsep.join([root] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    output = subprocess.check_output([executable or sys.executable, "-c", code], env=env)
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    result = probeImport(argv[0] if argv else "combineSeparate.main")
+    sys.stdout.write(json.dumps(result, indent=2, sort_keys=True) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,20 @@
 #attach surveying device to a mesh
-import maya.cmds as cmds
-import maya.mel as mel
 import os
+import sys
+from combineSeparate.startup import lazyModule
+from combineSeparate.tools import melRegistry
+from combineSeparate import profiler
+cmds = lazyModule("maya.cmds")
+profiler.registerModule(sys.modules[__name__], "cmds", "commands") #undo chunk commands, counted while profiling
 dir = str(os.path.dirname(__file__))
+melRegistry.register("duplicateSeparate", dir+"/duplicateSeparate.mel") #sourced once, on the first call
 
 def options():
 	print 
 
 def runDuplicateSeparate():
     cmds.undoInfo(ock=1)
-    scriptFile = open(dir+"/duplicateSeparate.mel", 'r')
-    scriptIn =  scriptFile.read()
-    result = mel.eval(scriptIn)
+    result = melRegistry.call("duplicateSeparate")
     cmds.undoInfo(cck=1)
 
     return result
\ No newline at end of file
@@ -1,17 +1,20 @@
 #attach surveying device to a mesh
-import maya.cmds as cmds
-import maya.mel as mel
 import os
+import sys
+from combineSeparate.startup import lazyModule
+from combineSeparate.tools import melRegistry
+from combineSeparate import profiler
+cmds = lazyModule("maya.cmds")
+profiler.registerModule(sys.modules[__name__], "cmds", "commands") #undo chunk commands, counted while profiling
 dir = str(os.path.dirname(__file__))
+melRegistry.register("flattenCombineDontMerge", dir+"/flattenCombineDontMerge.mel") #sourced once, on the first call
 
 def options():
 	print 
 
 def runFlattenCombine():
     cmds.undoInfo(ock=1)
-    scriptFile = open(dir+"/flattenCombineDontMerge.mel", 'r')
-    scriptIn =  scriptFile.read()
-    out = mel.eval(scriptIn)
+    out = melRegistry.call("flattenCombineDontMerge")
     cmds.undoInfo(cck=1)
 
     return out
\ No newline at end of file
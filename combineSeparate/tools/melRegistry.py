@@ -0,0 +1,108 @@
+import os
+import sys
+import timeit
+
+from combineSeparate.startup import lazyModule
+from combineSeparate import profiler
+
+mel = lazyModule("maya.mel")
+
+#count the source / call / exists round-trips while profiling (profiler.enable) - they belong to the stage running the procedure
+profiler.registerModule(sys.modules[__name__], "mel", "commands")
+
+
+"""
+MEL procedures sourced once per session, then called by name
+    register(name, path) := global proc name is defined in the MEL file at path
+    call(name)           := mel.eval("name()") - the file is sourced before the first call, and again when its size or
+                            modification time changed or Maya no longer knows the procedure (the call is then retried once)
+"""
+
+
+class melProcedure():
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.stamp = None #(mtime, size) of the file when it was sourced
+        self.sources = 0
+        self.sourceSeconds = 0.0
+        self.calls = 0
+        self.callSeconds = 0.0
+        self.firstCallSeconds = None #source + first call
+
+    def getStamp(self):
+        info = os.stat(self.path)
+        return info.st_mtime, info.st_size
+
+    def source(self):
+        start = timeit.default_timer()
+        stamp = self.getStamp()
+        mel.eval('source "%s"' % self.path.replace("\\", "/"))
+        self.stamp = stamp
+        self.sources += 1
+        self.sourceSeconds += timeit.default_timer() - start
+
+    def call(self, *args):
+        """
+            @param[in] args: MEL arguments, already formatted ('"pCube1"', '1')
+            @returns: result of the procedure
+        """
+        start = timeit.default_timer()
+        if self.stamp is None or self.getStamp() != self.stamp:
+            self.source() #first call or edited file
+
+        command = "%s(%s)" % (self.name, ", ".join(args))
+        try:
+            result = mel.eval(command)
+        except RuntimeError:
+            if mel.eval('exists "%s"' % self.name):
+                raise #the procedure itself failed
+            self.source() #lost by Maya - define it again
+            result = mel.eval(command)
+
+        seconds = timeit.default_timer() - start
+        if self.firstCallSeconds is None:
+            self.firstCallSeconds = seconds
+        self.calls += 1
+        self.callSeconds += seconds
+        return result
+
+    def getStats(self):
+        return {
+            "path": self.path,
+            "sources": self.sources,
+            "sourceSeconds": self.sourceSeconds,
+            "calls": self.calls,
+            "callSeconds": self.callSeconds,
+            "firstCallSeconds": self.firstCallSeconds,
+        }
+
+
+PROCEDURES = {} #{procedure name: melProcedure}
+
+
+def register(name, path):
+    """
+        @param[in] name: global proc defined by the file
+        @param[in] path: MEL file, sourced on the first call
+    """
+    procedure = PROCEDURES.get(name)
+    if procedure is None or procedure.path != path:
+        procedure = PROCEDURES[name] = melProcedure(name, path)
+    return procedure
+
+
+def call(name, *args):
+    return PROCEDURES[name].call(*args)
+
+
+def reset():
+    """
+        @source every file again on its next call
+    """
+    for procedure in PROCEDURES.values():
+        procedure.stamp = None
+
+
+def getStats():
+    return dict((name, procedure.getStats()) for name, procedure in PROCEDURES.items())
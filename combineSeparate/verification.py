@@ -0,0 +1,264 @@
+import math
+import random
+
+from combineSeparate.sparseWeights import sparseWeights
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""
+round-trip verification of the restored skinning
+the influences are posed at sampled poses and both sides are deformed with linear blend skinning
+    combined  := captured combined points + captured combined weights, gathered to the separated vertices by the vertex map
+    separated := rest points + weights read back from every separated mesh and its new skinCluster
+per separated vertex: rest distance and the max skinned distance over all poses
+reported per object (max / mean / worst vertex) and per vertex range, so a bad shell or a bad influence remap stands out
+
+skinned positions are computed in batches - per chunk of vertices the blended matrices of all poses come from
+one dense weights x matrices product, then are applied to the points with one einsum
+"""
+
+
+def getBounds(points):
+    """
+        @param[in] points: flat positions
+        @returns: (bbox center, bbox diagonal length)
+    """
+    if numpy is not None:
+        points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+        if not len(points):
+            return (0.0, 0.0, 0.0), 1.0
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+    else:
+        if not len(points):
+            return (0.0, 0.0, 0.0), 1.0
+        low = [min(points[k::3]) for k in range(3)]
+        high = [max(points[k::3]) for k in range(3)]
+    center = tuple([(float(low[k]) + float(high[k])) * 0.5 for k in range(3)])
+    size = math.sqrt(sum([(float(high[k]) - float(low[k])) ** 2 for k in range(3)]))
+    return center, size or 1.0
+
+
+def samplePoses(numInfluences, numPoses=8, center=(0.0, 0.0, 0.0), size=1.0, maxAngle=45.0, seed=0):
+    """
+        @param[in] center, size: pivot and scale of the sampled motion (bbox center / diagonal of the mesh)
+        @param[in] maxAngle: max rotation in degrees of an influence
+        @returns: skinning matrices [pose][influence] as 3 x 4 row-major lists (rotation about center + translation)
+    """
+    rnd = random.Random(seed)
+    poses = []
+    for p in range(numPoses):
+        pose = []
+        for i in range(numInfluences):
+            axis = [rnd.gauss(0.0, 1.0) for k in range(3)]
+            length = math.sqrt(sum([a * a for a in axis])) or 1.0
+            x, y, z = [a / length for a in axis]
+            angle = math.radians(rnd.uniform(-maxAngle, maxAngle))
+            c = math.cos(angle)
+            s = math.sin(angle)
+            t = 1.0 - c
+            rotation = [
+                [t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+                [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+                [t * x * z - s * y, t * y * z + s * x, t * z * z + c],
+            ]
+            offset = [rnd.uniform(-0.25, 0.25) * size for k in range(3)]
+            matrix = []
+            for r in range(3):
+                #rotate about the center: R * (p - center) + center + offset
+                translate = center[r] + offset[r] - sum([rotation[r][k] * center[k] for k in range(3)])
+                matrix.append(rotation[r] + [translate])
+            pose.append(matrix)
+        poses.append(pose)
+    return poses
+
+
+def skinPoints(points, weights, poses, chunkSize=16384):
+    """
+        @param[in] points: flat rest positions, one vertex per row of weights
+        @param[in] weights: sparseWeights, influence columns index the pose matrices
+        @param[in] poses: samplePoses result
+        @returns: skinned positions [pose][vertex * 3 + axis] (numpy array P x V*3, or lists)
+    """
+    numVertices = len(weights)
+    if numpy is not None:
+        numPoses = len(poses)
+        matrices = numpy.asarray(poses, dtype=numpy.float64).reshape(numPoses, -1, 12) #P x I x 12
+        matrices = matrices.transpose(1, 0, 2).reshape(-1, numPoses * 12) #I x P*12 - all poses in one product
+        points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+        output = numpy.zeros((numPoses, numVertices, 3))
+        for start in range(0, numVertices, chunkSize):
+            stop = min(start + chunkSize, numVertices)
+
+            #blended matrix per vertex and pose = weights x influence matrices (one BLAS product per chunk)
+            dense = weights.toDense(range(start, stop)).reshape(stop - start, -1)
+            blended = numpy.dot(dense, matrices[:dense.shape[1]]).reshape(stop - start, numPoses, 3, 4)
+
+            homogeneous = numpy.concatenate([points[start:stop], numpy.ones((stop - start, 1))], axis=1)
+            output[:, start:stop] = numpy.einsum("vpij,vj->pvi", blended, homogeneous)
+        return output.reshape(numPoses, -1)
+
+    output = []
+    for pose in poses:
+        positions = [0.0] * (numVertices * 3)
+        for v in range(numVertices):
+            x, y, z = points[v * 3:v * 3 + 3]
+            for k in range(weights.indptr[v], weights.indptr[v + 1]):
+                matrix = pose[weights.indices[k]]
+                w = weights.values[k]
+                for r in range(3):
+                    row = matrix[r]
+                    positions[v * 3 + r] += w * (row[0] * x + row[1] * y + row[2] * z + row[3])
+        output.append(positions)
+    return output
+
+
+def toInfluenceColumns(weights, columns, numInfluences):
+    """
+        @param[in] weights: sparseWeights of a separated mesh, columns in the order of its skinCluster
+        @param[in] columns: column of the combined influence list per separated column
+        @returns: sparseWeights with the combined influence columns
+    """
+    if numpy is not None:
+        indices = numpy.asarray(columns, dtype=numpy.int64)[weights.indices]
+    else:
+        indices = [columns[i] for i in weights.indices]
+    return sparseWeights(numInfluences, weights.indptr, indices, weights.values)
+
+
+def _distances(a, b):
+    """
+        @returns: per vertex distance between the flat positions a and b
+    """
+    if numpy is not None:
+        return numpy.sqrt(((numpy.asarray(a).reshape(-1, 3) - numpy.asarray(b).reshape(-1, 3)) ** 2).sum(axis=1))
+    return [math.sqrt(sum([(a[v * 3 + k] - b[v * 3 + k]) ** 2 for k in range(3)])) for v in range(len(a) // 3)]
+
+
+def _gatherPoints(values, vertexMap):
+    if numpy is not None:
+        values = numpy.asarray(values).reshape(-1, 3)
+        return values[numpy.maximum(numpy.asarray(vertexMap, dtype=numpy.int64), 0)].reshape(-1)
+    output = []
+    for v in vertexMap:
+        output.extend(values[max(v, 0) * 3:max(v, 0) * 3 + 3])
+    return output
+
+
+def _rangeStats(errors, valid, rangeSize):
+    """
+        @param[in] errors: per vertex error
+        @param[in] valid: per vertex True when the vertex is matched (counted)
+        @returns: (max, mean, index of the max or -1, [(start, stop, max, mean, count)] per range of rangeSize vertices)
+    """
+    numVertices = len(errors)
+    if numpy is not None:
+        errors = numpy.asarray(errors, dtype=numpy.float64)
+        valid = numpy.asarray(valid, dtype=bool)
+        if not numVertices:
+            return 0.0, 0.0, -1, []
+        masked = numpy.where(valid, errors, -1.0)
+        starts = numpy.arange(0, numVertices, rangeSize)
+        counts = numpy.add.reduceat(valid.astype(numpy.int64), starts)
+        maxima = numpy.maximum(numpy.maximum.reduceat(masked, starts), 0.0)
+        sums = numpy.add.reduceat(numpy.where(valid, errors, 0.0), starts)
+        means = numpy.divide(sums, counts, out=numpy.zeros_like(sums), where=counts > 0)
+        ranges = [(int(start), int(min(start + rangeSize, numVertices)), float(m), float(mean), int(c)) for start, m, mean, c in zip(starts, maxima, means, counts)]
+        count = int(counts.sum())
+        worst = int(numpy.argmax(masked)) if count else -1
+        return (float(maxima.max()), float(sums.sum() / count) if count else 0.0, worst, ranges)
+
+    ranges = []
+    worst = -1
+    total = 0.0
+    count = 0
+    for start in range(0, numVertices, rangeSize):
+        stop = min(start + rangeSize, numVertices)
+        rangeMax = 0.0
+        rangeSum = 0.0
+        rangeCount = 0
+        for i in range(start, stop):
+            if not valid[i]:
+                continue
+            rangeMax = max(rangeMax, errors[i])
+            rangeSum += errors[i]
+            rangeCount += 1
+            if worst == -1 or errors[i] > errors[worst]:
+                worst = i
+        ranges.append((start, stop, rangeMax, rangeSum / rangeCount if rangeCount else 0.0, rangeCount))
+        total += rangeSum
+        count += rangeCount
+    return (errors[worst] if worst != -1 else 0.0), (total / count if count else 0.0), worst, ranges
+
+
+def verifySkinning(combinedPoints, combinedWeights, vertexMaps, separated, poses, rangeSize=1024, tolerance=1e-4):
+    """
+        @param[in] combinedPoints: flat rest positions of the combined mesh
+        @param[in] combinedWeights: sparseWeights of the combined mesh
+        @param[in] vertexMaps: combined vertex index (or -1) per separated vertex, per separated mesh
+        @param[in] separated: [(mesh name, flat rest positions, sparseWeights in combined influence columns)] per separated mesh
+        @param[in] poses: samplePoses result
+        @param[in] rangeSize: vertices per reported range
+        @param[in] tolerance: error above which a vertex counts as failed
+        @returns: report dict - "maxError", "meanError", "failed", "objects": [{"mesh", "vertices", "unmatched", "maxError",
+                  "meanError", "worstVertex", "maxRestError", "failed", "ranges": [{"start", "stop", "maxError", "meanError"}]}]
+    """
+    combinedSkinned = skinPoints(combinedPoints, combinedWeights, poses)
+
+    objects = []
+    totalMax = 0.0
+    totalSum = 0.0
+    totalCount = 0
+    totalFailed = 0
+    for vertexMap, (mesh, points, weights) in zip(vertexMaps, separated):
+        if numpy is not None:
+            valid = numpy.asarray(vertexMap, dtype=numpy.int64) >= 0
+        else:
+            valid = [v >= 0 for v in vertexMap]
+        restErrors = _distances(points, _gatherPoints(combinedPoints, vertexMap))
+
+        #max distance over the poses per vertex
+        separatedSkinned = skinPoints(points, weights, poses)
+        errors = [0.0] * len(vertexMap)
+        for p in range(len(poses)):
+            poseErrors = _distances(separatedSkinned[p], _gatherPoints(combinedSkinned[p], vertexMap))
+            if numpy is not None:
+                errors = numpy.maximum(errors, poseErrors)
+            else:
+                errors = [max(a, b) for a, b in zip(errors, poseErrors)]
+
+        maxError, meanError, worst, ranges = _rangeStats(errors, valid, rangeSize)
+        numMatched = sum([c for start, stop, m, mean, c in ranges])
+        if numpy is not None:
+            failed = int(numpy.count_nonzero(valid & (numpy.asarray(errors) > tolerance)))
+        else:
+            failed = len([i for i in range(len(errors)) if valid[i] and errors[i] > tolerance])
+
+        objects.append({
+            "mesh": mesh,
+            "vertices": len(vertexMap),
+            "unmatched": len(vertexMap) - numMatched,
+            "maxError": maxError,
+            "meanError": meanError,
+            "worstVertex": worst,
+            "maxRestError": _rangeStats(restErrors, valid, max(len(vertexMap), 1))[0],
+            "failed": failed,
+            "ranges": [{"start": start, "stop": stop, "maxError": m, "meanError": mean} for start, stop, m, mean, c in ranges],
+        })
+        totalMax = max(totalMax, maxError)
+        totalSum += meanError * numMatched
+        totalCount += numMatched
+        totalFailed += failed
+
+    return {
+        "poses": len(poses),
+        "tolerance": tolerance,
+        "maxError": totalMax,
+        "meanError": totalSum / totalCount if totalCount else 0.0,
+        "failed": totalFailed,
+        "objects": objects,
+    }
@@ -0,0 +1,322 @@
+import sys
+from array import array
+
+from combineSeparate.startup import lazyModule
+from combineSeparate import profiler
+from combineSeparate.arrayStore import INT64
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+cmds = lazyModule("maya.cmds") #imported on first use
+
+
+#count the Maya commands of the channels while profiling (profiler.enable)
+profiler.registerModule(sys.modules[__name__], "cmds", "commands")
+
+
+"""
+per-vertex attribute transfer combined mesh -> separated meshes
+    vertexIndexMap := combined vertex index (or -1) per separated vertex, per separated mesh - built once by doRecreateSkinning
+    vertexChannel  := one per-vertex array of the combined mesh, itemSize values per vertex
+                      capture() reads it once from the combined mesh, apply() writes the gathered rows to a separated mesh
+    transferChannels := one bulk gather per channel and output mesh, no per vertex Maya calls
+
+channels (registered in CHANNELS, registerChannel adds new kinds)
+    array        := values passed in by the caller, results kept on the channel (tests, stand-in backend)
+    colorSet     := per-vertex colours of a colour set (RGBA)
+    blendShape   := deltas of every target of a blendShape node, rebuilt as a blendShape on each separated mesh
+    deformerMap  := paintable weight map of a weight only deformer (deltaMush, tension), rebuilt on each separated mesh
+
+the Maya channels import Maya on first use
+blendShape / deformerMap (needsHistory) capture has to run while the combined mesh still has its deformers
+"""
+
+
+class vertexIndexMap():
+    def __init__(self, meshes, vertexMaps):
+        """
+            @param[in] meshes: separated mesh names
+            @param[in] vertexMaps: combined vertex index (or -1 when unmatched) per separated vertex, per separated mesh
+        """
+        self.meshes = list(meshes)
+        if numpy is not None:
+            self.vertexMaps = [numpy.asarray(i, dtype=numpy.int64) for i in vertexMaps]
+        else:
+            self.vertexMaps = [array(INT64, i) for i in vertexMaps]
+
+    def __len__(self):
+        return len(self.meshes)
+
+    def getMap(self, i):
+        return self.vertexMaps[i]
+
+    def getUnmatched(self, i):
+        """
+            @returns: separated vertex indices of mesh i without a combined vertex
+        """
+        if numpy is not None:
+            return numpy.nonzero(self.vertexMaps[i] < 0)[0].tolist()
+        return [idx for idx, v in enumerate(self.vertexMaps[i]) if v < 0]
+
+    def gather(self, values, itemSize, i, fill=0.0):
+        """
+            @param[in] values: flat per-vertex values of the combined mesh, itemSize values per vertex
+            @param[in] i: separated mesh index
+            @param[in] fill: value of the rows of unmatched vertices
+            @returns: flat per-vertex values of separated mesh i (numpy array or list)
+        """
+        vertexMap = self.vertexMaps[i]
+        if numpy is not None:
+            rows = numpy.asarray(values).reshape(-1, itemSize)
+            if not len(rows): #nothing captured - every row is unmatched
+                return numpy.full(len(vertexMap) * itemSize, fill, dtype=numpy.float64)
+            output = rows[numpy.maximum(vertexMap, 0)]
+            output[vertexMap < 0] = fill
+            return output.reshape(-1)
+
+        output = []
+        fillRow = [fill] * itemSize
+        for v in vertexMap:
+            if v < 0:
+                output.extend(fillRow)
+            else:
+                output.extend(values[v * itemSize:(v + 1) * itemSize])
+        return output
+
+
+class vertexChannel():
+    kind = None
+    itemSize = 1
+    needsHistory = False #True when capture reads a deformer node - capture before the history of the combined mesh is deleted
+    fill = 0.0 #value of unmatched vertices
+
+    def capture(self, mesh):
+        """
+            @param[in] mesh: combined mesh
+            @returns: flat per-vertex values, itemSize per vertex
+        """
+        raise NotImplementedError
+
+    def apply(self, mesh, values):
+        """
+            @param[in] mesh: separated mesh
+            @param[in] values: flat per-vertex values of the separated mesh
+        """
+        raise NotImplementedError
+
+
+class arrayChannel(vertexChannel):
+    kind = "array"
+
+    def __init__(self, name, values, itemSize=1, fill=0.0):
+        """
+            @param[in] values: flat per-vertex values of the combined mesh
+            @results of apply are stored in self.results {mesh: values}
+        """
+        self.name = name
+        self.values = values
+        self.itemSize = itemSize
+        self.fill = fill
+        self.results = {}
+
+    def capture(self, mesh):
+        return self.values
+
+    def apply(self, mesh, values):
+        self.results[mesh] = values
+
+
+class colorSetChannel(vertexChannel):
+    kind = "colorSet"
+    itemSize = 4
+    fill = 1.0
+
+    def __init__(self, colorSet=None):
+        """
+            @param[in] colorSet: colour set name, None for the current one
+            face-vertex colours are averaged to per-vertex colours (MFnMesh.getVertexColors)
+        """
+        self.colorSet = colorSet
+
+    def capture(self, mesh):
+        from combineSeparate import api2
+        fnMesh = api2.om2.MFnMesh(api2.getDagPath(mesh, True))
+        if self.colorSet is None:
+            self.colorSet = fnMesh.currentColorSetName()
+        output = []
+        for color in fnMesh.getVertexColors(self.colorSet):
+            output.extend((color.r, color.g, color.b, color.a))
+        return output
+
+    def apply(self, mesh, values):
+        from combineSeparate import api2
+        om2 = api2.om2
+        fnMesh = om2.MFnMesh(api2.getDagPath(mesh, True))
+        if self.colorSet not in fnMesh.getColorSetNames():
+            fnMesh.createColorSet(self.colorSet, False)
+        fnMesh.setCurrentColorSetName(self.colorSet)
+        values = list(values)
+        colors = om2.MColorArray([om2.MColor(values[i:i + 4]) for i in range(0, len(values), 4)])
+        fnMesh.setVertexColors(colors, list(range(len(colors))))
+
+
+class blendShapeChannel(vertexChannel):
+    kind = "blendShape"
+    needsHistory = True
+    fill = 0.0
+
+    def __init__(self, blendShape):
+        """
+            @param[in] blendShape: blendShape node on the combined mesh
+            one row holds the (dx, dy, dz) deltas of every target - all targets move in one gather
+        """
+        self.blendShape = blendShape
+        self.targets = [] #[(target index, alias, weight)]
+        self.itemSize = 1 #3 per target, set by capture
+
+    def getTargetAttr(self, node, index):
+        return "%s.inputTarget[0].inputTargetGroup[%d].inputTargetItem[6000]" % (node, index)
+
+    def capture(self, mesh):
+        numVertices = cmds.polyEvaluate(mesh, v=1)
+        indices = cmds.getAttr(self.blendShape + ".weight", multiIndices=1) or []
+        aliasList = cmds.aliasAttr(self.blendShape, q=1) or [] #[alias, attr, alias, attr ...]
+        aliases = dict(zip(aliasList[1::2], aliasList[0::2]))
+        self.targets = [(i, aliases.get("weight[%d]" % i, "target%d" % i), cmds.getAttr("%s.weight[%d]" % (self.blendShape, i))) for i in indices]
+        self.itemSize = 3 * len(self.targets) or 1 #no targets - one zero per vertex, apply does nothing
+
+        output = [0.0] * (numVertices * self.itemSize)
+        for column, (index, alias, weight) in enumerate(self.targets):
+            attr = self.getTargetAttr(self.blendShape, index)
+            deltas = cmds.getAttr(attr + ".inputPointsTarget") or []
+            components = cmds.getAttr(attr + ".inputComponentsTarget") or []
+            vertexIds = []
+            for component in components: #["vtx[0:4]", "vtx[9]"]
+                ids = component[component.index("[") + 1:-1].split(":")
+                vertexIds.extend(range(int(ids[0]), int(ids[-1]) + 1))
+            for v, delta in zip(vertexIds, deltas):
+                start = v * self.itemSize + column * 3
+                output[start:start + 3] = delta[:3]
+        return output
+
+    def apply(self, mesh, values):
+        if not self.targets:
+            return
+        node = cmds.blendShape(mesh, frontOfChain=1, n=self.blendShape.split("|")[-1])[0]
+        numVertices = len(values) // self.itemSize
+        if numpy is not None:
+            block = numpy.asarray(values, dtype=numpy.float64).reshape(numVertices, len(self.targets), 3)
+        for column, (index, alias, weight) in enumerate(self.targets):
+            #the targets store moved vertices only
+            if numpy is not None:
+                vertexIds = numpy.nonzero(numpy.any(block[:, column] != 0.0, axis=1))[0].tolist()
+                deltas = [tuple(i) + (1.0,) for i in block[vertexIds, column].tolist()]
+            else:
+                vertexIds = []
+                deltas = []
+                for v in range(numVertices):
+                    start = v * self.itemSize + column * 3
+                    delta = values[start:start + 3]
+                    if delta[0] or delta[1] or delta[2]:
+                        vertexIds.append(v)
+                        deltas.append((float(delta[0]), float(delta[1]), float(delta[2]), 1.0))
+            attr = self.getTargetAttr(node, index)
+            cmds.setAttr(attr + ".inputPointsTarget", len(deltas), *deltas, type="pointArray")
+            cmds.setAttr(attr + ".inputComponentsTarget", len(vertexIds), *["vtx[%d]" % v for v in vertexIds], type="componentList")
+            cmds.setAttr("%s.weight[%d]" % (node, index), weight) #the source weight - connected weights are not reconnected
+            cmds.aliasAttr(alias, "%s.weight[%d]" % (node, index))
+
+
+class deformerMapChannel(vertexChannel):
+    kind = "deformerMap"
+    needsHistory = True
+    fill = 1.0 #unpainted weights are 1
+    nodeTypes = ("deltaMush", "tension") #rebuilt from their attributes alone
+
+    def __init__(self, deformer):
+        """
+            @param[in] deformer: weight only geometry filter on the combined mesh (one of nodeTypes)
+            the separated meshes get a new deformer of the same type, non array attributes are copied
+            deformers driven by input connections (cluster handles, softMod / nonLinear matrices, wire curves ...) are refused,
+            a bare node of their type would not deform like the source
+        """
+        self.deformer = deformer
+        self.nodeType = None
+        self.settings = {}
+
+    def capture(self, mesh):
+        numVertices = cmds.polyEvaluate(mesh, v=1)
+        self.nodeType = cmds.nodeType(self.deformer)
+        if self.nodeType not in self.nodeTypes:
+            raise RuntimeError("%s is a %s, deformerMap channels rebuild weight only deformers: %s" % (self.deformer, self.nodeType, ", ".join(self.nodeTypes)))
+        self.settings = {}
+        for attr in cmds.listAttr(self.deformer, k=1, scalar=1) or []:
+            try:
+                self.settings[attr] = cmds.getAttr("%s.%s" % (self.deformer, attr))
+            except (RuntimeError, ValueError): #compound children, message attributes
+                pass
+
+        #weightList[0].weights is sparse - only painted weights exist, read them through the plug
+        from combineSeparate import api2
+        plug = api2.om2.MFnDependencyNode(api2.getDependNode(self.deformer)).findPlug("weightList", False)
+        plug = plug.elementByLogicalIndex(0).child(0)
+        output = [self.fill] * numVertices
+        for v in plug.getExistingArrayAttributeIndices():
+            if v < numVertices:
+                output[v] = plug.elementByLogicalIndex(v).asDouble()
+        return output
+
+    def apply(self, mesh, values):
+        node = cmds.deformer(mesh, type=self.nodeType, n=self.deformer.split("|")[-1])[0]
+        for attr, value in self.settings.items():
+            try:
+                cmds.setAttr("%s.%s" % (node, attr), value)
+            except RuntimeError: #locked or connected
+                pass
+        values = [float(i) for i in values]
+        if values:
+            cmds.setAttr("%s.weightList[0].weights[0:%d]" % (node, len(values) - 1), *values, size=len(values))
+
+
+CHANNELS = {
+    "array": arrayChannel,
+    "colorSet": colorSetChannel,
+    "blendShape": blendShapeChannel,
+    "deformerMap": deformerMapChannel,
+}
+
+
+def registerChannel(channelClass):
+    """
+        @param[in] channelClass: vertexChannel subclass with a unique kind
+    """
+    CHANNELS[channelClass.kind] = channelClass
+    return channelClass
+
+
+def createChannel(kind, *args, **kwargs):
+    return CHANNELS[kind](*args, **kwargs)
+
+
+def captureChannels(channels, mesh):
+    """
+        @returns: captured values per channel - one read of the combined mesh per channel
+    """
+    return [channel.capture(mesh) for channel in channels]
+
+
+def transferChannels(channels, captured, indexMap, meshIndices=None):
+    """
+        @param[in] channels: vertexChannel list
+        @param[in] captured: captureChannels result
+        @param[in] indexMap: vertexIndexMap of the separated meshes
+        @param[in] meshIndices: indices into indexMap.meshes to write, None for all
+    """
+    if meshIndices is None:
+        meshIndices = range(len(indexMap))
+    for i in meshIndices:
+        for channel, values in zip(channels, captured):
+            channel.apply(indexMap.meshes[i], indexMap.gather(values, channel.itemSize, i, channel.fill))
@@ -0,0 +1,59 @@
+from combineSeparate.backend import standinBackend, makeSyntheticScene
+from combineSeparate.combineLedger import combineLedger, topologyChecksum
+
+
+"""
+combine ledger - index ranges of the sources inside the combined mesh
+"""
+
+
+def makeLedger(order=None):
+    """
+        @param[in] order: source order of the combined mesh, None for the order the sources are recorded in
+        @returns: (ledger, setCombined result, backend, names, combined)
+    """
+    backend = standinBackend()
+    names, combined = makeSyntheticScene(backend, numObjects=3, shellsPerObject=2, shellResolution=3, numInfluences=4)
+    if order is not None:
+        #the synthetic objects share one topology - an extra triangle tells the first one apart
+        first = backend.meshes[names[0]]
+        numVertices = len(first["points"]) // 3
+        first["points"].extend([50.0, 0.0, 0.0, 51.0, 0.0, 0.0, 50.0, 1.0, 0.0])
+        first["faceCounts"].append(3)
+        first["faceConnects"].extend([numVertices, numVertices + 1, numVertices + 2])
+        combined = backend.combine([names[i] for i in order], "combinedReordered")
+
+    ledger = combineLedger()
+    for name in names:
+        numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(name)
+        ledger.addSource(name, numVertices, faceCounts, faceConnects)
+    numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(combined)
+    return ledger, ledger.setCombined(faceCounts, faceConnects), backend, names, combined
+
+
+def test_ranges():
+    ledger, valid, backend, names, combined = makeLedger()
+    assert valid
+    assert len(ledger) == 3
+    assert ledger.getVertexRange(1) == (18, 36)
+    assert list(ledger.getFaceIndices(2)) == list(range(16, 24))
+
+    numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(combined)
+    assert ledger.matches(topologyChecksum(faceCounts, faceConnects))
+    assert combineLedger.fromDict(ledger.toDict()).toDict() == ledger.toDict()
+
+
+def test_outOfOrderTopology():
+    ledger, valid, backend, names, combined = makeLedger(order=[1, 0, 2])
+    assert not valid
+    numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(combined)
+    assert not ledger.matches(topologyChecksum(faceCounts, faceConnects))
+
+
+def test_editedAfterCombine():
+    ledger, valid, backend, names, combined = makeLedger()
+    numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(combined)
+    faceConnects = list(faceConnects)
+    faceConnects[0], faceConnects[1] = faceConnects[1], faceConnects[0] #a flipped face
+    assert valid
+    assert not ledger.matches(topologyChecksum(faceCounts, faceConnects))
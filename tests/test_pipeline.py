@@ -0,0 +1,180 @@
+import pytest
+
+from combineSeparate import arrayStore, pipeline, shellBounds, sparseWeights as sparseWeightsModule, verification, vertexTransfer
+from combineSeparate import benchmark
+from combineSeparate.arrayStore import pointBlock
+from combineSeparate.backend import standinBackend, makeGridShell, makeSyntheticScene
+from combineSeparate.meshShells import labelShells, groupShells
+from combineSeparate.shellIndex import shellIndex
+from combineSeparate.spatialHash import pointHash
+from combineSeparate.sparseWeights import sparseWeights
+
+
+"""
+pipeline stages on synthetic scenes (backend.makeSyntheticScene) - no Maya needed
+    python -m pytest -q
+"""
+
+
+NUMPY_MODULES = [arrayStore, pipeline, shellBounds, sparseWeightsModule, verification, vertexTransfer]
+
+
+@pytest.fixture
+def scene():
+    backend = standinBackend()
+    names, combined = makeSyntheticScene(backend, numObjects=3, shellsPerObject=4, shellResolution=3, numInfluences=8)
+    return backend, names, combined
+
+
+@pytest.fixture
+def pure(monkeypatch):
+    """
+        @run without numpy - the pure Python fallbacks of every module
+    """
+    for module in NUMPY_MODULES:
+        monkeypatch.setattr(module, "numpy", None)
+
+
+def runStages(backend, names, combined):
+    """
+        @returns: (shell labels, vertex maps, remapped weights per separated mesh) of the combined mesh
+    """
+    capture = pipeline.captureMesh(backend, combined, True)
+    faceLabels, shells, combinedSignatures = pipeline.analyseShells(capture["numVertices"], capture["faceCounts"], capture["faceConnects"], capture["points"].data)
+
+    origSignatures = []
+    for name in names:
+        numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(name)
+        origSignatures.append(pipeline.analyseShells(numVertices, faceCounts, faceConnects, backend.getMeshPoints(name))[2])
+    assignment, unmatched = pipeline.matchShells(origSignatures, combinedSignatures)
+    assert not unmatched
+
+    objectFaceIds = [[] for i in names]
+    for idx_k, idx_i in enumerate(assignment):
+        objectFaceIds[idx_i].extend(shells[idx_k])
+    separated = backend.separate(combined, [sorted(i) for i in objectFaceIds], ["%s_separated" % i for i in names])
+
+    combinedHash = pipeline.buildVertexHash(capture["points"])
+    vertexMaps = [pipeline.matchVertices(combinedHash, pointBlock(backend.getMeshPoints(name))) for name, vertexIds in separated]
+    for vertexMap, (name, vertexIds) in zip(vertexMaps, separated):
+        assert list(vertexMap) == list(vertexIds)
+
+    remapped = [(list(columns), [float(w) for w in weights]) for columns, weights in pipeline.iterRemapWeights(capture["sparseWeights"], vertexMaps)]
+    return list(faceLabels), vertexMaps, remapped
+
+
+def test_labelShells():
+    points, faceCounts, faceConnects = makeGridShell(3, (0.0, 0.0, 0.0))
+    #second shell shares no vertex with the first
+    faceCounts = faceCounts + faceCounts
+    faceConnects = faceConnects + [i + 9 for i in faceConnects]
+    faceLabels, numShells = labelShells(18, faceCounts, faceConnects)
+    assert numShells == 2
+    assert list(faceLabels) == [0] * 4 + [1] * 4
+    assert [list(i) for i in groupShells(faceLabels, numShells)] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+
+def test_labelShells_faceWithoutVertices():
+    faceLabels, numShells = labelShells(3, [3, 0], [0, 1, 2])
+    assert numShells == 2
+    assert list(faceLabels) == [0, 1]
+
+
+def test_shellIndex_claim(scene):
+    backend, names, combined = scene
+    numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(combined)
+    signatures = pipeline.analyseShells(numVertices, faceCounts, faceConnects, backend.getMeshPoints(combined))[2]
+
+    index = shellIndex(signatures)
+    assert len(index) == len(signatures)
+    assert index.find(signatures[5]) == 5
+    assert index.claim(signatures[5]) == 5
+    assert index.claim(signatures[5]) == -1 #claimed shells are not matched again
+
+
+def test_pointHash_claim():
+    points = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 0.0, 0.0)]
+    hash = pointHash(points, 1e-4)
+    assert hash.find((1.00001, 0.0, 0.0)) == 1
+    assert hash.find((0.5, 0.0, 0.0)) == -1
+    #coincident points resolve in order
+    assert hash.claim((0.0, 0.0, 0.0)) == 0
+    assert hash.claim((0.0, 0.0, 0.0)) == 2
+    assert hash.claim((0.0, 0.0, 0.0)) == -1
+
+
+def test_sparseWeights_prune():
+    weights = sparseWeights.fromDense([0.1, 0.2, 0.3, 0.4,
+                                       0.5, 0.5, 0.0, 0.0], 4)
+    pruned = weights.prune(2)
+    indices, values = pruned.getRow(0)
+    assert list(indices) == [2, 3]
+    assert [round(i, 6) for i in values] == [round(0.3 / 0.7, 6), round(0.4 / 0.7, 6)]
+    indices, values = pruned.getRow(1)
+    assert list(indices) == [0, 1] #untouched below the limit
+    assert list(values) == [0.5, 0.5]
+
+
+def test_sparseWeights_prune_pure(pure):
+    test_sparseWeights_prune()
+
+
+def test_numpy_parity(scene, monkeypatch):
+    pytest.importorskip("numpy")
+    backend, names, combined = scene
+    expected = runStages(backend, names, combined)
+
+    for module in NUMPY_MODULES:
+        monkeypatch.setattr(module, "numpy", None)
+    faceLabels, vertexMaps, remapped = runStages(backend, names, combined)
+
+    assert faceLabels == expected[0]
+    assert [list(i) for i in vertexMaps] == [list(i) for i in expected[1]]
+    for (columns, weights), (expectedColumns, expectedWeights) in zip(remapped, expected[2]):
+        assert columns == expectedColumns
+        assert weights == pytest.approx(expectedWeights)
+
+
+@pytest.mark.parametrize("chunkSize", [None, 7])
+def test_benchmark_runSize(chunkSize):
+    result = benchmark.runSize(4, numObjects=3, shellResolution=3, numInfluences=8, chunkSize=chunkSize)
+    assert result["shells"] == 12
+    assert result["unmatchedShells"] == 0
+    assert result["mismatchedMeshes"] == 0
+    assert result["maxError"] == pytest.approx(0.0, abs=1e-9)
+    assert set(result["seconds"]) == set(benchmark.STAGES)
+
+
+def getSceneRemapInput(backend, names, combined):
+    """
+        @returns: (sparseWeights of the combined mesh, vertex map per separated mesh)
+    """
+    capture = pipeline.captureMesh(backend, combined, True)
+    faceLabels, shells, combinedSignatures = pipeline.analyseShells(capture["numVertices"], capture["faceCounts"], capture["faceConnects"], capture["points"].data)
+    objectFaceIds = [[] for i in names]
+    for idx_k, faceIds in enumerate(shells):
+        objectFaceIds[idx_k % len(names)].extend(faceIds)
+    separated = backend.separate(combined, [sorted(i) for i in objectFaceIds], ["%s_separated" % i for i in names])
+    return capture["sparseWeights"], [vertexIds for name, vertexIds in separated]
+
+
+def test_iterRemapWeights_parallel_equals_serial(scene):
+    weights, vertexMaps = getSceneRemapInput(*scene)
+    vertexMaps = vertexMaps * 4 #more meshes than the in-flight window of 4 workers
+
+    serial = list(pipeline.iterRemapWeights(weights, vertexMaps, 1))
+    parallel = list(pipeline.iterRemapWeights(weights, vertexMaps, 4))
+
+    assert len(parallel) == len(serial)
+    for (columns, values), (serialColumns, serialValues) in zip(parallel, serial):
+        assert list(columns) == list(serialColumns)
+        assert list(values) == list(serialValues) #bit for bit, no tolerance
+
+
+def test_iterRemapWeights_close_early(scene):
+    weights, vertexMaps = getSceneRemapInput(*scene)
+    remapped = pipeline.iterRemapWeights(weights, vertexMaps * 4, 4)
+    next(remapped)
+    remapped.close() #a setWeights raising in doRecreateSkinning - the pool is shut down, nothing hangs
+    with pytest.raises(StopIteration):
+        next(remapped)
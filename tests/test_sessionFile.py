@@ -0,0 +1,62 @@
+import pytest
+
+from combineSeparate import sessionFile
+
+
+"""
+binary session files - write / memory-mapped read round trip and version check
+"""
+
+
+ARRAYS = {
+    "points": ("d", [0.0, 1.5, -2.25, 1e-300]),
+    "indices": ("i", [0, 7, -1, 2 ** 31 - 1]),
+    "indptr": ("q", [0, 2, 2 ** 40]),
+    "empty": ("d", []),
+}
+
+
+def roundTrip(path):
+    size = sessionFile.saveSession(str(path), {"version": 2, "names": ["a", "b"]}, ARRAYS)
+    assert size == path.stat().st_size
+
+    session = sessionFile.loadSession(str(path), (2,))
+    try:
+        assert session.header["names"] == ["a", "b"]
+        for name, (typecode, values) in ARRAYS.items():
+            assert name in session
+            assert list(session.getArray(name)) == values
+    finally:
+        session.close()
+
+
+def test_roundTrip(tmp_path):
+    roundTrip(tmp_path / "session.cssession")
+
+
+def test_roundTrip_pure(tmp_path, monkeypatch):
+    monkeypatch.setattr(sessionFile, "numpy", None)
+    roundTrip(tmp_path / "session.cssession")
+
+
+def test_unknownVersion(tmp_path):
+    path = str(tmp_path / "session.cssession")
+    sessionFile.saveSession(path, {"version": 3}, {})
+    with pytest.raises(ValueError):
+        sessionFile.loadSession(path, (2,))
+    assert sessionFile.loadSession(path).header["version"] == 3 #None accepts any version
+
+
+def test_notASession(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a session file")
+    with pytest.raises(ValueError):
+        sessionFile.loadSession(str(path))
+
+
+def test_objectCombine_rejectsOldLayout(tmp_path):
+    from combineSeparate.main import objectCombine, SESSION_VERSION
+    path = str(tmp_path / "old.cssession")
+    sessionFile.saveSession(path, {"version": SESSION_VERSION - 1}, {"combinedWeights": ("d", [1.0])})
+    with pytest.raises(ValueError):
+        objectCombine.loadSession(path)
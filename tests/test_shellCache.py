@@ -0,0 +1,53 @@
+from combineSeparate import pipeline
+from combineSeparate.backend import makeGridShell
+from combineSeparate.shellCache import shellCache, meshKey
+
+
+"""
+shell analysis cache - in-memory LRU and disk tier
+"""
+
+
+def makeEntry(offset):
+    """
+        @returns: (key, pipeline.analyseShells entry) of a grid shell at x = offset
+    """
+    points, faceCounts, faceConnects = makeGridShell(3, (offset, 0.0, 0.0))
+    return meshKey(faceCounts, faceConnects, points), pipeline.analyseShells(9, faceCounts, faceConnects, points)
+
+
+def test_meshKey_changesWithPoints():
+    assert makeEntry(0.0)[0] == makeEntry(0.0)[0]
+    assert makeEntry(0.0)[0] != makeEntry(1.0)[0]
+
+
+def test_lruEviction():
+    cache = shellCache(2)
+    (keyA, entryA), (keyB, entryB), (keyC, entryC) = [makeEntry(i) for i in range(3)]
+    cache.put(keyA, entryA)
+    cache.put(keyB, entryB)
+    assert cache.get(keyA) is entryA #A is now the most recently used
+    cache.put(keyC, entryC) #evicts B
+
+    assert len(cache) == 2
+    assert cache.get(keyB) is None
+    assert cache.get(keyA) is entryA
+    assert cache.get(keyC) is entryC
+    assert cache.getStats() == {"entries": 2, "hits": 3, "diskHits": 0, "misses": 1}
+
+
+def test_diskHitAfterMemoryMiss(tmp_path):
+    directory = str(tmp_path / "shells")
+    key, entry = makeEntry(0.0)
+    shellCache(4, directory).put(key, entry)
+
+    cache = shellCache(4, directory) #a new session - nothing in memory
+    assert key in cache
+    cached = cache.get(key)
+    assert cache.getStats()["diskHits"] == 1
+    assert list(cached[0]) == list(entry[0])
+    assert [list(i) for i in cached[1]] == [list(i) for i in entry[1]]
+    assert [list(map(list, i[2:])) for i in cached[2]] == [list(map(list, i[2:])) for i in entry[2]]
+
+    cache.get(key) #promoted back to memory
+    assert cache.getStats()["hits"] == 1
@@ -0,0 +1,94 @@
+from combineSeparate import pipeline
+from combineSeparate.backend import standinBackend, makeSyntheticScene
+from combineSeparate.sparseWeights import sparseWeights
+
+
+"""
+incremental re-separation - per object change detection of doUpdate (getSourceHashes + getSourceChanges)
+"""
+
+
+def makeScene():
+    """
+        @returns: (backend, original names, combined name, combined face indices per original object)
+    """
+    backend = standinBackend()
+    names, combined = makeSyntheticScene(backend, numObjects=3, shellsPerObject=2, shellResolution=3, numInfluences=8)
+    objectFaceIds = []
+    start = 0
+    for name in names:
+        count = len(backend.meshes[name]["faceCounts"])
+        objectFaceIds.append(list(range(start, start + count)))
+        start += count
+    return backend, names, combined, objectFaceIds
+
+
+def getHashes(backend, combined, objectFaceIds, weights=None, vertexIds=None):
+    """
+        @param[in] weights: sparseWeights of the combined mesh, None to capture them from it
+    """
+    numVertices, faceCounts, faceConnects = backend.getMeshConnectivity(combined)
+    influences = ["joint%d" % i for i in range(8)]
+    if weights is None:
+        influences, weights = pipeline.captureSkinWeights(backend, combined)
+    return pipeline.getSourceHashes(faceCounts, faceConnects, backend.getMeshPoints(combined), objectFaceIds, weights, influences, vertexIds)
+
+
+def test_unchanged():
+    backend, names, combined, objectFaceIds = makeScene()
+    hashes = getHashes(backend, combined, objectFaceIds)
+    assert pipeline.getSourceChanges(hashes, getHashes(backend, combined, objectFaceIds)) == ["unchanged"] * 3
+
+
+def test_editedPoint_rebuildsThatObjectOnly():
+    backend, names, combined, objectFaceIds = makeScene()
+    hashes = getHashes(backend, combined, objectFaceIds)
+
+    vertex = len(backend.meshes[names[0]]["points"]) // 3 + 1 #a vertex of the second object
+    backend.meshes[combined]["points"][vertex * 3 + 1] += 0.5
+    assert pipeline.getSourceChanges(hashes, getHashes(backend, combined, objectFaceIds)) == ["unchanged", "geometry", "unchanged"]
+
+
+def test_editedWeights():
+    backend, names, combined, objectFaceIds = makeScene()
+    hashes = getHashes(backend, combined, objectFaceIds)
+
+    weights = backend.meshes[combined]["weights"]
+    numInfluences = len(backend.meshes[combined]["influences"])
+    row = weights[-numInfluences:] #last vertex, third object
+    weights[-numInfluences:] = row[1:] + row[:1]
+    assert pipeline.getSourceChanges(hashes, getHashes(backend, combined, objectFaceIds)) == ["unchanged", "unchanged", "weights"]
+
+
+def test_topologyEdit_renumbersTheOtherObjects():
+    backend, names, combined, objectFaceIds = makeScene()
+    vertexIds = []
+    hashes = getHashes(backend, combined, objectFaceIds, vertexIds=vertexIds)
+    influences, weights = pipeline.captureSkinWeights(backend, combined)
+
+    #one new triangle on the first object - every vertex of the other objects moves up by three
+    first = backend.meshes[names[0]]
+    numVertices = len(first["points"]) // 3
+    first["points"].extend([50.0, 0.0, 0.0, 51.0, 0.0, 0.0, 50.0, 1.0, 0.0])
+    first["faceCounts"].append(3)
+    first["faceConnects"].extend([numVertices, numVertices + 1, numVertices + 2])
+    edited = backend.combine(names, "combinedEdited")
+
+    rows = list(range(numVertices)) + [-1] * 3 + list(range(numVertices, len(weights)))
+    editedFaceIds = [objectFaceIds[0] + [objectFaceIds[0][-1] + 1]] + [[i + 1 for i in faceIds] for faceIds in objectFaceIds[1:]]
+    editedVertexIds = []
+    editedHashes = getHashes(backend, edited, editedFaceIds, weights.getRows(rows), editedVertexIds)
+
+    assert pipeline.getSourceChanges(hashes, editedHashes) == ["geometry", "unchanged", "unchanged"]
+    #the kept meshes are mapped again through the new vertex ids (doUpdate refreshes separatedVertexIds)
+    for i in (1, 2):
+        assert list(editedVertexIds[i]) == [v + 3 for v in vertexIds[i]]
+
+
+def test_objectWithoutFaces():
+    backend, names, combined, objectFaceIds = makeScene()
+    objectFaceIds[1] = []
+    vertexIds = []
+    hashes = getHashes(backend, combined, objectFaceIds, vertexIds=vertexIds)
+    assert hashes[1] == (None, None)
+    assert vertexIds[1] is None
@@ -0,0 +1,67 @@
+import pytest
+
+from combineSeparate import pipeline, verification, sparseWeights as sparseWeightsModule
+from combineSeparate.backend import standinBackend, makeSyntheticScene
+from combineSeparate.sparseWeights import sparseWeights
+
+
+"""
+round-trip skinning verification - a correct remap passes, a swapped influence order is reported
+"""
+
+
+NUM_INFLUENCES = 8
+
+
+def verifyScene(swapMesh=None):
+    """
+        @param[in] swapMesh: separated mesh index whose first two influence columns are swapped, None for a correct remap
+        @returns: verifySkinning report
+    """
+    backend = standinBackend()
+    names, combined = makeSyntheticScene(backend, numObjects=3, shellsPerObject=2, shellResolution=3, numInfluences=NUM_INFLUENCES)
+    capture = pipeline.captureMesh(backend, combined, True)
+
+    objectFaceIds = []
+    start = 0
+    for name in names:
+        count = len(backend.meshes[name]["faceCounts"])
+        objectFaceIds.append(list(range(start, start + count)))
+        start += count
+    separated = backend.separate(combined, objectFaceIds, ["%s_separated" % i for i in names])
+    vertexMaps = [vertexIds for name, vertexIds in separated]
+
+    restored = []
+    for idx, ((name, vertexIds), (usedColumns, weights)) in enumerate(zip(separated, pipeline.iterRemapWeights(capture["sparseWeights"], vertexMaps))):
+        columns = list(usedColumns)
+        if idx == swapMesh:
+            columns[0], columns[1] = columns[1], columns[0] #the skinCluster got its influences in another order
+        weights = sparseWeights.fromDense(weights, len(columns))
+        restored.append((name, backend.getMeshPoints(name), verification.toInfluenceColumns(weights, columns, NUM_INFLUENCES)))
+
+    center, size = verification.getBounds(capture["points"].data)
+    poses = verification.samplePoses(NUM_INFLUENCES, 4, center, size, seed=1)
+    return verification.verifySkinning(capture["points"].data, capture["sparseWeights"], vertexMaps, restored, poses)
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def mode(request, monkeypatch):
+    if request.param == "pure":
+        for module in (pipeline, verification, sparseWeightsModule):
+            monkeypatch.setattr(module, "numpy", None)
+    return request.param
+
+
+def test_correctRemap(mode):
+    report = verifyScene()
+    assert report["failed"] == 0
+    assert report["maxError"] == pytest.approx(0.0, abs=1e-9)
+    assert [i["unmatched"] for i in report["objects"]] == [0, 0, 0]
+
+
+def test_swappedInfluenceOrder(mode):
+    report = verifyScene(swapMesh=1)
+    assert report["failed"] > 0
+    assert [bool(i["failed"]) for i in report["objects"]] == [False, True, False]
+    assert report["objects"][1]["maxError"] > 1e-3
+    assert report["objects"][1]["maxRestError"] == pytest.approx(0.0, abs=1e-9) #positions are right, only the weights are wrong